@@ -94,16 +94,57 @@ class SomeCharm(CharmBase):
         manifest_items = [KubernetesManifest(rendered_manifests)]
         self._service_accounts_manifests_wrapper.send_data(manifest_items)
 ```
+
+For large sets of manifests, both KubernetesManifestsRequirer and
+KubernetesManifestRequirerWrapper accept `encoding=GZIP_ENCODING` to send the manifests
+gzip-compressed and base64-encoded.  Providers using this version of the library decode both
+plain JSON and compressed data transparently, but older providers only understand plain JSON,
+which remains the default.
+
+Requirers send each manifest under its own key, with its hash, to providers advertising the
+per-manifest protocol, which can then use `KubernetesManifestsProvider.get_manifests_delta`.
+
+The provider only emits `updated` with the manifests added, modified and removed on a relation.
+
+The manifests are serialized once per `send_data` call, as canonical JSON (sorted keys and compact
+separators), and the same payload is written to every relation
+that does not already hold it.  Identical `send_data` calls within one hook dispatch (for example
+when deferred events are re-emitted before the dispatched one) only compare the relation data
+once.  With `coalesce=True`, the requirers go further and only mark the manifests to be sent,
+sending them once when the framework commits at the end of the dispatch.
+
+KubernetesManifest items are immutable and hashable.  They only keep the canonical serialization
+of their manifest, and cache its digest and identity, so reusing the same items across
+`send_data` calls does not serialize them again, and comparing items compares their digests.
+
+Manifests can be given ManifestTargets, the namespaces they are meant for: explicit namespaces
+(for example the namespaces of some Kubeflow profiles) and/or a namespace label selector.  The
+targets of all the manifests sent are indexed by namespace and by distinct selector, and sent in
+KUBERNETES_MANIFESTS_TARGETS_FIELD, so that providers can get the manifests of a namespace with
+`KubernetesManifestsProvider.get_manifests_for_namespace` without checking every manifest.
+Manifests without targets are meant for every namespace, as are all the manifests for providers
+using an older version of this library, which ignore the field.
 """
+
+import base64
+import gzip
+import hashlib
 import json
 import logging
 import os
-from dataclasses import dataclass, field
-from typing import List, Optional, Union
+from dataclasses import dataclass
+from typing import Callable, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Tuple, Union
 
-import yaml
 from ops.charm import CharmBase, RelationEvent
-from ops.framework import BoundEvent, EventBase, EventSource, Object, ObjectEvents
+from ops.framework import (
+    BoundEvent,
+    EventBase,
+    EventSource,
+    Handle,
+    Object,
+    ObjectEvents,
+    StoredState,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -115,30 +156,392 @@ LIBAPI = 0
 
 # Increment this PATCH version before using `charmcraft publish-lib` or reset
 # to 0 if you are raising the major API version
-LIBPATCH = 1
+LIBPATCH = 14
 
 KUBERNETES_MANIFESTS_FIELD = "kubernetes_manifests"
 
+# Encodings of the KUBERNETES_MANIFESTS_FIELD data.  Plain JSON data has no marker, while
+# compressed data is prefixed with its encoding marker (which a JSON document can never start
+# with), so providers can decode data sent by both older and newer requirers.
+JSON_ENCODING = "json"
+GZIP_ENCODING = "gzip"
+GZIP_ENCODING_MARKER = "gzip+base64:"
+
+# Protocols of the kubernetes_manifest interface:
+# * SINGLE_KEY_PROTOCOL: all the manifests are sent as one list in KUBERNETES_MANIFESTS_FIELD
+# * PER_MANIFEST_PROTOCOL: each manifest is sent under its own key, named after its identity,
+#   along with its hash.  KUBERNETES_MANIFESTS_INDEX_FIELD maps the identity of every manifest
+#   sent to its hash, and KUBERNETES_MANIFESTS_REVISION_FIELD is incremented every time the
+#   manifests change.  Providers can then only read and apply the manifests whose hash changed,
+#   and detect deleted manifests from the index.
+# Providers list the protocols they support in KUBERNETES_MANIFESTS_PROTOCOLS_FIELD of their
+# application data.  Requirers only use PER_MANIFEST_PROTOCOL with providers that support it,
+# and fall back to SINGLE_KEY_PROTOCOL for older providers.
+SINGLE_KEY_PROTOCOL = "single-key"
+PER_MANIFEST_PROTOCOL = "per-manifest"
+SUPPORTED_PROTOCOLS = [SINGLE_KEY_PROTOCOL, PER_MANIFEST_PROTOCOL]
+KUBERNETES_MANIFESTS_PROTOCOLS_FIELD = "kubernetes_manifests_protocols"
+KUBERNETES_MANIFESTS_INDEX_FIELD = "kubernetes_manifests_index"
+KUBERNETES_MANIFESTS_REVISION_FIELD = "kubernetes_manifests_revision"
+KUBERNETES_MANIFEST_KEY_PREFIX = "kubernetes_manifest:"
+# The ManifestsTargetsIndex of the manifests sent, with both protocols.  Not set when no manifest
+# has targets.
+KUBERNETES_MANIFESTS_TARGETS_FIELD = "kubernetes_manifests_targets"
+
 
-@dataclass
 class KubernetesManifest:
     """
     Representation of a Kubernetes Object sent to Kubernetes Manifests.
 
+    Instances are immutable and only keep the canonical JSON serialization of the manifest: the
+    content is parsed when the object is created, to validate it, and then dropped.  The digest
+    and identity of the manifest are computed once, on first use.  Two KubernetesManifest are
+    equal, and hash the same, when their digests are, whatever their formatting and targets.
+
     Args:
         manifest_content: the content of the Kubernetes manifest file
+        manifest: (optional) the already parsed manifest_content.  If provided, the content is
+                  not parsed again, which is useful when the manifests are cached by the charm,
+                  and manifest_content can be omitted.
+        targets: (optional) the namespaces the manifest is meant for, every namespace if None
+    """
+
+    __slots__ = ("_canonical_json", "_digest", "_identity", "_targets")
+
+    def __init__(
+        self,
+        manifest_content: Optional[str] = None,
+        manifest: Optional[dict] = None,
+        targets: Optional["ManifestTargets"] = None,
+    ):
+        if manifest is None:
+            if manifest_content is None:
+                raise TypeError("KubernetesManifest needs a manifest_content or a manifest")
+            # Imported here so that charms sending already parsed manifests do not load yaml
+            import yaml
+
+            manifest = yaml.safe_load(manifest_content)
+        object.__setattr__(self, "_canonical_json", dump_canonical_json(manifest))
+        object.__setattr__(self, "_digest", None)
+        object.__setattr__(self, "_identity", None)
+        object.__setattr__(self, "_targets", targets)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"KubernetesManifest is immutable, cannot set {name}")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"KubernetesManifest is immutable, cannot delete {name}")
+
+    @property
+    def manifest(self) -> dict:
+        """A new copy of the parsed manifest, which can be modified without changing the item."""
+        return json.loads(self._canonical_json)
+
+    @property
+    def manifest_content(self) -> str:
+        """
+        The content of the manifest.  As the original content is not kept, this is its canonical
+        JSON serialization, which is valid YAML for the same object.
+        """
+        return self._canonical_json
+
+    @property
+    def targets(self) -> Optional["ManifestTargets"]:
+        """The namespaces the manifest is meant for, every namespace if None."""
+        return self._targets
+
+    @property
+    def canonical_json(self) -> str:
+        """The canonical JSON serialization of the manifest, see dump_canonical_json."""
+        return self._canonical_json
+
+    @property
+    def canonical_bytes(self) -> bytes:
+        """The canonical JSON serialization of the manifest, UTF-8 encoded."""
+        return self._canonical_json.encode()
+
+    @property
+    def digest(self) -> str:
+        """The digest of the manifest, equal to get_manifest_digest(manifest)."""
+        if self._digest is None:
+            object.__setattr__(self, "_digest", hashlib.sha256(self.canonical_bytes).hexdigest())
+        return self._digest
+
+    @property
+    def identity(self) -> "ManifestIdentity":
+        """The apiVersion/kind/namespace/name identity of the manifest."""
+        if self._identity is None:
+            object.__setattr__(self, "_identity", ManifestIdentity.from_manifest(self.manifest))
+        return self._identity
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, KubernetesManifest):
+            return NotImplemented
+        return self is other or self.digest == other.digest
+
+    def __hash__(self) -> int:
+        return hash(self.digest)
+
+    def __repr__(self) -> str:
+        return f"KubernetesManifest({self.identity.key!r}, digest={self.digest[:12]!r})"
+
+    def __getstate__(self):
+        return self._canonical_json, self._targets
+
+    def __setstate__(self, state):
+        canonical_json, targets = state
+        object.__setattr__(self, "_canonical_json", canonical_json)
+        object.__setattr__(self, "_digest", None)
+        object.__setattr__(self, "_identity", None)
+        object.__setattr__(self, "_targets", targets)
+
+
+ManifestsItemsGetter = Callable[[], List[KubernetesManifest]]
+
+
+class ManifestIdentity(NamedTuple):
+    """The identity of a Kubernetes object, which is unique within a cluster."""
+
+    api_version: str
+    kind: str
+    namespace: str
+    name: str
+
+    @classmethod
+    def from_manifest(cls, manifest: dict) -> "ManifestIdentity":
+        """Returns the identity of a manifest.  Missing fields are set to empty strings."""
+        metadata = manifest.get("metadata") or {}
+        return cls(
+            api_version=manifest.get("apiVersion", ""),
+            kind=manifest.get("kind", ""),
+            namespace=metadata.get("namespace", ""),
+            name=metadata.get("name", ""),
+        )
+
+    @property
+    def key(self) -> str:
+        """Returns the identity as a apiVersion/kind/namespace/name string."""
+        return "/".join(self)
+
+
+@dataclass(frozen=True)
+class ManifestTargets:
     """
+    The namespaces a manifest is meant for: the namespaces listed, and the namespaces that have
+    all the labels of namespace_selector.  At least one of them must be set, manifests meant for
+    every namespace have no targets.
 
-    manifest_content: str
-    manifest: dict = field(init=False)
+    Args:
+        namespaces: names of the namespaces, for example the namespaces of Kubeflow profiles
+        namespace_selector: the labels, as a mapping or (key, value) pairs, of the namespaces
+    """
+
+    namespaces: Tuple[str, ...] = ()
+    namespace_selector: Tuple[Tuple[str, str], ...] = ()
 
     def __post_init__(self):
-        """Validate that the manifest content is a valid YAML."""
-        self.manifest = yaml.safe_load(self.manifest_content)
+        # Normalised so that equal targets are equal, and are indexed and serialized the same way
+        object.__setattr__(self, "namespaces", tuple(sorted(set(self.namespaces))))
+        object.__setattr__(
+            self, "namespace_selector", tuple(sorted(dict(self.namespace_selector).items()))
+        )
+        if not self.namespaces and not self.namespace_selector:
+            raise ValueError("ManifestTargets need namespaces or a namespace_selector")
+
+    def matches(self, namespace: str, labels: Optional[Dict[str, str]] = None) -> bool:
+        """Returns whether a namespace, with labels, is targeted."""
+        if namespace in self.namespaces:
+            return True
+        return bool(self.namespace_selector) and selector_matches(
+            self.namespace_selector, labels or {}
+        )
+
+
+class ManifestsTargetsIndex:
+    """
+    The targets of the manifests sent on a relation, indexed so that the manifests of a namespace
+    are found without checking the targets of every manifest: the identity keys of the targeted
+    manifests by namespace, and by distinct namespace selector.  Manifests that are not in the
+    index have no targets.
+
+    The index is sent in KUBERNETES_MANIFESTS_TARGETS_FIELD as
+    `{"namespaces": {namespace: [keys]}, "selectors": [{"labels": labels, "manifests": [keys]}]}`.
+    """
+
+    def __init__(
+        self,
+        namespaces: Dict[str, FrozenSet[str]],
+        selectors: Dict[Tuple[Tuple[str, str], ...], FrozenSet[str]],
+    ):
+        self.namespaces = namespaces
+        self.selectors = selectors
+        self.targeted: FrozenSet[str] = frozenset().union(
+            *namespaces.values(), *selectors.values()
+        )
+        self._targets_by_key: Optional[Dict[str, ManifestTargets]] = None
+
+    @classmethod
+    def from_targets(
+        cls, targets_by_key: Dict[str, Optional[ManifestTargets]]
+    ) -> "ManifestsTargetsIndex":
+        """Returns the index of the targets of manifests, by identity key (None if untargeted)."""
+        namespaces: Dict[str, set] = {}
+        selectors: Dict[Tuple[Tuple[str, str], ...], set] = {}
+        for key, targets in targets_by_key.items():
+            if targets is None:
+                continue
+            for namespace in targets.namespaces:
+                namespaces.setdefault(namespace, set()).add(key)
+            if targets.namespace_selector:
+                selectors.setdefault(targets.namespace_selector, set()).add(key)
+        return cls(
+            {namespace: frozenset(keys) for namespace, keys in namespaces.items()},
+            {selector: frozenset(keys) for selector, keys in selectors.items()},
+        )
+
+    @classmethod
+    def from_data(cls, data: Optional[str]) -> "ManifestsTargetsIndex":
+        """Returns the index sent in KUBERNETES_MANIFESTS_TARGETS_FIELD (empty if not set)."""
+        if not data:
+            return cls({}, {})
+        parsed = json.loads(data)
+        return cls(
+            {
+                namespace: frozenset(keys)
+                for namespace, keys in parsed.get("namespaces", {}).items()
+            },
+            {
+                tuple(sorted(selector["labels"].items())): frozenset(selector["manifests"])
+                for selector in parsed.get("selectors", [])
+            },
+        )
+
+    @property
+    def data(self) -> str:
+        """The KUBERNETES_MANIFESTS_TARGETS_FIELD data of the index, empty if it is empty."""
+        if not self.targeted:
+            return ""
+        return dump_canonical_json(
+            {
+                "namespaces": {
+                    namespace: sorted(keys) for namespace, keys in self.namespaces.items()
+                },
+                "selectors": [
+                    {"labels": dict(selector), "manifests": sorted(keys)}
+                    for selector, keys in sorted(self.selectors.items())
+                ],
+            }
+        )
+
+    @property
+    def targets_by_key(self) -> Dict[str, ManifestTargets]:
+        """The targets of the targeted manifests, by identity key."""
+        if self._targets_by_key is None:
+            namespaces: Dict[str, List[str]] = {}
+            selectors: Dict[str, Tuple[Tuple[str, str], ...]] = {}
+            for namespace, keys in self.namespaces.items():
+                for key in keys:
+                    namespaces.setdefault(key, []).append(namespace)
+            for selector, keys in self.selectors.items():
+                for key in keys:
+                    selectors[key] = selector
+            self._targets_by_key = {
+                key: ManifestTargets(
+                    namespaces=tuple(namespaces.get(key, ())),
+                    namespace_selector=selectors.get(key, ()),
+                )
+                for key in self.targeted
+            }
+        return self._targets_by_key
+
+    def get_targeted_keys(
+        self, namespace: str, labels: Optional[Dict[str, str]] = None
+    ) -> FrozenSet[str]:
+        """Returns the identity keys of the targeted manifests meant for a namespace."""
+        keys = set(self.namespaces.get(namespace, ()))
+        for selector, selector_keys in self.selectors.items():
+            if selector_matches(selector, labels or {}):
+                keys.update(selector_keys)
+        return frozenset(keys)
+
+    def select(
+        self, keys: Iterable[str], namespace: str, labels: Optional[Dict[str, str]] = None
+    ) -> List[str]:
+        """Returns the identity keys, among keys, of the manifests meant for a namespace."""
+        targeted_keys = self.get_targeted_keys(namespace, labels)
+        return [key for key in keys if key not in self.targeted or key in targeted_keys]
+
+
+@dataclass(frozen=True)
+class ManifestConflict:
+    """
+    Different manifests with the same identity sent by different apps.
+
+    Args:
+        identity: the identity shared by the manifests
+        apps: the names of the apps that sent the manifests, the first one being the one used
+    """
+
+    identity: ManifestIdentity
+    apps: Tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class ManifestsDelta:
+    """
+    Changes of the manifests sent on a relation compared to the hashes known by the caller.
+
+    Args:
+        changed: the manifests that were added or modified, by identity key
+        deleted: the identity keys of the manifests that are not sent anymore
+        hashes: the hash of every manifest currently sent, by identity key.  Pass it as the
+                known_hashes of the next get_manifests_delta call.
+    """
+
+    changed: Dict[str, dict]
+    deleted: List[str]
+    hashes: Dict[str, str]
 
 
 class KubernetesManifestsUpdatedEvent(RelationEvent):
-    """Indicates the Kubernetes Objects data was updated."""
+    """
+    Indicates the Kubernetes Objects data was updated.
+
+    Attributes:
+        added: the manifests sent on the relation since the last event, by identity key
+        modified: the manifests of the relation whose content changed, by identity key
+        removed: the identity keys of the manifests not sent on the relation anymore
+    """
+
+    def __init__(
+        self,
+        handle: Handle,
+        relation,
+        app=None,
+        unit=None,
+        added: Optional[Dict[str, dict]] = None,
+        modified: Optional[Dict[str, dict]] = None,
+        removed: Optional[List[str]] = None,
+    ):
+        super().__init__(handle, relation, app=app, unit=unit)
+        self.added = added or {}
+        self.modified = modified or {}
+        self.removed = removed or []
+
+    def snapshot(self) -> dict:
+        """Used by the framework to serialize the event to disk."""
+        snapshot = super().snapshot()
+        snapshot["added"] = json.dumps(self.added)
+        snapshot["modified"] = json.dumps(self.modified)
+        snapshot["removed"] = json.dumps(self.removed)
+        return snapshot
+
+    def restore(self, snapshot: dict):
+        """Used by the framework to deserialize the event from disk."""
+        super().restore(snapshot)
+        self.added = json.loads(snapshot.get("added", "{}"))
+        self.modified = json.loads(snapshot.get("modified", "{}"))
+        self.removed = json.loads(snapshot.get("removed", "[]"))
 
 
 class KubernetesManifestsEvents(ObjectEvents):
@@ -151,6 +554,7 @@ class KubernetesManifestsProvider(Object):
     """Relation manager for the Provider side of the Kubernetes Manifests relations."""
 
     on = KubernetesManifestsEvents()
+    _stored = StoredState()
 
     def __init__(
         self,
@@ -162,11 +566,14 @@ class KubernetesManifestsProvider(Object):
 
         This relation manager subscribes to:
         * on[relation_name].relation_changed
+        * on[relation_name].relation_created and on.leader_elected: to advertise the protocols
+                                                                    this library supports
         * any events provided in refresh_event
 
         This library emits:
         * KubernetesManifestsUpdatedEvent:
-            when data received on the relation is updated
+            when the manifests received on a relation changed, or when it is broken.  On
+            refresh_event, for the relations whose manifests changed, or once if none did.
 
         Args:
             charm: Charm this relation is being used by
@@ -177,11 +584,32 @@ class KubernetesManifestsProvider(Object):
         super().__init__(charm, relation_name)
         self._charm = charm
         self._relation_name = relation_name
+        # Decoded (hash, manifest) pairs and targets index per (relation id, app name), along
+        # with the digest of the raw data they were decoded from, so that unchanged relation data
+        # is never decoded twice.  For PER_MANIFEST_PROTOCOL relations, each manifest is also
+        # cached by (relation id, app name, identity key) so only the manifests that changed are
+        # decoded.
+        self._decoded_manifests: Dict[Tuple[int, str], "_DecodedRelation"] = {}
+        self._decoded_manifest_keys: Dict[Tuple[int, str, str], Tuple[str, dict]] = {}
+        # The last index built by get_manifests_index, along with the digests it was built from
+        self._index_digests: Optional[Tuple[Tuple[int, str, str], ...]] = None
+        self._index: Dict[ManifestIdentity, dict] = {}
+        self._index_hashes: Dict[ManifestIdentity, str] = {}
+        self._targets_index = ManifestsTargetsIndex({}, {})
+        self._conflicts: List[ManifestConflict] = []
+        # The hash of each manifest of each relation when updated was last emitted for it, as
+        # {relation id: {identity key: hash}}, stored as JSON
+        self._stored.set_default(relation_hashes="{}")
 
         self.framework.observe(
             self._charm.on[self._relation_name].relation_changed, self._on_relation_changed
         )
 
+        self.framework.observe(
+            self._charm.on[self._relation_name].relation_created, self._advertise_protocols
+        )
+        self.framework.observe(self._charm.on.leader_elected, self._advertise_protocols)
+
         self.framework.observe(
             self._charm.on[self._relation_name].relation_broken, self._on_relation_broken
         )
@@ -192,13 +620,113 @@ class KubernetesManifestsProvider(Object):
                 refresh_event = [refresh_event]
 
             for evt in refresh_event:
-                self.framework.observe(evt, self._on_relation_changed)
+                self.framework.observe(evt, self._on_refresh_event)
 
     def get_manifests(self) -> List[dict]:
         """
-        Returns a list of dictionaries sent in the data of relation relation_name.
+        Returns a list of dictionaries sent in the data of relation relation_name, each identity
+        only once (see get_conflicts).
+        """
+        return list(self.get_manifests_index().values())
+
+    def get_manifests_for_namespace(
+        self, namespace: str, labels: Optional[Dict[str, str]] = None
+    ) -> List[dict]:
+        """
+        Returns the manifests meant for a namespace: the manifests without targets, and the
+        manifests whose targets match the namespace or its labels.
         """
+        index = self.get_manifests_index()
+        keys = self._targets_index.select((identity.key for identity in index), namespace, labels)
+        manifests_by_key = {identity.key: manifest for identity, manifest in index.items()}
+        return [manifests_by_key[key] for key in keys]
+
+    def get_manifests_targets(self) -> ManifestsTargetsIndex:
+        """
+        Returns the index of the targets of the manifests returned by get_manifests, to select
+        the manifests of many namespaces.
+        """
+        self.get_manifests_index()
+        return self._targets_index
+
+    def get_manifests_index(self) -> Dict[ManifestIdentity, dict]:
+        """Returns the manifests sent on relation relation_name, indexed by identity."""
+        decoded_manifests = self._get_decoded_manifests()
+        index_digests = tuple(
+            (relation_id, app_name, decoded.digest)
+            for relation_id, app_name, decoded in decoded_manifests
+        )
+        if index_digests == self._index_digests:
+            return self._index
+
+        index: Dict[ManifestIdentity, dict] = {}
+        index_hashes: Dict[ManifestIdentity, str] = {}
+        sender_apps: Dict[ManifestIdentity, List[str]] = {}
+        # The targets of each manifest are the ones sent by the app whose manifest is used
+        targets_by_key: Dict[str, Optional[ManifestTargets]] = {}
+        for _, app_name, decoded in decoded_manifests:
+            relation_targets = decoded.targets_index.targets_by_key
+            for manifest_hash, manifest in decoded.manifests:
+                identity = ManifestIdentity.from_manifest(manifest)
+                if identity not in index:
+                    index[identity] = manifest
+                    index_hashes[identity] = manifest_hash
+                    sender_apps[identity] = [app_name]
+                    targets_by_key[identity.key] = relation_targets.get(identity.key)
+                elif index_hashes[identity] != manifest_hash:
+                    sender_apps[identity].append(app_name)
+
+        self._conflicts = [
+            ManifestConflict(identity=identity, apps=tuple(apps))
+            for identity, apps in sender_apps.items()
+            if len(apps) > 1
+        ]
+        for conflict in self._conflicts:
+            logger.warning(
+                f"Conflicting manifests for {conflict.identity.key} sent by apps "
+                f"{', '.join(conflict.apps)} on relation {self._relation_name}.  Using the one "
+                f"sent by {conflict.apps[0]}."
+            )
+
+        self._index_digests = index_digests
+        self._index = index
+        self._index_hashes = index_hashes
+        self._targets_index = ManifestsTargetsIndex.from_targets(targets_by_key)
+        return index
+
+    def get_manifests_delta(self, known_hashes: Dict[str, str]) -> ManifestsDelta:
+        """
+        Returns the manifests that changed compared to known_hashes, targets included.
+
+        Args:
+            known_hashes: the hash of every manifest the caller already applied, by identity key,
+                          usually the ManifestsDelta.hashes of the previous call.
+        """
+        index = self.get_manifests_index()
+        targets_by_key = self._targets_index.targets_by_key
+        hashes = {
+            identity.key: get_targeted_hash(
+                self._index_hashes[identity], targets_by_key.get(identity.key)
+            )
+            for identity in index
+        }
+        return ManifestsDelta(
+            changed={
+                identity.key: manifest
+                for identity, manifest in index.items()
+                if known_hashes.get(identity.key) != hashes[identity.key]
+            },
+            deleted=sorted(key for key in known_hashes if key not in hashes),
+            hashes=hashes,
+        )
 
+    def get_conflicts(self) -> List[ManifestConflict]:
+        """Returns the manifests with the same identity but different content sent by apps."""
+        self.get_manifests_index()
+        return self._conflicts
+
+    def _get_decoded_manifests(self) -> List[Tuple[int, str, "_DecodedRelation"]]:
+        """Returns the (relation id, app name, decoded data) of every relation."""
         other_app_to_skip = get_name_of_breaking_app(relation_name=self._relation_name)
 
         if other_app_to_skip:
@@ -207,7 +735,7 @@ class KubernetesManifestsProvider(Object):
                 f"exclude {self._relation_name} manifests from other app named '{other_app_to_skip}'.  "
             )
 
-        manifests = []
+        decoded_manifests = []
 
         kubernetes_manifests_relations = self._charm.model.relations[self._relation_name]
 
@@ -216,19 +744,150 @@ class KubernetesManifestsProvider(Object):
             if other_app.name == other_app_to_skip:
                 # Skip this app because it is leaving a broken relation
                 continue
-            json_data = relation.data[other_app].get(KUBERNETES_MANIFESTS_FIELD, "[]")
-            manifests.extend(json.loads(json_data))
-
+            decoded = self._decode_relation(relation)
+            decoded_manifests.append((relation.id, other_app.name, decoded))
+
+        return decoded_manifests
+
+    def _decode_relation(self, relation) -> "_DecodedRelation":
+        """Returns the digest of the data of a relation, its (hash, manifest) pairs and targets."""
+        other_app = relation.app
+        relation_data = relation.data[other_app]
+        if KUBERNETES_MANIFESTS_INDEX_FIELD in relation_data:
+            json_data = relation_data[KUBERNETES_MANIFESTS_INDEX_FIELD]
+        else:
+            json_data = relation_data.get(KUBERNETES_MANIFESTS_FIELD, "[]")
+        targets_data = relation_data.get(KUBERNETES_MANIFESTS_TARGETS_FIELD, "")
+        digest = hashlib.sha256(json_data.encode())
+        digest.update(targets_data.encode())
+        digest = digest.hexdigest()
+        cache_key = (relation.id, other_app.name)
+        cached = self._decoded_manifests.get(cache_key)
+        if cached is None or cached.digest != digest:
+            if KUBERNETES_MANIFESTS_INDEX_FIELD in relation_data:
+                manifests = self._decode_per_manifest_keys(
+                    relation.id, other_app.name, relation_data
+                )
+            else:
+                manifests = [
+                    (get_manifest_digest(manifest), manifest)
+                    for manifest in decode_manifests(json_data)
+                ]
+            cached = _DecodedRelation(
+                digest, manifests, ManifestsTargetsIndex.from_data(targets_data)
+            )
+            self._decoded_manifests[cache_key] = cached
+        return cached
+
+    def _decode_per_manifest_keys(
+        self, relation_id: int, app_name: str, relation_data
+    ) -> List[Tuple[str, dict]]:
+        """Returns the (hash, manifest) pairs of a relation using PER_MANIFEST_PROTOCOL."""
+        manifests_index = json.loads(relation_data[KUBERNETES_MANIFESTS_INDEX_FIELD])
+        manifests = []
+        for key, manifest_hash in sorted(manifests_index.items()):
+            cache_key = (relation_id, app_name, key)
+            cached = self._decoded_manifest_keys.get(cache_key)
+            if cached is None or cached[0] != manifest_hash:
+                raw_manifest = relation_data.get(KUBERNETES_MANIFEST_KEY_PREFIX + key)
+                if raw_manifest is None:
+                    logger.warning(
+                        f"Manifest {key} is listed in the index of relation "
+                        f"{self._relation_name}:{relation_id} but was not sent.  Skipping it."
+                    )
+                    continue
+                entry = json.loads(raw_manifest)
+                cached = (entry["hash"], entry["manifest"])
+                self._decoded_manifest_keys[cache_key] = cached
+            manifests.append(cached)
         return manifests
 
+    def _advertise_protocols(self, _):
+        """Sends the protocols supported by this library to every related requirer."""
+        if not self._charm.model.unit.is_leader():
+            return
+        protocols = json.dumps(SUPPORTED_PROTOCOLS)
+        for relation in self._charm.model.relations[self._relation_name]:
+            relation_data = relation.data[self._charm.app]
+            if relation_data.get(KUBERNETES_MANIFESTS_PROTOCOLS_FIELD) != protocols:
+                relation_data[KUBERNETES_MANIFESTS_PROTOCOLS_FIELD] = protocols
 
     def _on_relation_changed(self, event):
         """Handler for relation-changed event for this relation."""
-        self.on.updated.emit(event.relation)
+        if event.app is None:
+            return
+        self._emit_updated(event.relation, event.app, force=False)
+
+    def _on_refresh_event(self, _):
+        """Handler for the refresh events, emitting updated once if no manifests changed."""
+        relations = [
+            relation
+            for relation in self._charm.model.relations[self._relation_name]
+            if relation.app is not None
+        ]
+        emitted = [
+            self._emit_updated(relation, relation.app, force=False) for relation in relations
+        ]
+        if relations and not any(emitted):
+            self._emit_updated(relations[0], relations[0].app, force=True)
 
     def _on_relation_broken(self, event: BoundEvent):
         """Handler for relation-broken event for this relation."""
-        self.on.updated.emit(event.relation)
+        relation_hashes = json.loads(self._stored.relation_hashes)
+        known_hashes = relation_hashes.pop(str(event.relation.id), {})
+        self._stored.relation_hashes = json.dumps(relation_hashes)
+        self.on.updated.emit(event.relation, removed=sorted(known_hashes))
+
+    def _emit_updated(self, relation, app, force: bool) -> bool:
+        """Emits updated with the changed manifests of a relation, if any or if force is True."""
+        decoded = self._decode_relation(relation)
+        targets_by_key = decoded.targets_index.targets_by_key
+        manifests_by_key = {}
+        for manifest_hash, manifest in decoded.manifests:
+            key = ManifestIdentity.from_manifest(manifest).key
+            # Manifests whose targets changed are reported as modified
+            manifests_by_key[key] = (
+                get_targeted_hash(manifest_hash, targets_by_key.get(key)),
+                manifest,
+            )
+        relation_hashes = json.loads(self._stored.relation_hashes)
+        known_hashes = relation_hashes.get(str(relation.id), {})
+        hashes = {key: manifest_hash for key, (manifest_hash, _) in manifests_by_key.items()}
+        if hashes == known_hashes and not force:
+            logger.debug(
+                f"Manifests of relation {self._relation_name}:{relation.id} unchanged.  Not "
+                f"emitting updated."
+            )
+            return False
+
+        relation_hashes[str(relation.id)] = hashes
+        self._stored.relation_hashes = json.dumps(relation_hashes)
+        self.on.updated.emit(
+            relation,
+            app=app,
+            added={
+                key: manifest
+                for key, (_, manifest) in manifests_by_key.items()
+                if key not in known_hashes
+            },
+            modified={
+                key: manifest
+                for key, (manifest_hash, manifest) in manifests_by_key.items()
+                if key in known_hashes and known_hashes[key] != manifest_hash
+            },
+            removed=sorted(key for key in known_hashes if key not in hashes),
+        )
+        return True
+
+
+class _DecodedRelation(NamedTuple):
+    """The data of a relation, decoded by KubernetesManifestsProvider."""
+
+    # Digest of the raw data the manifests and targets were decoded from
+    digest: str
+    # The (hash, manifest) pairs sent on the relation
+    manifests: List[Tuple[str, dict]]
+    targets_index: ManifestsTargetsIndex
 
 
 class KubernetesManifestsRequirer(Object):
@@ -238,8 +897,10 @@ class KubernetesManifestsRequirer(Object):
         self,
         charm: CharmBase,
         relation_name: str,
-        manifests_items: List[KubernetesManifest],
+        manifests_items: Union[List[KubernetesManifest], ManifestsItemsGetter],
         refresh_event: Optional[Union[BoundEvent, List[BoundEvent]]] = None,
+        encoding: str = JSON_ENCODING,
+        coalesce: bool = False,
     ):
         """
         Relation manager for the Requirer side of the Kubernetes Manifests relation.
@@ -248,6 +909,7 @@ class KubernetesManifestsRequirer(Object):
         * on.leader_elected: because only the leader is allowed to provide this data, and
                              relation_created may fire before the leadership election
         * on[relation_name].relation_created
+        * on[relation_name].relation_changed: for the protocols advertised by the provider
 
         * any events provided in refresh_event
 
@@ -257,15 +919,27 @@ class KubernetesManifestsRequirer(Object):
         Args:
             charm: Charm this relation is being used by
             relation_name: Name of this relation (from metadata.yaml)
-            manifests_items: List of KubernetesManifest objects to send over the relation
+            manifests_items: List of KubernetesManifest objects to send over the relation, or a
+                             callable returning that list.  A callable is only called when the
+                             data is actually sent, so the manifests can be loaded lazily.
             refresh_event: List of BoundEvents that this manager should handle.  Use this to update
                            the data sent on this relation on demand.
+            encoding: Encoding of the data sent on the relation, JSON_ENCODING (default) or
+                      GZIP_ENCODING.  Only use GZIP_ENCODING if the provider uses a version of
+                      this library that supports it (LIBPATCH >= 6).
+            coalesce: If True, the events handled by this manager only mark the manifests to be
+                      sent, and they are sent once, when the framework commits at the end of the
+                      hook dispatch.  Unit tests using Harness then need to call
+                      `harness.framework.commit()` before checking the relation data.
         """
         super().__init__(charm, relation_name)
         self._charm = charm
         self._relation_name = relation_name
         self._manifests_items = manifests_items
-        self._requirer_wrapper = KubernetesManifestRequirerWrapper(self._charm, self._relation_name)
+        self._coalesce = coalesce
+        self._requirer_wrapper = KubernetesManifestRequirerWrapper(
+            self._charm, self._relation_name, encoding=encoding
+        )
 
         self.framework.observe(self._charm.on.leader_elected, self._send_data)
 
@@ -273,6 +947,10 @@ class KubernetesManifestsRequirer(Object):
             self._charm.on[self._relation_name].relation_created, self._send_data
         )
 
+        self.framework.observe(
+            self._charm.on[self._relation_name].relation_changed, self._send_data
+        )
+
         # apply user defined events
         if refresh_event:
             if not isinstance(refresh_event, (tuple, list)):
@@ -283,30 +961,78 @@ class KubernetesManifestsRequirer(Object):
 
     def _send_data(self, event: EventBase):
         """Handles any event where we should send data to the relation."""
-        self._requirer_wrapper.send_data(self._manifests_items)
-
-
+        if self._coalesce:
+            self._requirer_wrapper.request_send(self._manifests_items)
+        else:
+            self._requirer_wrapper.send_data(self._manifests_items)
 
 
 class KubernetesManifestRequirerWrapper(Object):
     """
     Wrapper for the relation data sending logic
+
+    Args:
+        charm: Charm this relation is being used by
+        relation_name: Name of this relation (from metadata.yaml)
+        encoding: Encoding of the data sent on the relation, JSON_ENCODING (default) or
+                  GZIP_ENCODING
     """
+
     def __init__(
         self,
         charm: CharmBase,
         relation_name: str,
+        encoding: str = JSON_ENCODING,
     ):
+        if encoding not in (JSON_ENCODING, GZIP_ENCODING):
+            raise ValueError(f"Unsupported kubernetes_manifests encoding: {encoding}")
+        super().__init__(charm, relation_name)
         self._charm = charm
         self._relation_name = relation_name
+        self._encoding = encoding
+        # Number of relation data writes performed/skipped by this wrapper, useful to confirm
+        # that unchanged payloads do not trigger relation-changed events on the provider side.
+        self.writes_performed = 0
+        self.writes_skipped = 0
+        # Size of the relation data values written by this wrapper
+        self.bytes_written = 0
+        # What was last sent in this hook dispatch: the digest of the manifests and the relations
+        # (and their protocols) they were sent on
+        self._sent_key = None
+        # Manifests requested to be sent when the framework commits
+        self._pending_items = None
+
+        self.framework.observe(self._charm.framework.on.pre_commit, self._on_pre_commit)
+
+    def request_send(self, manifest_items: Union[List[KubernetesManifest], ManifestsItemsGetter]):
+        """
+        Marks manifests to be sent when the framework commits, at the end of the hook dispatch.
 
-    def _get_manifests_from_items(self, manifests_items: List[KubernetesManifest]):
-        return [
-            item.manifest for item in manifests_items
-        ]
+        Only the manifests of the last request are sent, once, whatever the number of requests
+        made during the dispatch.  Pass a callable to only compute the manifests when sent.
+        """
+        self._pending_items = manifest_items
+
+    def flush(self):
+        """Sends the manifests requested with request_send, if any."""
+        if self._pending_items is None:
+            return
+        manifest_items, self._pending_items = self._pending_items, None
+        self.send_data(manifest_items)
 
-    def send_data(self, manifest_items: List[KubernetesManifest]):
-        """Sends the manifests data to the relation in json format."""
+    def _on_pre_commit(self, _):
+        """Sends the requested manifests, and forgets what was sent in this dispatch."""
+        self.flush()
+        self._sent_key = None
+
+    def send_data(self, manifest_items: Union[List[KubernetesManifest], ManifestsItemsGetter]):
+        """
+        Sends the manifests data to the relation in json format.
+
+        Args:
+            manifest_items: List of KubernetesManifest objects to send, or a callable returning
+                            that list.  The callable is only called on the leader unit.
+        """
         if not self._charm.model.unit.is_leader():
             logger.info(
                 "KubernetesManifestsRequirer handled send_data event when it is not the "
@@ -314,15 +1040,270 @@ class KubernetesManifestRequirerWrapper(Object):
             )
             return
 
-        manifests = self._get_manifests_from_items(manifest_items)
+        if callable(manifest_items):
+            manifest_items = manifest_items()
+
         relations = self._charm.model.relations.get(self._relation_name)
 
+        # Serialized once, and reused for all the relations
+        payload = _ManifestsPayload(manifest_items, self._encoding)
+
+        sent_key = (
+            payload.digest,
+            payload.targets_data,
+            tuple(
+                (relation.id, tuple(get_provider_protocols(relation))) for relation in relations
+            ),
+        )
+        if sent_key == self._sent_key:
+            self.writes_skipped += len(relations)
+            logger.debug(
+                f"Manifests already sent on relation {self._relation_name} in this dispatch.  "
+                f"Skipping."
+            )
+            return
+
         for relation in relations:
             relation_data = relation.data[self._charm.app]
-            manifests_as_json = json.dumps(manifests)
-            relation_data.update({KUBERNETES_MANIFESTS_FIELD: manifests_as_json})
+            if PER_MANIFEST_PROTOCOL in get_provider_protocols(relation):
+                updates = self._get_per_manifest_updates(relation_data, payload)
+            else:
+                updates = self._get_single_key_updates(relation_data, payload)
+            if relation_data.get(KUBERNETES_MANIFESTS_TARGETS_FIELD, "") != payload.targets_data:
+                updates[KUBERNETES_MANIFESTS_TARGETS_FIELD] = payload.targets_data
+
+            if not updates:
+                self.writes_skipped += 1
+                logger.debug(
+                    f"Manifests sent on relation {self._relation_name}:{relation.id} are "
+                    f"unchanged.  Skipping relation data write."
+                )
+                continue
+            relation_data.update(updates)
+            self.writes_performed += 1
+            self.bytes_written += sum(len(value) for value in updates.values())
+        self._sent_key = sent_key
+
+        logger.info(
+            f"KubernetesManifestsRequirer sent data on relation {self._relation_name}: "
+            f"{self.writes_performed} write(s) performed, {self.writes_skipped} skipped."
+        )
+
+    def _get_single_key_updates(
+        self, relation_data, payload: "_ManifestsPayload"
+    ) -> Dict[str, str]:
+        """Returns the relation data updates needed to send manifests with SINGLE_KEY_PROTOCOL."""
+        current_data = relation_data.get(KUBERNETES_MANIFESTS_FIELD)
+        if current_data is not None and (
+            current_data == payload.encoded
+            or payload.get_digest_of_data(current_data) == payload.digest
+        ):
+            return {}
+
+        updates = {KUBERNETES_MANIFESTS_FIELD: payload.encoded}
+        # Remove any data sent with PER_MANIFEST_PROTOCOL, in case the provider was downgraded
+        current_index = payload.parse_index(relation_data.get(KUBERNETES_MANIFESTS_INDEX_FIELD))
+        for key in current_index:
+            updates[KUBERNETES_MANIFEST_KEY_PREFIX + key] = ""
+        if current_index:
+            updates[KUBERNETES_MANIFESTS_INDEX_FIELD] = ""
+            updates[KUBERNETES_MANIFESTS_REVISION_FIELD] = ""
+        return updates
+
+    def _get_per_manifest_updates(
+        self, relation_data, payload: "_ManifestsPayload"
+    ) -> Dict[str, str]:
+        """Returns the relation data updates sending the manifests with PER_MANIFEST_PROTOCOL."""
+        current_index_data = relation_data.get(KUBERNETES_MANIFESTS_INDEX_FIELD)
+        if (
+            current_index_data == payload.index_data
+            and KUBERNETES_MANIFESTS_FIELD not in relation_data
+        ):
+            return {}
+        current_index = payload.parse_index(current_index_data)
+        new_index = payload.index
+        if current_index == new_index and KUBERNETES_MANIFESTS_FIELD not in relation_data:
+            return {}
+
+        updates = {}
+        for key, manifest_hash in new_index.items():
+            if current_index.get(key) != manifest_hash:
+                updates[KUBERNETES_MANIFEST_KEY_PREFIX + key] = payload.get_manifest_data(key)
+        for key in current_index:
+            if key not in new_index:
+                updates[KUBERNETES_MANIFEST_KEY_PREFIX + key] = ""
+        # Remove the data sent with SINGLE_KEY_PROTOCOL before the provider supported this one
+        if KUBERNETES_MANIFESTS_FIELD in relation_data:
+            updates[KUBERNETES_MANIFESTS_FIELD] = ""
+        updates[KUBERNETES_MANIFESTS_INDEX_FIELD] = payload.index_data
+        revision = int(relation_data.get(KUBERNETES_MANIFESTS_REVISION_FIELD, "0")) + 1
+        updates[KUBERNETES_MANIFESTS_REVISION_FIELD] = str(revision)
+        return updates
+
+
+class _ManifestsPayload:
+    """
+    The manifests sent by one send_data call, serialized at most once whatever the number of
+    relations they are sent on.  What is derived from the data of the relations is memoised too.
+    """
+
+    def __init__(self, items: List[KubernetesManifest], encoding: str):
+        self.items = items
+        # The canonical JSON of a list is the canonical JSON of its items, comma separated
+        self.canonical_json = "[" + ",".join(item.canonical_json for item in items) + "]"
+        self.digest = hashlib.sha256(self.canonical_json.encode()).hexdigest()
+        self._encoding = encoding
+        self._encoded = None
+        self._items_by_key = None
+        self._index = None
+        self._index_data = None
+        self._targets_data = None
+        self._manifests_data = {}
+        self._digests_of_data = {}
+        self._parsed_indexes = {}
+
+    @property
+    def encoded(self) -> str:
+        """The data of KUBERNETES_MANIFESTS_FIELD."""
+        if self._encoded is None:
+            self._encoded = encode_canonical_json(self.canonical_json, self._encoding)
+        return self._encoded
+
+    @property
+    def items_by_key(self) -> Dict[str, KubernetesManifest]:
+        """The manifests items, by identity key."""
+        if self._items_by_key is None:
+            self._items_by_key = {}
+            for item in self.items:
+                key = item.identity.key
+                if key in self._items_by_key:
+                    logger.warning(
+                        f"Several manifests have the identity {key}.  Sending the last one."
+                    )
+                self._items_by_key[key] = item
+        return self._items_by_key
+
+    @property
+    def index(self) -> Dict[str, str]:
+        """The hash of each manifest, by identity key."""
+        if self._index is None:
+            self._index = {key: item.digest for key, item in self.items_by_key.items()}
+        return self._index
+
+    @property
+    def index_data(self) -> str:
+        """The data of KUBERNETES_MANIFESTS_INDEX_FIELD."""
+        if self._index_data is None:
+            self._index_data = dump_canonical_json(self.index)
+        return self._index_data
+
+    @property
+    def targets_data(self) -> str:
+        """The data of KUBERNETES_MANIFESTS_TARGETS_FIELD, empty if no manifest has targets."""
+        if self._targets_data is None:
+            if any(item.targets is not None for item in self.items):
+                self._targets_data = ManifestsTargetsIndex.from_targets(
+                    {key: item.targets for key, item in self.items_by_key.items()}
+                ).data
+            else:
+                self._targets_data = ""
+        return self._targets_data
+
+    def get_manifest_data(self, key: str) -> str:
+        """Returns the data of the key of a manifest in PER_MANIFEST_PROTOCOL."""
+        if key not in self._manifests_data:
+            item = self.items_by_key[key]
+            # Same as dump_canonical_json({"hash": item.digest, "manifest": item.manifest})
+            self._manifests_data[key] = (
+                f'{{"hash":"{item.digest}","manifest":{item.canonical_json}}}'
+            )
+        return self._manifests_data[key]
+
+    def get_digest_of_data(self, data: str) -> str:
+        """Returns the digest of the manifests of some KUBERNETES_MANIFESTS_FIELD data."""
+        if data not in self._digests_of_data:
+            self._digests_of_data[data] = get_manifests_digest(decode_manifests(data))
+        return self._digests_of_data[data]
+
+    def parse_index(self, data: Optional[str]) -> Dict[str, str]:
+        """Returns the KUBERNETES_MANIFESTS_INDEX_FIELD data as a dict (empty if not set)."""
+        if not data:
+            return {}
+        if data not in self._parsed_indexes:
+            self._parsed_indexes[data] = json.loads(data)
+        return self._parsed_indexes[data]
+
+
+def get_provider_protocols(relation) -> List[str]:
+    """Returns the protocols supported by the provider of a relation."""
+    if relation.app is None:
+        return [SINGLE_KEY_PROTOCOL]
+    protocols = relation.data[relation.app].get(KUBERNETES_MANIFESTS_PROTOCOLS_FIELD)
+    if not protocols:
+        # Providers using an older version of this library do not advertise their protocols
+        return [SINGLE_KEY_PROTOCOL]
+    return json.loads(protocols)
+
+
+def encode_manifests(manifests: List[dict], encoding: str = JSON_ENCODING) -> str:
+    """Encodes a list of manifests to be sent in the KUBERNETES_MANIFESTS_FIELD."""
+    return encode_canonical_json(dump_canonical_json(manifests), encoding)
 
 
+def encode_canonical_json(canonical_json: str, encoding: str = JSON_ENCODING) -> str:
+    """Encodes already serialized manifests to be sent in the KUBERNETES_MANIFESTS_FIELD."""
+    if encoding == GZIP_ENCODING:
+        # mtime=0 so that the same manifests always give the same encoded data
+        compressed = gzip.compress(canonical_json.encode(), mtime=0)
+        return GZIP_ENCODING_MARKER + base64.b64encode(compressed).decode()
+    return canonical_json
+
+
+def decode_manifests(data: str) -> List[dict]:
+    """Decodes the KUBERNETES_MANIFESTS_FIELD data, whatever the encoding it was sent with."""
+    if data.startswith(GZIP_ENCODING_MARKER):
+        compressed = base64.b64decode(data[len(GZIP_ENCODING_MARKER) :])
+        return json.loads(gzip.decompress(compressed))
+    return json.loads(data)
+
+
+def dump_canonical_json(data) -> str:
+    """
+    Returns the canonical JSON representation of data: sorted keys, compact separators and
+    non-ASCII characters as is.  Only the json module is used, as other serializers format some
+    floats differently or refuse integers beyond 64 bits, which would change the digests.
+    """
+    return json.dumps(data, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def get_manifest_digest(manifest: dict) -> str:
+    """Returns a digest of a manifest that does not depend on key ordering or whitespace."""
+    return hashlib.sha256(dump_canonical_json(manifest).encode()).hexdigest()
+
+
+def get_targeted_hash(manifest_hash: str, targets: Optional[ManifestTargets]) -> str:
+    """
+    Returns the hash of a manifest combined with its targets, which is the hash of the manifest
+    if it has no targets.
+    """
+    if targets is None:
+        return manifest_hash
+    targets_data = dump_canonical_json([targets.namespaces, targets.namespace_selector])
+    return hashlib.sha256(f"{manifest_hash}:{targets_data}".encode()).hexdigest()
+
+
+def selector_matches(selector: Tuple[Tuple[str, str], ...], labels: Dict[str, str]) -> bool:
+    """Returns whether labels have all the (key, value) pairs of a namespace selector."""
+    return all(labels.get(key) == value for key, value in selector)
+
+
+def get_manifests_digest(manifests: List[dict]) -> str:
+    """
+    Returns a digest of a list of manifests that does not depend on key ordering or
+    whitespace, so that semantically equal payloads have the same digest.
+    """
+    return hashlib.sha256(dump_canonical_json(manifests).encode()).hexdigest()
+
 
 def get_name_of_breaking_app(relation_name: str) -> Optional[str]:
     """
@@ -0,0 +1,20 @@
+# Copyright 2026 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Sets up the hook dispatch before the charm module imports anything else.
+
+charm.py imports this module first, so what is done here applies to all of its imports.  It must
+therefore only import the standard library and the charm's helpers that only depend on it.
+"""
+
+import lazy_imports
+import profiling
+
+# Profile this dispatch if profiling was armed by the profile action, first so that the imports
+# are profiled too
+profiling.start_if_armed()
+
+# Only import the chisme modules used by this charm, not the Kubernetes (kubernetes client and
+# lightkube) related ones, which the `__init__` of these packages import
+lazy_imports.defer_package_init("charmed_kubeflow_chisme.components")
+lazy_imports.defer_package_init("charmed_kubeflow_chisme.status_handling")
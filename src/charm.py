@@ -2,17 +2,46 @@
 # Copyright 2024 Ubuntu
 # See LICENSE file for licensing details.
 
+# Sets up the dispatch before anything else is imported, see bootstrap
+import bootstrap  # noqa: F401  # isort: split
+
 import logging
+import time
+from dataclasses import dataclass
+from typing import List, Tuple
 
 import ops
-from charmed_kubeflow_chisme.components import CharmReconciler, LeadershipGateComponent
+from charmed_kubeflow_chisme.components.leadership_gate_component import LeadershipGateComponent
 
+import profiling
+from components.caching_charm_reconciler import CachingCharmReconciler
+from components.direct_apply_component import DirectApplyComponent
+from components.image_prepull_component import ImagePrepullComponent
 from components.manifests_relation_component import KubernetesManifestRelationComponent
+from direct_apply import DirectApplyConfig
+from gpu_variants import GpuVariant, parse_gpu_variants, render_gpu_variants
+from hook_stats import HookStats
+from image_prepull import PrepullConfig
+from manifest_targets import get_targets_from_charm_config
+from manifests_compiler import COMPILED_MANIFESTS_FILE
+from ngc_catalog import CatalogRenderInputs, NgcCatalog
+from poddefault_generator import PodDefaultConfig
+from thread_env import parse_cpu_budget, render_thread_env
 
 logger = logging.getLogger(__name__)
 
 PODDEFAULT_FILE = "src/templates/poddefault.yaml"
 PODDEFAULTS_RELATION = "pod-defaults"
+PODDEFAULT_SCHEMA_FILE = "src/schemas/poddefault.json"
+
+
+@dataclass(frozen=True)
+class ManifestsRenderInputs:
+    """The inputs of the rendering of the manifests sent."""
+
+    catalog: CatalogRenderInputs
+    gpu_variants: Tuple[GpuVariant, ...] = ()
+    cpu_budget: str = ""
 
 
 class NgcIntegratorCharm(ops.CharmBase):
@@ -21,8 +50,13 @@ class NgcIntegratorCharm(ops.CharmBase):
     def __init__(self, *args):
         super().__init__(*args)
 
+        self.hook_stats = HookStats(self)
+        self.ngc_catalog = NgcCatalog(self)
+
         # Charm logic
-        self.charm_reconciler = CharmReconciler(self)
+        self.charm_reconciler = CachingCharmReconciler(
+            self, state_getter=self._get_reconcile_state
+        )
 
         self.leadership_gate = self.charm_reconciler.add(
             component=LeadershipGateComponent(
@@ -38,12 +72,118 @@ class NgcIntegratorCharm(ops.CharmBase):
                 name="manifests-relation",
                 relation_name=PODDEFAULTS_RELATION,
                 manifests_paths=[PODDEFAULT_FILE],
+                compiled_manifests_path=COMPILED_MANIFESTS_FILE,
+                renderer=self._render_manifests,
+                inputs_getter=lambda: ManifestsRenderInputs(
+                    catalog=CatalogRenderInputs(
+                        config=PodDefaultConfig.from_charm_config(self.model.config),
+                        catalog_key=self.ngc_catalog.get_catalog_key(),
+                    ),
+                    gpu_variants=parse_gpu_variants(self.model.config.get("gpu-variants", "")),
+                    cpu_budget=parse_cpu_budget(
+                        self.model.config.get("cpu-budget", ""), "cpu-budget"
+                    ),
+                ),
+                schemas={("kubeflow.org/v1alpha1", "PodDefault"): PODDEFAULT_SCHEMA_FILE},
+                targets_getter=lambda: get_targets_from_charm_config(self.model.config),
+                # The PodDefaults are applied by the charm itself in direct-apply mode
+                send_enabled_getter=lambda: not self.model.config.get("direct-apply", False),
             ),
             depends_on=[self.leadership_gate],
         )
 
+        self.direct_apply = self.charm_reconciler.add(
+            component=DirectApplyComponent(
+                charm=self,
+                name="direct-apply",
+                manifests_getter=self.manifests_broadcaster.component.get_manifests,
+                inputs_getter=lambda: DirectApplyConfig.from_charm_config(self.model.config),
+                targets_getter=self.manifests_broadcaster.component.get_targets,
+            ),
+            depends_on=[self.leadership_gate],
+        )
+
+        self.image_prepull = self.charm_reconciler.add(
+            component=ImagePrepullComponent(
+                charm=self,
+                name="image-prepull",
+                inputs_getter=lambda: PrepullConfig.from_charm_config(self.model.config),
+            ),
+            depends_on=[self.leadership_gate],
+        )
+
+        for component_item in (
+            self.leadership_gate,
+            self.manifests_broadcaster,
+            self.direct_apply,
+            self.image_prepull,
+        ):
+            self.hook_stats.instrument_component(component_item.name, component_item.component)
+        # Direct apply and the image pre-pull work on the cluster from their own event handlers,
+        # outside of the reconcile
+        for component_item in (self.direct_apply, self.image_prepull):
+            self.hook_stats.instrument_handler(
+                component_item.name, component_item.component, "_apply"
+            )
+        self.hook_stats.instrument_manifests_wrapper(
+            self.manifests_broadcaster.component.manifests_wrapper
+        )
+
         self.charm_reconciler.install_default_event_handlers()
 
+        self.framework.observe(self.on.profile_action, self._on_profile_action)
+
+    def _render_manifests(
+        self, manifests: List[dict], inputs: ManifestsRenderInputs
+    ) -> List[dict]:
+        """
+        Returns the PodDefaults, those of the NGC catalog and of the GPU variants, with the
+        thread counts of their CPU budget.
+        """
+        poddefaults = render_gpu_variants(
+            self.ngc_catalog.render_poddefaults(manifests, inputs.catalog), inputs.gpu_variants
+        )
+        return render_thread_env(poddefaults, inputs.cpu_budget)
+
+    def _get_reconcile_state(self) -> dict:
+        """Returns what the status of the charm's components depends on."""
+        return {
+            "leader": self.unit.is_leader(),
+            "relations": sorted(
+                [relation.name, relation.id, relation.app.name if relation.app else ""]
+                for relations in self.model.relations.values()
+                for relation in relations
+            ),
+            "config": dict(self.model.config),
+            "templates": self.manifests_broadcaster.component.get_templates_digest(),
+            "catalog": self.ngc_catalog.get_catalog_key(),
+            "manifests_error": self.manifests_broadcaster.component.manifests_error,
+            "direct_apply": self.direct_apply.component.get_status().message,
+            "image_prepull": self.image_prepull.component.get_status().message,
+        }
+
+    def _on_profile_action(self, event: ops.ActionEvent):
+        """Arms the profiling of the next hooks and returns the summary of the last profile."""
+        profiles_dir = profiling.get_profiles_dir()
+        if event.params["clear"]:
+            profiling.disarm(profiles_dir)
+            profiling.clear_profiles(profiles_dir)
+        if event.params["dispatches"] or event.params["duration"]:
+            profiling.arm(profiles_dir, event.params["dispatches"], event.params["duration"])
+
+        armed = profiling.read_armed(profiles_dir)
+        profiles = profiling.list_profiles(profiles_dir)
+        results = {
+            "armed-dispatches": str(armed["dispatches"]),
+            "armed-seconds": str(max(round(armed["until"] - time.time()), 0)),
+            "profiles": str(len(profiles)),
+        }
+        if profiles:
+            results["last-profile"] = profiling.summarise_profile(
+                profiles[-1], top=event.params["top"], attach=event.params["attach"]
+            )
+        event.set_results(results)
+
 
 if __name__ == "__main__":  # pragma: nocover
     ops.main(NgcIntegratorCharm)  # type: ignore
@@ -0,0 +1,85 @@
+# Copyright 2026 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+import logging
+from typing import Any, Callable, Optional
+
+from charmed_kubeflow_chisme.components.charm_reconciler import CharmReconciler
+from charmed_kubeflow_chisme.components.component_graph import ComponentGraph
+from ops import CharmBase, ErrorStatus, EventBase, MaintenanceStatus, StatusBase
+from ops.framework import StoredState
+
+from manifests_compiler import get_digest
+
+logger = logging.getLogger(__name__)
+
+
+class CachingCharmReconciler(CharmReconciler):
+    """
+    A CharmReconciler that skips the reconcile when nothing it depends on changed since the last.
+
+    Before reconciling, the digest of the state returned by state_getter (for example the
+    leadership, the relations, the config and the templates) is compared to the digest of the
+    state of the last reconcile, stored in the unit state along with the resulting unit status.
+    If they are equal, the Components are not executed and the stored status is restored, so that
+    idle hooks such as update-status do no work.
+
+    Transient statuses (Maintenance and Error) are not cached, and the cache is cleared on
+    upgrade-charm, as the Components themselves may have changed.
+    """
+
+    _stored = StoredState()
+
+    def __init__(
+        self,
+        charm: CharmBase,
+        state_getter: Callable[[], Any],
+        component_graph: Optional[ComponentGraph] = None,
+        reconcile_on_update_status: bool = True,
+    ):
+        """Instantiate the CachingCharmReconciler.
+
+        Args:
+            charm: a CharmBase object to operate from this CharmReconciler
+            state_getter: function returning the JSON serializable state the Components depend on
+            component_graph: (optional) a ComponentGraph that is used to define the execution order
+                             of Components.  If None, an empty ComponentGraph will be created.
+            reconcile_on_update_status: If True, will do a (cached) execution loop on the
+                                        update-status event.  Else, will only assess the status of
+                                        all Components without executing any.
+        """
+        super().__init__(
+            charm,
+            component_graph=component_graph,
+            reconcile_on_update_status=reconcile_on_update_status,
+        )
+        self._state_getter = state_getter
+        self._stored.set_default(state_digest="", status_name="", status_message="")
+        self.framework.observe(charm.on.upgrade_charm, self._clear_cache)
+
+    def reconcile(self, event: EventBase):
+        """Executes the Components, unless their state did not change since the last reconcile."""
+        state_digest = get_digest(self._state_getter())
+        if state_digest == self._stored.state_digest:
+            logger.info(
+                f"Nothing changed since the last reconcile, skipping it for event "
+                f"'{event.handle}'"
+            )
+            self._charm.unit.status = StatusBase.from_name(
+                self._stored.status_name, self._stored.status_message
+            )
+            return
+
+        super().reconcile(event)
+
+        status = self._charm.unit.status
+        if isinstance(status, (MaintenanceStatus, ErrorStatus)):
+            self._clear_cache()
+            return
+        self._stored.state_digest = state_digest
+        self._stored.status_name = status.name
+        self._stored.status_message = status.message
+
+    def _clear_cache(self, _=None):
+        """Forgets the last reconcile, so that the next one executes the Components."""
+        self._stored.state_digest = ""
@@ -0,0 +1,168 @@
+# Copyright 2026 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+import json
+import logging
+import time
+from typing import Callable, List, Optional
+
+from charmed_kubeflow_chisme.components.component import Component
+from charms.resource_dispatcher.v0.kubernetes_manifests import ManifestTargets
+from ops import ActiveStatus, BlockedStatus, CharmBase, EventBase, StatusBase, UpdateStatusEvent
+from ops.framework import StoredState
+
+from components.manifests_relation_component import InvalidInputsError
+from direct_apply import RESYNC_INTERVAL, ApplyResult, DirectApplyConfig, apply_poddefaults
+from manifests_compiler import InvalidManifestError
+from poddefault_generator import PODDEFAULT_KIND
+
+logger = logging.getLogger(__name__)
+
+
+class DirectApplyComponent(Component):
+    """
+    A Component that applies the PodDefaults directly to the Kubeflow profile namespaces.
+
+    It does nothing unless enabled by the DirectApplyConfig returned by inputs_getter.  The
+    PodDefaults are applied by the leader on config-changed, leader-elected and update-status,
+    so that namespaces of new profiles get them without a charm event.  These events are handled
+    outside of the reconcile, which is skipped when nothing changed in the charm.  On
+    update-status, only the namespaces are listed if neither the PodDefaults nor the namespaces
+    changed since the last successful apply, unless it was more than RESYNC_INTERVAL ago, so that
+    the PodDefaults changed outside of the charm are eventually applied again.  The result of
+    the last apply is kept in the unit state, and the Component is Blocked if some failed.  When
+    disabled after applying, the PodDefaults it applied are deleted.
+    """
+
+    _stored = StoredState()
+
+    def __init__(
+        self,
+        charm: CharmBase,
+        name: str,
+        manifests_getter: Callable[[], List[dict]],
+        inputs_getter: Callable[[], DirectApplyConfig],
+        client_factory: Optional[Callable] = None,
+        targets_getter: Optional[Callable[[], Optional[ManifestTargets]]] = None,
+    ):
+        """Instantiate the DirectApplyComponent.
+
+        Args:
+            charm: the charm using this Component
+            name: name of this Component
+            manifests_getter: function returning the manifests, of which the PodDefaults are
+                              applied.  It raises InvalidInputsError or InvalidManifestError if
+                              they cannot be rendered, in which case nothing is applied.
+            inputs_getter: function returning the DirectApplyConfig
+            client_factory: (optional) function returning the lightkube AsyncClient to use
+            targets_getter: (optional) function returning the targets of the PodDefaults, None if
+                            they are applied to every profile namespace.  It raises
+                            InvalidInputsError if they are invalid, like manifests_getter.
+        """
+        super().__init__(charm, name, inputs_getter=inputs_getter)
+        self._manifests_getter = manifests_getter
+        self._client_factory = client_factory
+        self._targets_getter = targets_getter
+        # The ApplyResult of the last apply, stored as JSON, and when the PodDefaults were last
+        # listed and applied (epoch seconds)
+        self._stored.set_default(last_result="", synced_at=0.0)
+
+        for event in (charm.on.leader_elected, charm.on.config_changed, charm.on.update_status):
+            self.framework.observe(event, self._apply)
+
+    def _get_config(self) -> Optional[DirectApplyConfig]:
+        """Returns the DirectApplyConfig, or None if it is invalid."""
+        try:
+            return self._inputs_getter()
+        except ValueError as err:
+            logger.error(f"Invalid direct apply configuration: {err}")
+            return None
+
+    def _apply(self, event: EventBase):
+        """Applies the PodDefaults if enabled, or deletes them if disabled since, on the leader."""
+        config = self._get_config()
+        if config is None or not self._charm.unit.is_leader():
+            return
+        if not config.enabled:
+            if self._stored.last_result:
+                self._delete_applied(config)
+            return
+        try:
+            poddefaults = [
+                manifest
+                for manifest in self._manifests_getter()
+                if manifest.get("kind") == PODDEFAULT_KIND
+            ]
+            targets = self._targets_getter() if self._targets_getter is not None else None
+        except (InvalidInputsError, InvalidManifestError) as err:
+            logger.error(f"Not applying the PodDefaults: {err}")
+            return
+
+        last_result = self.get_last_result()
+        last_key = None
+        if (
+            isinstance(event, UpdateStatusEvent)
+            and last_result
+            and not last_result.failed
+            and time.time() - self._stored.synced_at < RESYNC_INTERVAL
+        ):
+            last_key = last_result.key
+        try:
+            result = apply_poddefaults(
+                poddefaults,
+                config.concurrency,
+                client_factory=self._client_factory,
+                targets=targets,
+                last_key=last_key,
+            )
+        except Exception as err:
+            # Listing the namespaces or PodDefaults failed, for example if not trusted
+            logger.error(f"Failed to apply the PodDefaults: {err}", exc_info=True)
+            result = ApplyResult(failed=len(poddefaults), errors=(str(err),))
+        if last_key is None or result.key != last_key:
+            self._stored.synced_at = time.time()
+        self._store_result(result)
+
+    def _delete_applied(self, config: DirectApplyConfig):
+        """Deletes the PodDefaults applied, forgetting the last result once they all are."""
+        try:
+            result = apply_poddefaults([], config.concurrency, client_factory=self._client_factory)
+        except Exception as err:
+            logger.error(f"Failed to delete the applied PodDefaults: {err}", exc_info=True)
+            result = ApplyResult(failed=1, errors=(str(err),))
+        if result.failed:
+            self._store_result(result)
+        else:
+            self._stored.last_result = ""
+
+    def _store_result(self, result: ApplyResult):
+        """Stores the result of the last apply in the unit state."""
+        self._stored.last_result = json.dumps(
+            {
+                "applied": result.applied,
+                "unchanged": result.unchanged,
+                "deleted": result.deleted,
+                "failed": result.failed,
+                "errors": list(result.errors),
+                "key": result.key,
+            }
+        )
+
+    def get_last_result(self) -> Optional[ApplyResult]:
+        """Returns the result of the last apply, or None if the PodDefaults were not applied."""
+        if not self._stored.last_result:
+            return None
+        last_result = json.loads(self._stored.last_result)
+        return ApplyResult(**{**last_result, "errors": tuple(last_result["errors"])})
+
+    def get_status(self) -> StatusBase:
+        config = self._get_config()
+        if config is None:
+            return BlockedStatus("Invalid direct-apply-concurrency, see the logs")
+        last_result = self.get_last_result()
+        if last_result is not None and last_result.failed:
+            action = "apply" if config.enabled else "delete"
+            return BlockedStatus(
+                f"Failed to {action} {last_result.failed} PodDefault(s): {last_result.errors[0]}"
+            )
+        return ActiveStatus()
@@ -0,0 +1,100 @@
+# Copyright 2026 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+import logging
+import time
+from typing import Callable, Optional
+
+from charmed_kubeflow_chisme.components.component import Component
+from ops import ActiveStatus, BlockedStatus, CharmBase, EventBase, StatusBase, UpdateStatusEvent
+from ops.framework import StoredState
+
+from direct_apply import RESYNC_INTERVAL
+from image_prepull import PrepullConfig, apply_prepull_daemonset, render_prepull_daemonset
+from manifests_compiler import get_digest
+from poddefault_generator import InvalidConfigError
+
+logger = logging.getLogger(__name__)
+
+
+class ImagePrepullComponent(Component):
+    """
+    A Component that applies the image pre-pull DaemonSet, see image_prepull.
+
+    It does nothing unless the PrepullConfig returned by inputs_getter has images, or a DaemonSet
+    was applied before and has to be deleted.  Like the DirectApplyComponent, the DaemonSet is
+    applied by the leader on config-changed, leader-elected and update-status, outside of the
+    reconcile, and the Component is Blocked if the last apply failed.  On update-status, the
+    cluster is not queried if the rendered DaemonSet did not change since the last successful
+    apply, unless it was more than RESYNC_INTERVAL ago.
+    """
+
+    _stored = StoredState()
+
+    def __init__(
+        self,
+        charm: CharmBase,
+        name: str,
+        inputs_getter: Callable[[], PrepullConfig],
+        client_factory: Optional[Callable] = None,
+    ):
+        """Instantiate the ImagePrepullComponent.
+
+        Args:
+            charm: the charm using this Component
+            name: name of this Component
+            inputs_getter: function returning the PrepullConfig
+            client_factory: (optional) function returning the lightkube AsyncClient to use
+        """
+        super().__init__(charm, name, inputs_getter=inputs_getter)
+        self._client_factory = client_factory
+        # Whether a DaemonSet may be left in the cluster, the error of the last apply, and the
+        # digest of the DaemonSet last applied successfully and when (epoch seconds)
+        self._stored.set_default(applied=False, error="", digest="", synced_at=0.0)
+
+        for event in (charm.on.leader_elected, charm.on.config_changed, charm.on.update_status):
+            self.framework.observe(event, self._apply)
+
+    def _apply(self, event: EventBase):
+        """Applies the DaemonSet, or deletes it once there are no images, on the leader."""
+        try:
+            config = self._inputs_getter()
+        except InvalidConfigError as err:
+            logger.error(f"Not applying the image pre-pull DaemonSet: {err}")
+            return
+        if not self._charm.unit.is_leader() or not (config.images or self._stored.applied):
+            return
+
+        digest = get_digest(render_prepull_daemonset(config))
+        if (
+            isinstance(event, UpdateStatusEvent)
+            and not self._stored.error
+            and digest == self._stored.digest
+            and time.time() - self._stored.synced_at < RESYNC_INTERVAL
+        ):
+            logger.debug("The image pre-pull DaemonSet is unchanged since the last apply")
+            return
+
+        try:
+            apply_prepull_daemonset(config, client_factory=self._client_factory)
+        except Exception as err:
+            # ApiError, for example if not trusted, or an HTTP transport error
+            logger.error(f"Failed to apply the image pre-pull DaemonSet: {err}", exc_info=True)
+            self._stored.applied = True
+            self._stored.error = str(err)
+            return
+        self._stored.applied = bool(config.images)
+        self._stored.error = ""
+        self._stored.digest = digest
+        self._stored.synced_at = time.time()
+
+    def get_status(self) -> StatusBase:
+        try:
+            self._inputs_getter()
+        except InvalidConfigError as err:
+            return BlockedStatus(f"Invalid configuration: {err}")
+        if self._stored.error:
+            return BlockedStatus(
+                f"Failed to apply the image pre-pull DaemonSet: {self._stored.error}"
+            )
+        return ActiveStatus()
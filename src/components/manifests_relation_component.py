@@ -1,43 +1,320 @@
+import dataclasses
+import hashlib
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from charmed_kubeflow_chisme.components.component import Component
 from charms.resource_dispatcher.v0.kubernetes_manifests import (
     KubernetesManifest,
-    KubernetesManifestsRequirer,
+    KubernetesManifestRequirerWrapper,
+    ManifestTargets,
 )
-from ops import ActiveStatus, CharmBase, StatusBase
+from ops import ActiveStatus, BlockedStatus, CharmBase, StatusBase
+from ops.framework import StoredState
+
+from manifests_compiler import (
+    InvalidManifestError,
+    expand_manifests_paths,
+    get_digest,
+    load_compiled_manifests,
+    load_yaml_documents,
+)
+from schema_validation import validate_manifests
+
+logger = logging.getLogger(__name__)
+
+# Files are only parsed in a thread pool when more than this number of them need parsing, as
+# the pool's overhead outweighs its benefits for a few small files
+PARALLEL_PARSING_THRESHOLD = 8
+
+Renderer = Callable[[List[dict], Any], List[dict]]
+
+
+class InvalidInputsError(Exception):
+    """Raised when the inputs needed to render the manifests are invalid."""
 
 
 class KubernetesManifestRelationComponent(Component):
     """
-    A Component that wraps the requirer side of the resource_dispatcher charm library.
+    A Component that sends Kubernetes manifests using the resource_dispatcher charm library.
+
+    The manifests are loaded, from the compiled manifests artifact or the unit state cache when
+    possible, rendered and validated only when they are about to be sent.  The Component is
+    Blocked while the inputs or the manifests are invalid.
     """
 
+    _stored = StoredState()
+
     def __init__(
-        self, charm: CharmBase, name: str, relation_name: str, manifests_paths: List[Path]
+        self,
+        charm: CharmBase,
+        name: str,
+        relation_name: str,
+        manifests_paths: List[Path],
+        compiled_manifests_path: Optional[Path] = None,
+        renderer: Optional[Renderer] = None,
+        inputs_getter: Optional[Callable[[], Any]] = None,
+        schemas: Optional[Dict[Tuple[str, str], str]] = None,
+        targets_getter: Optional[Callable[[], Optional[ManifestTargets]]] = None,
+        send_enabled_getter: Optional[Callable[[], bool]] = None,
     ):
-        super().__init__(charm, name)
+        """Instantiate the KubernetesManifestRelationComponent.
+
+        Args:
+            charm: the charm using this Component
+            name: name of this Component
+            relation_name: name of the relation the manifests are sent on
+            manifests_paths: files, directories or glob patterns of the manifests
+            compiled_manifests_path: (optional) path of the artifact built by manifests_compiler
+            renderer: (optional) function returning the rendered manifests, given the loaded
+                      manifests and the inputs returned by inputs_getter
+            inputs_getter: (optional) function returning the inputs of the renderer, raising
+                           ValueError if they are invalid
+            schemas: (optional) maps the (apiVersion, kind) of manifests to the path of the JSON
+                     schema they are validated against
+            targets_getter: (optional) function returning the targets of the manifests, None
+                            if they are meant for every namespace, raising ValueError if invalid
+            send_enabled_getter: (optional) function returning False when an empty list must be
+                                 sent instead of the manifests
+        """
+        super().__init__(charm, name, inputs_getter=inputs_getter)
         self.relation_name = relation_name
         self.manifests_paths = manifests_paths
+        self.compiled_manifests_path = compiled_manifests_path
+        self._renderer = renderer
+        self.schemas = schemas
+        self._targets_getter = targets_getter
+        self._send_enabled_getter = send_enabled_getter
 
-        self.kubernetes_manifests_requirer = KubernetesManifestsRequirer(
-            charm, relation_name, self._get_manifests_items()
-        )
+        # Maps a manifests file path to the stat of the file and what was derived from it with
+        # that stat: the parsed manifests, stored as JSON, and/or the digest of the file
+        self._stored.set_default(manifests_cache={})
+        # The last rendered manifests, stored as JSON, and the digest of what they were rendered
+        # from
+        self._stored.set_default(render_key="", rendered_manifests="[]")
+        # Why the last manifests could not be sent, if they were invalid
+        self._stored.set_default(manifests_error="")
+
+        self.manifests_wrapper = KubernetesManifestRequirerWrapper(charm, relation_name)
+        for event in (
+            charm.on.leader_elected,
+            charm.on.config_changed,
+            charm.on[relation_name].relation_created,
+            charm.on[relation_name].relation_changed,
+        ):
+            self.framework.observe(event, self._send_manifests)
+        self.framework.observe(charm.on.upgrade_charm, self._clear_render_cache)
+
+    def _send_manifests(self, _):
+        """
+        Requests the manifests to be sent to the relation at the end of the dispatch, unless the
+        inputs to render them are invalid.  They are sent once, whatever the number of events
+        handled in the dispatch.
+        """
+        if self._send_enabled_getter is not None and not self._send_enabled_getter():
+            logger.info(f"Sending no manifests on {self.relation_name}, as it is disabled")
+            self.manifests_wrapper.request_send([])
+            return
+        if not self._charm.unit.is_leader():
+            return
+        try:
+            self.manifests_wrapper.request_send(self._get_manifests_items())
+        except InvalidInputsError as err:
+            logger.error(f"Not sending the manifests on {self.relation_name}: {err}")
+        except InvalidManifestError as err:
+            logger.error(f"Not sending invalid manifests on {self.relation_name}: {err}")
+            self._stored.manifests_error = str(err)
+
+    def _clear_render_cache(self, _=None):
+        """Forgets the last render, as the renderer may have changed with the charm code."""
+        self._stored.render_key = ""
+        self._stored.rendered_manifests = "[]"
+
+    def _get_inputs(self) -> Any:
+        """Returns the inputs of the renderer.
+
+        Raises:
+            InvalidInputsError: if the inputs are invalid
+        """
+        if self._inputs_getter is None:
+            return None
+        try:
+            return self._inputs_getter()
+        except ValueError as err:
+            raise InvalidInputsError(str(err)) from err
+
+    def get_targets(self) -> Optional[ManifestTargets]:
+        """Returns the targets of the manifests, None if they are meant for every namespace.
+
+        Raises:
+            InvalidInputsError: if the targets are invalid
+        """
+        if self._targets_getter is None:
+            return None
+        try:
+            return self._targets_getter()
+        except ValueError as err:
+            raise InvalidInputsError(str(err)) from err
 
     def _get_manifests_items(self) -> List[KubernetesManifest]:
         """
-        Reads the Kubernetes manifests contents from the manifests_paths
-        and creates a KubernetesManifest item for each manifest.
+        Reads the Kubernetes manifests contents from the manifests_paths, renders them if this
+        Component has a renderer, and creates a KubernetesManifest item for each manifest.
+
+        Returns: List of KubernetesManifest, with the targets returned by targets_getter.
+        """
+        targets = self.get_targets()
+        manifests_files = expand_manifests_paths(self.manifests_paths)
+        manifests_per_file = self._get_compiled_manifests(manifests_files)
+        if manifests_per_file is None:
+            manifests_per_file = self._load_manifests(manifests_files)
+        manifests = [manifest for manifests in manifests_per_file for manifest in manifests]
 
-        Returns: List of KubernetesManifest.
+        if self._renderer is not None:
+            manifests = self._render(manifests)
+
+        validate_manifests(manifests, self.schemas)
+        self._stored.manifests_error = ""
+
+        return [KubernetesManifest(manifest=manifest, targets=targets) for manifest in manifests]
+
+    def get_manifests(self) -> List[dict]:
+        """Returns the manifests this Component sends, rendered and validated.
+
+        Raises:
+            InvalidInputsError: if the inputs to render the manifests are invalid
+            InvalidManifestError: if the rendered manifests do not match their schema
         """
-        manifests_items = []
-        for manifest_path in self.manifests_paths:
-            content = Path(manifest_path).read_text()
-            manifest_item = KubernetesManifest(manifest_content=content)
-            manifests_items.append(manifest_item)
-        return manifests_items
+        return [item.manifest for item in self._get_manifests_items()]
+
+    def _render(self, manifests: List[dict]) -> List[dict]:
+        """Returns the rendered manifests, reusing the last render if nothing changed since."""
+        inputs = self._get_inputs()
+        inputs_data = dataclasses.asdict(inputs) if dataclasses.is_dataclass(inputs) else inputs
+        render_key = get_digest([manifests, inputs_data])
+        if render_key == self._stored.render_key:
+            logger.debug("Manifests templates and inputs unchanged, reusing the last render")
+            return json.loads(self._stored.rendered_manifests)
+
+        rendered_manifests = self._renderer(manifests, inputs)
+        self._stored.render_key = render_key
+        self._stored.rendered_manifests = json.dumps(rendered_manifests)
+        return rendered_manifests
+
+    def _get_compiled_manifests(self, manifests_files: List[Path]) -> Optional[List[List[dict]]]:
+        """Returns the manifests of each file from the compiled artifact, if they are all there."""
+        if self.compiled_manifests_path is None:
+            return None
+        compiled_manifests = load_compiled_manifests(self.compiled_manifests_path)
+        if compiled_manifests is None:
+            return None
+
+        sources = compiled_manifests["sources"]
+        if not all(str(path) in sources for path in manifests_files):
+            logger.warning(
+                f"Compiled manifests {self.compiled_manifests_path} do not include all of "
+                f"{self.manifests_paths}.  Parsing the manifests files instead."
+            )
+            return None
+
+        logger.debug(
+            f"Loaded manifests from {self.compiled_manifests_path} "
+            f"(digest {compiled_manifests['digest']})"
+        )
+        return [sources[str(path)] for path in manifests_files]
+
+    def _load_manifests(self, manifests_files: List[Path]) -> List[List[dict]]:
+        """Returns the manifests of each file, only parsing the files that changed."""
+        manifests_per_file = {}
+        files_to_parse = []
+        for manifests_file in manifests_files:
+            cached_manifests = self._get_cached_manifests(manifests_file)
+            if cached_manifests is None:
+                files_to_parse.append(manifests_file)
+            else:
+                manifests_per_file[manifests_file] = cached_manifests
+
+        if len(files_to_parse) > PARALLEL_PARSING_THRESHOLD:
+            with ThreadPoolExecutor() as executor:
+                parsed_files = list(executor.map(parse_manifests_file, files_to_parse))
+        else:
+            parsed_files = [parse_manifests_file(path) for path in files_to_parse]
+
+        # The unit state is only updated from this thread
+        for manifests_file, (stat, manifests) in zip(files_to_parse, parsed_files):
+            self._cache(manifests_file, stat, manifests=json.dumps(manifests))
+            manifests_per_file[manifests_file] = manifests
+
+        return [manifests_per_file[manifests_file] for manifests_file in manifests_files]
+
+    def _get_cached_manifests(self, manifests_file: Path) -> Optional[List[dict]]:
+        """Returns the cached manifests of a file, or None if the file changed since cached."""
+        stat = manifests_file.stat()
+        cached = self._stored.manifests_cache.get(str(manifests_file))
+        if not is_cached_stat(cached, stat) or "manifests" not in cached:
+            return None
+        logger.debug(f"Loaded manifests {manifests_file} from the cache")
+        return json.loads(cached["manifests"])
+
+    @property
+    def manifests_error(self) -> str:
+        """Why the last manifests could not be sent, or an empty string if they were valid."""
+        return self._stored.manifests_error
+
+    def get_templates_digest(self) -> str:
+        """Returns a digest of the content of the manifests files.
+
+        The digest of each file is cached in the unit state along with its stat, so files are
+        only read again once they changed.
+        """
+        templates_digest = hashlib.sha256()
+        for manifests_file in expand_manifests_paths(self.manifests_paths):
+            templates_digest.update(str(manifests_file).encode())
+            templates_digest.update(bytes.fromhex(self._get_file_digest(manifests_file)))
+        return templates_digest.hexdigest()
+
+    def _get_file_digest(self, manifests_file: Path) -> str:
+        """Returns the sha256 digest of a manifests file, from the cache if it did not change."""
+        stat = manifests_file.stat()
+        cached = self._stored.manifests_cache.get(str(manifests_file))
+        if is_cached_stat(cached, stat) and "digest" in cached:
+            return cached["digest"]
+        digest = hashlib.sha256(manifests_file.read_bytes()).hexdigest()
+        self._cache(manifests_file, stat, digest=digest)
+        return digest
+
+    def _cache(self, manifests_file: Path, stat: os.stat_result, **values):
+        """Caches values for a manifests file, keeping the cached ones if the file is unchanged."""
+        cached = self._stored.manifests_cache.get(str(manifests_file))
+        entry = dict(cached) if is_cached_stat(cached, stat) else {}
+        entry.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size, **values)
+        self._stored.manifests_cache[str(manifests_file)] = entry
 
     def get_status(self) -> StatusBase:
+        try:
+            self._get_inputs()
+            self.get_targets()
+        except InvalidInputsError as err:
+            return BlockedStatus(f"Invalid configuration: {err}")
+        if self.manifests_error:
+            return BlockedStatus(f"Invalid manifests: {self.manifests_error}")
         return ActiveStatus()
+
+
+def parse_manifests_file(manifests_file: Path) -> Tuple:
+    """Returns the stat of a manifests file and the list of manifests it contains."""
+    stat = manifests_file.stat()
+    return stat, list(load_yaml_documents(manifests_file.read_text()))
+
+
+def is_cached_stat(cached: Optional[dict], stat: os.stat_result) -> bool:
+    """Returns whether a manifests cache entry was cached for a file with the given stat."""
+    return (
+        cached is not None
+        and cached["mtime_ns"] == stat.st_mtime_ns
+        and cached["size"] == stat.st_size
+    )
@@ -0,0 +1,258 @@
+# Copyright 2026 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Apply the PodDefaults directly to the Kubeflow profile namespaces.
+
+This replaces sending the PodDefaults to the resource-dispatcher, which then applies them, for
+clusters where the extra charm hop is too slow.  The PodDefaults are applied with
+server-side apply by a lightkube AsyncClient, whose pooled HTTP connections are shared by
+concurrent requests, with at most `concurrency` requests in flight.
+
+If the PodDefaults have targets, they are only applied to the profile namespaces that match them.
+
+The PodDefaults applied are labelled as managed by this charm and annotated with the digest of
+their manifest.  Before applying, the managed PodDefaults of all the namespaces are listed in one
+request, and the ones whose digest did not change are not applied again, so that a pass over
+thousands of namespaces where nothing changed costs two list requests.  The managed PodDefaults
+that are not meant to be applied anymore are deleted.  The ApplyResult has a key, the digest of
+the PodDefaults and of the namespaces they are applied to: given the key of the last apply, the
+managed PodDefaults are not even listed if it did not change, so that the pass only costs the
+list of the namespaces.
+
+lightkube is only imported when the PodDefaults are applied, so that charms not using this mode
+do not pay for its import.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Mapping, Optional, Tuple
+
+from charms.resource_dispatcher.v0.kubernetes_manifests import ManifestTargets
+
+from manifests_compiler import get_digest
+
+logger = logging.getLogger(__name__)
+
+FIELD_MANAGER = "ngc-integrator"
+MANAGED_BY_LABEL = "app.kubernetes.io/managed-by"
+DIGEST_ANNOTATION = "ngc-integrator.kubeflow.org/manifest-digest"
+# The label the Kubeflow profile controller sets on the namespaces of the profiles
+PROFILE_NAMESPACE_LABELS = {"app.kubernetes.io/part-of": "kubeflow-profile"}
+DEFAULT_CONCURRENCY = 16
+# Seconds after which the PodDefaults are listed and applied again on update-status even if
+# neither they nor the namespaces changed, to revert the changes made outside of the charm
+RESYNC_INTERVAL = 60 * 60
+# Maximum number of failures reported in the ApplyResult
+MAX_REPORTED_ERRORS = 5
+
+
+@dataclass(frozen=True)
+class DirectApplyConfig:
+    """The charm configuration of the direct apply mode."""
+
+    enabled: bool = False
+    concurrency: int = DEFAULT_CONCURRENCY
+
+    @classmethod
+    def from_charm_config(cls, config: Mapping) -> "DirectApplyConfig":
+        """Returns the DirectApplyConfig of the charm config.
+
+        Raises:
+            ValueError: if direct-apply-concurrency is not a positive integer
+        """
+        concurrency = config.get("direct-apply-concurrency", DEFAULT_CONCURRENCY)
+        if concurrency < 1:
+            raise ValueError(f"direct-apply-concurrency must be at least 1, got {concurrency}")
+        return cls(enabled=config.get("direct-apply", False), concurrency=concurrency)
+
+
+@dataclass(frozen=True)
+class ApplyResult:
+    """
+    The number of PodDefaults applied, unchanged, deleted and failed, the first errors, and the
+    digest of the PodDefaults and of the namespaces they were applied to.
+    """
+
+    applied: int = 0
+    unchanged: int = 0
+    deleted: int = 0
+    failed: int = 0
+    errors: Tuple[str, ...] = field(default=())
+    key: str = ""
+
+    def __str__(self) -> str:
+        return (
+            f"{self.applied} applied, {self.unchanged} unchanged, {self.deleted} deleted, "
+            f"{self.failed} failed"
+        )
+
+
+def get_poddefault_resource():
+    """Returns the lightkube generic resource of the PodDefaults."""
+    from lightkube.generic_resource import create_namespaced_resource
+
+    return create_namespaced_resource(
+        group="kubeflow.org", version="v1alpha1", kind="PodDefault", plural="poddefaults"
+    )
+
+
+def create_client():
+    """Returns a lightkube AsyncClient applying objects as this charm's field manager."""
+    from lightkube import AsyncClient
+
+    return AsyncClient(field_manager=FIELD_MANAGER)
+
+
+def apply_poddefaults(
+    poddefaults: List[dict],
+    concurrency: int = DEFAULT_CONCURRENCY,
+    client_factory: Optional[Callable] = None,
+    targets: Optional[ManifestTargets] = None,
+    last_key: Optional[str] = None,
+) -> ApplyResult:
+    """Applies the PodDefaults to every Kubeflow profile namespace, or to the targeted ones.
+
+    The PodDefaults managed by this charm that are not in poddefaults, or in a namespace they are
+    not applied to anymore, are deleted.  Nothing is listed nor applied beyond the namespaces if
+    the key of the PodDefaults and namespaces is last_key.
+
+    Args:
+        poddefaults: the PodDefault manifests, without namespace.  If empty, all the PodDefaults
+                     managed by this charm are deleted.
+        concurrency: maximum number of concurrent apply requests
+        client_factory: (optional) function returning the lightkube AsyncClient to use
+        targets: (optional) the profile namespaces the PodDefaults are applied to, all of them
+                 if None
+        last_key: (optional) the key of the ApplyResult of the last successful apply
+    """
+    return asyncio.run(
+        _apply_poddefaults(
+            poddefaults, concurrency, client_factory or create_client, targets, last_key
+        )
+    )
+
+
+async def _apply_poddefaults(
+    poddefaults: List[dict],
+    concurrency: int,
+    client_factory: Callable,
+    targets: Optional[ManifestTargets],
+    last_key: Optional[str],
+) -> ApplyResult:
+    from lightkube.resources.core_v1 import Namespace
+
+    poddefault_resource = get_poddefault_resource()
+    client = client_factory()
+    try:
+        namespaces = [
+            namespace.metadata.name
+            async for namespace in client.list(Namespace, labels=PROFILE_NAMESPACE_LABELS)
+            if targets is None
+            or targets.matches(namespace.metadata.name, namespace.metadata.labels)
+        ]
+        digests = [get_digest(poddefault) for poddefault in poddefaults]
+        key = get_digest([digests, sorted(namespaces)])
+        if key == last_key:
+            logger.info(
+                f"The PodDefaults and the {len(namespaces)} profile namespace(s) did not change "
+                f"since the last apply, not applying them"
+            )
+            return ApplyResult(unchanged=len(poddefaults) * len(namespaces), key=key)
+        applied_digests = await _list_applied_digests(client, poddefault_resource)
+
+        semaphore = asyncio.Semaphore(max(concurrency, 1))
+        applies = []
+        unchanged = 0
+        for poddefault, digest in zip(poddefaults, digests):
+            for namespace in namespaces:
+                if applied_digests.get((namespace, poddefault["metadata"]["name"])) == digest:
+                    unchanged += 1
+                    continue
+                obj = poddefault_resource.from_dict(_with_metadata(poddefault, namespace, digest))
+                applies.append(_apply(client, obj, namespace, semaphore))
+        desired = {
+            (namespace, poddefault["metadata"]["name"])
+            for poddefault in poddefaults
+            for namespace in namespaces
+        }
+        deletes = [
+            _delete(client, poddefault_resource, name, namespace, semaphore)
+            for namespace, name in sorted(set(applied_digests) - desired)
+        ]
+        apply_errors, delete_errors = await asyncio.gather(
+            _gather_errors(applies), _gather_errors(deletes)
+        )
+    finally:
+        await client.close()
+
+    errors = apply_errors + delete_errors
+    result = ApplyResult(
+        applied=len(applies) - len(apply_errors),
+        unchanged=unchanged,
+        deleted=len(deletes) - len(delete_errors),
+        failed=len(errors),
+        errors=tuple(errors[:MAX_REPORTED_ERRORS]),
+        key=key,
+    )
+    logger.info(f"Applied the PodDefaults to {len(namespaces)} profile namespace(s): {result}")
+    return result
+
+
+async def _list_applied_digests(client, poddefault_resource) -> Dict[Tuple[str, str], str]:
+    """Returns the digest annotation of the PodDefaults managed by this charm."""
+    applied_digests = {}
+    async for poddefault in client.list(
+        poddefault_resource, namespace="*", labels={MANAGED_BY_LABEL: FIELD_MANAGER}
+    ):
+        annotations = poddefault.metadata.annotations or {}
+        key = (poddefault.metadata.namespace, poddefault.metadata.name)
+        applied_digests[key] = annotations.get(DIGEST_ANNOTATION)
+    return applied_digests
+
+
+async def _gather_errors(requests: List) -> List[str]:
+    """Runs the requests concurrently, returning the errors of the failed ones."""
+    return [error for error in await asyncio.gather(*requests) if error is not None]
+
+
+async def _apply(client, obj, namespace: str, semaphore: asyncio.Semaphore) -> Optional[str]:
+    """Applies an object, returning the error if it failed."""
+    async with semaphore:
+        try:
+            await client.apply(obj, namespace=namespace, field_manager=FIELD_MANAGER, force=True)
+        except Exception as err:
+            # ApiError, or an HTTP transport error
+            error = f"{namespace}/{obj.metadata.name}: {err}"
+            logger.warning(f"Failed to apply PodDefault {error}")
+            return error
+    return None
+
+
+async def _delete(
+    client, poddefault_resource, name: str, namespace: str, semaphore: asyncio.Semaphore
+) -> Optional[str]:
+    """Deletes a PodDefault, returning the error if it failed."""
+    async with semaphore:
+        try:
+            await client.delete(poddefault_resource, name, namespace=namespace)
+        except Exception as err:
+            # ApiError, or an HTTP transport error
+            error = f"{namespace}/{name}: {err}"
+            logger.warning(f"Failed to delete PodDefault {error}")
+            return error
+    return None
+
+
+def _with_metadata(poddefault: dict, namespace: str, digest: str) -> dict:
+    """Returns a copy of a PodDefault in namespace, labelled and annotated with its digest."""
+    metadata = poddefault.get("metadata", {})
+    return {
+        **poddefault,
+        "metadata": {
+            **metadata,
+            "namespace": namespace,
+            "labels": {**metadata.get("labels", {}), MANAGED_BY_LABEL: FIELD_MANAGER},
+            "annotations": {**metadata.get("annotations", {}), DIGEST_ANNOTATION: digest},
+        },
+    }
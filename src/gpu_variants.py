@@ -0,0 +1,187 @@
+# Copyright 2026 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Render a PodDefault per GPU variant, from the `gpu-variants` charm configuration.
+
+The configuration is a YAML list of variants:
+
+    - name: a100
+      product: NVIDIA-A100-SXM4-80GB
+      gpus: 1
+    - name: mig-1g-10gb
+      mig-profile: 1g.10gb
+      # Optional, the tolerations of GPU nodes tainted with nvidia.com/gpu are used if not set
+      tolerations:
+        - {key: nvidia.com/gpu, operator: Exists, effect: NoSchedule}
+      description: NGC notebook on a 1g.10gb MIG slice
+      # Optional, the CPU budget the thread counts of the frameworks are derived from, instead
+      # of the cpu-budget config
+      cpus: "8"
+
+Each variant gives a PodDefault named after the rendered PodDefault template and the variant,
+which applies to the notebooks labelled `enable-ngc-gpu-<name>: "true"`, and adds the tolerations
+of the variant to the template.  The PodDefault CRD has no node affinity, node selector or
+resources, so a variant only adds tolerations: it neither requests GPUs nor schedules the
+notebooks on nodes of its GPU product.  The GPU product, the resource (`nvidia.com/gpu` or the
+`nvidia.com/mig-<profile>` of the MIG profile) and the number of GPUs are set as `ngc.nvidia.com/`
+annotations of the notebook pods, for the notebook spawner configuration or admission policies to
+act on.  The thread counts of a variant with a CPU budget are set from it, see thread_env.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import List, Tuple
+
+from poddefault_generator import (
+    ANNOTATIONS_PREFIX,
+    LABEL_VALUE_REGEX,
+    PODDEFAULT_KIND,
+    SELECTOR_LABEL_PREFIX,
+    InvalidConfigError,
+)
+from thread_env import parse_cpu_budget, set_thread_env
+
+# The prefix of the variant names in the selector labels, which catalog entry names cannot have
+GPU_NAME_PREFIX = "gpu-"
+GPU_SELECTOR_LABEL_PREFIX = SELECTOR_LABEL_PREFIX + GPU_NAME_PREFIX
+GPU_RESOURCE = "nvidia.com/gpu"
+MIG_RESOURCE_PREFIX = "nvidia.com/mig-"
+# The toleration of the taint the NVIDIA GPU operator documents for GPU nodes
+DEFAULT_TOLERATIONS = ({"key": GPU_RESOURCE, "operator": "Exists", "effect": "NoSchedule"},)
+# Variant names are DNS labels short enough for the selector label key to be a valid label key
+VARIANT_NAME_REGEX = re.compile(r"^[a-z0-9]([-a-z0-9]{0,46}[a-z0-9])?$")
+MIG_PROFILE_REGEX = re.compile(r"^[0-9]+g\.[0-9]+gb$")
+VARIANT_FIELDS = ("name", "product", "mig-profile", "gpus", "tolerations", "description", "cpus")
+
+
+@dataclass(frozen=True)
+class GpuVariant:
+    """A GPU variant of the NGC PodDefault."""
+
+    name: str
+    product: str = ""
+    mig_profile: str = ""
+    gpus: int = 1
+    tolerations: Tuple[dict, ...] = DEFAULT_TOLERATIONS
+    description: str = ""
+    # CPU budget of the variant, the one of the charm config if empty
+    cpus: str = ""
+
+    @classmethod
+    def from_record(cls, record: dict) -> "GpuVariant":
+        """Returns the GpuVariant of a record of the gpu-variants config.
+
+        Raises:
+            InvalidConfigError: if the record is not a valid variant
+        """
+        if not isinstance(record, dict):
+            raise InvalidConfigError(f"gpu-variants: variants must be mappings, got {record!r}")
+        name = record.get("name")
+        if not isinstance(name, str) or not VARIANT_NAME_REGEX.match(name):
+            raise InvalidConfigError(
+                f"gpu-variants: name {name!r} must be a DNS label of at most 48 characters"
+            )
+        unknown_fields = set(record) - set(VARIANT_FIELDS)
+        if unknown_fields:
+            raise InvalidConfigError(
+                f"gpu-variants: variant {name} has unknown fields {sorted(unknown_fields)}"
+            )
+
+        product = str(record.get("product", ""))
+        if not LABEL_VALUE_REGEX.match(product):
+            raise InvalidConfigError(f"gpu-variants: product of {name} must be a label value")
+        mig_profile = str(record.get("mig-profile", ""))
+        if mig_profile and not MIG_PROFILE_REGEX.match(mig_profile):
+            raise InvalidConfigError(
+                f"gpu-variants: mig-profile of {name} must be a MIG profile such as 1g.10gb"
+            )
+        gpus = record.get("gpus", 1)
+        if not isinstance(gpus, int) or isinstance(gpus, bool) or gpus < 1:
+            raise InvalidConfigError(f"gpu-variants: gpus of {name} must be a positive integer")
+        tolerations = record.get("tolerations", list(DEFAULT_TOLERATIONS))
+        if not isinstance(tolerations, list) or not all(
+            isinstance(toleration, dict) for toleration in tolerations
+        ):
+            raise InvalidConfigError(f"gpu-variants: tolerations of {name} must be a list")
+        return cls(
+            name=name,
+            product=product,
+            mig_profile=mig_profile,
+            gpus=gpus,
+            tolerations=tuple(tolerations),
+            description=str(record.get("description", "")),
+            cpus=parse_cpu_budget(str(record.get("cpus", "")), f"gpu-variants: cpus of {name}"),
+        )
+
+    @property
+    def resource(self) -> str:
+        """The extended resource of the GPUs of the variant."""
+        return MIG_RESOURCE_PREFIX + self.mig_profile if self.mig_profile else GPU_RESOURCE
+
+
+def parse_gpu_variants(value: str) -> Tuple[GpuVariant, ...]:
+    """Parses the gpu-variants config option, a YAML list of variants.
+
+    Raises:
+        InvalidConfigError: if the option is not a list of valid variants with distinct names
+    """
+    if not value.strip():
+        return ()
+
+    import yaml
+
+    try:
+        records = yaml.load(value, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
+    except yaml.YAMLError as err:
+        raise InvalidConfigError("gpu-variants is not valid YAML") from err
+    if not isinstance(records, list):
+        raise InvalidConfigError("gpu-variants must be a YAML list of variants")
+    variants = tuple(GpuVariant.from_record(record) for record in records)
+    names = [variant.name for variant in variants]
+    if len(set(names)) != len(names):
+        raise InvalidConfigError("gpu-variants: variants must have distinct names")
+    return variants
+
+
+def render_gpu_variant_poddefault(template: dict, variant: GpuVariant) -> dict:
+    """Returns the PodDefault of a GPU variant, sharing its unchanged values with the template."""
+    poddefault = dict(template)
+    metadata = poddefault["metadata"] = dict(template.get("metadata", {}))
+    metadata["name"] = f"{metadata.get('name', 'ngc')}-{variant.name}"
+    annotations = {
+        ANNOTATIONS_PREFIX + "gpu-resource": variant.resource,
+        ANNOTATIONS_PREFIX + "gpu-count": str(variant.gpus),
+    }
+    if variant.product:
+        annotations[ANNOTATIONS_PREFIX + "gpu-product"] = variant.product
+
+    spec = poddefault["spec"] = dict(template.get("spec", {}))
+    # The annotations of the spec are set on the notebook pods
+    spec["annotations"] = {**spec.get("annotations", {}), **annotations}
+    spec["selector"] = {"matchLabels": {GPU_SELECTOR_LABEL_PREFIX + variant.name: "true"}}
+    gpu = variant.product or (f"MIG {variant.mig_profile}" if variant.mig_profile else "GPU")
+    spec["desc"] = (
+        variant.description or f"{spec.get('desc', 'NVIDIA NGC')} ({variant.gpus}x {gpu})"
+    )
+    tolerations = [*spec.get("tolerations", []), *variant.tolerations]
+    if tolerations:
+        spec["tolerations"] = tolerations
+    return set_thread_env(poddefault, variant.cpus) if variant.cpus else poddefault
+
+
+def render_gpu_variants(manifests: List[dict], variants: Tuple[GpuVariant, ...]) -> List[dict]:
+    """Returns the manifests followed by the PodDefaults of the variants.
+
+    The PodDefaults of the variants are derived from the first PodDefault of manifests.
+    """
+    if not variants:
+        return manifests
+    template = next(
+        (manifest for manifest in manifests if manifest.get("kind") == PODDEFAULT_KIND), None
+    )
+    if template is None:
+        return manifests
+    return [
+        *manifests,
+        *(render_gpu_variant_poddefault(template, variant) for variant in variants),
+    ]
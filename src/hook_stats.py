@@ -0,0 +1,181 @@
+# Copyright 2026 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Lightweight timing of the charm's hooks, reported by the `hook-stats` action.
+
+HookStats times the functions it instruments (the reconciler Components' configure_charm, the
+event handlers of Components working outside of the reconcile and the kubernetes_manifests
+library's send_data) during a hook, and when the hook's changes are
+committed appends one entry to a ring buffer kept in the unit state, after sending the manifests
+the instrumented wrappers were requested to send:
+
+    {
+        "hook": "config-changed",
+        "duration": 0.012,
+        "timings": {"leadership-gate": 0.0001, "manifests-relation": 0.0002, "send-data": 0.009},
+        "writes-performed": 1,
+        "writes-skipped": 0,
+        "bytes-written": 701,
+    }
+
+The `hook-stats` action returns the number of entries and the p50/p95/p99 latencies of each hook
+type and of each timed function.
+"""
+
+import json
+import logging
+import math
+import os
+import time
+from functools import wraps
+from typing import Callable, Dict, List, Optional
+
+from charms.resource_dispatcher.v0.kubernetes_manifests import KubernetesManifestRequirerWrapper
+from ops import ActionEvent, CharmBase, Object
+from ops.framework import StoredState
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of entries kept in the ring buffer
+HOOK_STATS_CAPACITY = 200
+PERCENTILES = (50, 95, 99)
+# Counters of KubernetesManifestRequirerWrapper recorded in each entry
+WRAPPER_COUNTERS = ("writes_performed", "writes_skipped", "bytes_written")
+
+
+class HookStats(Object):
+    """Records the timings of the charm's hooks in a bounded ring buffer in the unit state."""
+
+    _stored = StoredState()
+
+    def __init__(self, charm: CharmBase, capacity: int = HOOK_STATS_CAPACITY):
+        super().__init__(charm, "hook-stats")
+        self._charm = charm
+        self._capacity = capacity
+        # The entries, oldest first, stored as JSON
+        self._stored.set_default(entries="[]")
+
+        self._start = time.perf_counter()
+        self._timings: Dict[str, float] = {}
+        self._wrappers: List[KubernetesManifestRequirerWrapper] = []
+        self._wrapper_counters = self._get_wrapper_counters()
+
+        self.framework.observe(self.framework.on.pre_commit, self._on_pre_commit)
+        self.framework.observe(charm.on.hook_stats_action, self._on_hook_stats_action)
+
+    def time(self, name: str, function: Callable) -> Callable:
+        """Returns function, recording the time spent in it under name."""
+
+        @wraps(function)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self._timings[name] = self._timings.get(name, 0.0) + time.perf_counter() - start
+
+        return timed
+
+    def instrument_component(self, name: str, component):
+        """Times the configure_charm of a reconciler Component."""
+        component.configure_charm = self.time(name, component.configure_charm)
+
+    def instrument_handler(self, name: str, observer: Object, method_name: str):
+        """Times an event handler of observer, under name.
+
+        The framework looks handlers up by name when emitting events, so it calls the timed one.
+        """
+        setattr(observer, method_name, self.time(name, getattr(observer, method_name)))
+
+    def instrument_manifests_wrapper(self, wrapper: KubernetesManifestRequirerWrapper):
+        """Times the send_data of a wrapper and records its writes in the entries."""
+        wrapper.send_data = self.time("send-data", wrapper.send_data)
+        self._wrappers.append(wrapper)
+        self._wrapper_counters = self._get_wrapper_counters()
+
+    def get_entries(self) -> List[dict]:
+        """Returns the recorded entries, oldest first."""
+        return json.loads(self._stored.entries)
+
+    def _get_wrapper_counters(self) -> Dict[str, int]:
+        return {
+            counter: sum(getattr(wrapper, counter) for wrapper in self._wrappers)
+            for counter in WRAPPER_COUNTERS
+        }
+
+    def _on_pre_commit(self, _):
+        """Appends the entry of the hook to the ring buffer."""
+        hook = get_dispatched_hook()
+        if hook is None:
+            return
+        # Send what the wrappers were requested to send now, to record it in this entry
+        for wrapper in self._wrappers:
+            wrapper.flush()
+        wrapper_counters = self._get_wrapper_counters()
+        entry = {
+            "hook": hook,
+            "duration": time.perf_counter() - self._start,
+            "timings": self._timings,
+        }
+        for counter, value in wrapper_counters.items():
+            entry[counter.replace("_", "-")] = value - self._wrapper_counters[counter]
+        entries = self.get_entries()
+        entries.append(entry)
+        del entries[: -self._capacity]
+        self._stored.entries = json.dumps(entries)
+
+        # Start a new entry, in case the framework is committed again by the same charm instance
+        self._start = time.perf_counter()
+        self._timings = {}
+        self._wrapper_counters = wrapper_counters
+
+    def _on_hook_stats_action(self, event: ActionEvent):
+        """Returns the count and latency percentiles of each hook type."""
+        event.set_results(summarise_entries(self.get_entries()))
+
+
+def get_dispatched_hook() -> Optional[str]:
+    """Returns the name of the hook being dispatched by Juju, or None for actions."""
+    dispatch_path = os.environ.get("JUJU_DISPATCH_PATH", "")
+    if not dispatch_path.startswith("hooks/"):
+        return None
+    return dispatch_path.removeprefix("hooks/")
+
+
+def get_percentile(sorted_values: List[float], percentile: int) -> float:
+    """Returns the nearest-rank percentile of a non empty sorted list."""
+    rank = math.ceil(percentile / 100 * len(sorted_values))
+    return sorted_values[max(rank, 1) - 1]
+
+
+def get_latencies(durations: List[float]) -> Dict[str, str]:
+    """Returns the percentiles of durations, in milliseconds, formatted as action results."""
+    sorted_durations = sorted(durations)
+    return {
+        f"p{percentile}-ms": f"{get_percentile(sorted_durations, percentile) * 1000:.2f}"
+        for percentile in PERCENTILES
+    }
+
+
+def summarise_entries(entries: List[dict]) -> dict:
+    """Returns the action results summarising the entries of each hook type."""
+    entries_per_hook: Dict[str, List[dict]] = {}
+    for entry in entries:
+        entries_per_hook.setdefault(entry["hook"], []).append(entry)
+
+    results = {}
+    for hook, hook_entries in sorted(entries_per_hook.items()):
+        hook_results = {
+            "count": str(len(hook_entries)),
+            **get_latencies([entry["duration"] for entry in hook_entries]),
+        }
+        names = sorted({name for entry in hook_entries for name in entry["timings"]})
+        for name in names:
+            hook_results[name] = get_latencies(
+                [entry["timings"][name] for entry in hook_entries if name in entry["timings"]]
+            )
+        for counter in WRAPPER_COUNTERS:
+            counter = counter.replace("_", "-")
+            hook_results[counter] = str(sum(entry.get(counter, 0) for entry in hook_entries))
+        results[hook] = hook_results
+    return {"entries": str(len(entries)), "hooks": results}
@@ -0,0 +1,187 @@
+# Copyright 2026 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Render a DaemonSet pre-pulling NGC images on the GPU nodes, from the charm configuration.
+
+NGC images are several gigabytes, so the first notebook started on a node can wait minutes for
+its image.  The DaemonSet pulls the images on the nodes matching the node selector ahead of
+time: each image is an init container that exits immediately, so that the kubelet pulls the
+images one after the other, followed by a pause container keeping the pod, and the images,
+around.
+
+The init containers are named after the digest of their image, so adding or removing an image
+only adds or removes one init container.  When the images change, the kubelets of at most
+`concurrency` nodes pull the new images at once.  The pods only tolerate the taint of the GPU
+nodes, and are only scheduled on the nodes matching the node selector, which cannot be empty.
+
+The DaemonSet is applied by the charm with server-side apply, like the PodDefaults in direct
+apply mode, labelled as managed by this charm and annotated with the digest of its manifest.  The
+managed DaemonSets are listed before applying: the DaemonSet is not applied again if its digest
+did not change, and the ones left in another namespace, or all of them once there are no images
+to pull, are deleted.
+"""
+
+import asyncio
+import hashlib
+import logging
+import re
+from dataclasses import dataclass
+from typing import Callable, Mapping, Optional, Tuple
+
+from direct_apply import DIGEST_ANNOTATION, FIELD_MANAGER, MANAGED_BY_LABEL, create_client
+from gpu_variants import DEFAULT_TOLERATIONS
+from manifests_compiler import get_digest
+from poddefault_generator import InvalidConfigError, parse_labels
+
+logger = logging.getLogger(__name__)
+
+DAEMONSET_NAME = "ngc-image-prepull"
+DEFAULT_NAMESPACE = "kubeflow"
+DEFAULT_NODE_SELECTOR = "nvidia.com/gpu.present=true"
+PAUSE_IMAGE = "registry.k8s.io/pause:3.9"
+INIT_CONTAINER_PREFIX = "pull-"
+# Characters of an image reference: registry, repository, tag and digest
+IMAGE_REGEX = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._/:@-]*$")
+NAMESPACE_REGEX = re.compile(r"^[a-z0-9]([-a-z0-9]{0,61}[a-z0-9])?$")
+# The containers of the DaemonSet do nothing, so they request as little as possible
+CONTAINER_RESOURCES = {"requests": {"cpu": "1m", "memory": "8Mi"}, "limits": {"memory": "32Mi"}}
+
+
+@dataclass(frozen=True)
+class PrepullConfig:
+    """The charm configuration of the image pre-pull DaemonSet, not applied without images."""
+
+    images: Tuple[str, ...] = ()
+    namespace: str = DEFAULT_NAMESPACE
+    node_selector: Tuple[Tuple[str, str], ...] = ()
+    concurrency: int = 1
+
+    @classmethod
+    def from_charm_config(cls, config: Mapping) -> "PrepullConfig":
+        """Returns the PrepullConfig of the charm config.
+
+        Raises:
+            InvalidConfigError: if an option has an invalid value
+        """
+        value = config.get("prepull-images", "")
+        images = tuple(dict.fromkeys(image for image in re.split(r"[,\s]+", value) if image))
+        for image in images:
+            if not IMAGE_REGEX.match(image):
+                raise InvalidConfigError(f"prepull-images: '{image}' is not a valid image")
+        namespace = config.get("prepull-namespace", DEFAULT_NAMESPACE).strip()
+        if not NAMESPACE_REGEX.match(namespace):
+            raise InvalidConfigError(f"prepull-namespace '{namespace}' is not a valid namespace")
+        node_selector = parse_labels(
+            config.get("prepull-node-selector", DEFAULT_NODE_SELECTOR), "prepull-node-selector"
+        )
+        if not node_selector:
+            raise InvalidConfigError("prepull-node-selector must select the nodes to pull on")
+        concurrency = config.get("prepull-concurrency", 1)
+        if concurrency < 1:
+            raise InvalidConfigError(f"prepull-concurrency must be at least 1, got {concurrency}")
+        return cls(
+            images=images,
+            namespace=namespace,
+            node_selector=tuple(sorted(node_selector.items())),
+            concurrency=concurrency,
+        )
+
+
+def get_init_container_name(image: str) -> str:
+    """Returns the name of the init container pulling an image, which only depends on it."""
+    return INIT_CONTAINER_PREFIX + hashlib.sha256(image.encode()).hexdigest()[:16]
+
+
+def render_prepull_daemonset(config: PrepullConfig) -> Optional[dict]:
+    """Returns the DaemonSet pre-pulling the images of config, or None if there are none."""
+    if not config.images:
+        return None
+    labels = {"app.kubernetes.io/name": DAEMONSET_NAME}
+    # The pods only tolerate the taint of the GPU nodes, and only run on the selected nodes
+    pod_spec = {
+        "initContainers": [
+            {
+                "name": get_init_container_name(image),
+                "image": image,
+                "imagePullPolicy": "IfNotPresent",
+                "command": ["sh", "-c", "true"],
+                "resources": CONTAINER_RESOURCES,
+            }
+            for image in config.images
+        ],
+        "containers": [{"name": "pause", "image": PAUSE_IMAGE, "resources": CONTAINER_RESOURCES}],
+        "nodeSelector": dict(config.node_selector),
+        "tolerations": list(DEFAULT_TOLERATIONS),
+        "terminationGracePeriodSeconds": 0,
+    }
+    return {
+        "apiVersion": "apps/v1",
+        "kind": "DaemonSet",
+        "metadata": {
+            "name": DAEMONSET_NAME,
+            "namespace": config.namespace,
+            "labels": {**labels, MANAGED_BY_LABEL: FIELD_MANAGER},
+        },
+        "spec": {
+            "selector": {"matchLabels": labels},
+            "updateStrategy": {
+                "type": "RollingUpdate",
+                "rollingUpdate": {"maxUnavailable": config.concurrency},
+            },
+            "template": {"metadata": {"labels": labels}, "spec": pod_spec},
+        },
+    }
+
+
+def apply_prepull_daemonset(
+    config: PrepullConfig, client_factory: Optional[Callable] = None
+) -> bool:
+    """Applies the pre-pull DaemonSet of config, deleting the other ones managed by this charm.
+
+    Args:
+        config: the PrepullConfig, whose DaemonSet is deleted if it has no images
+        client_factory: (optional) function returning the lightkube AsyncClient to use
+
+    Returns: whether the DaemonSet was applied, False if it was unchanged or deleted.
+
+    Raises:
+        ApiError: if listing, applying or deleting a DaemonSet failed
+    """
+    daemonset = render_prepull_daemonset(config)
+    return asyncio.run(_apply_prepull_daemonset(daemonset, client_factory or create_client))
+
+
+async def _apply_prepull_daemonset(daemonset: Optional[dict], client_factory: Callable) -> bool:
+    from lightkube.resources.apps_v1 import DaemonSet
+
+    namespace = daemonset["metadata"]["namespace"] if daemonset is not None else None
+    digest = get_digest(daemonset) if daemonset is not None else None
+    client = client_factory()
+    try:
+        unchanged = False
+        async for applied in client.list(
+            DaemonSet, namespace="*", labels={MANAGED_BY_LABEL: FIELD_MANAGER}
+        ):
+            if (applied.metadata.namespace, applied.metadata.name) == (namespace, DAEMONSET_NAME):
+                annotations = applied.metadata.annotations or {}
+                unchanged = annotations.get(DIGEST_ANNOTATION) == digest
+                continue
+            logger.info(
+                "Deleting the image pre-pull DaemonSet "
+                f"{applied.metadata.namespace}/{applied.metadata.name}"
+            )
+            await client.delete(
+                DaemonSet, applied.metadata.name, namespace=applied.metadata.namespace
+            )
+
+        if daemonset is None or unchanged:
+            return False
+        annotations = {DIGEST_ANNOTATION: digest}
+        obj = DaemonSet.from_dict(
+            {**daemonset, "metadata": {**daemonset["metadata"], "annotations": annotations}}
+        )
+        await client.apply(obj, field_manager=FIELD_MANAGER, force=True)
+        logger.info(f"Applied the image pre-pull DaemonSet {namespace}/{DAEMONSET_NAME}")
+        return True
+    finally:
+        await client.close()
@@ -0,0 +1,35 @@
+# Copyright 2026 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Helpers to keep the charm's import graph small on every hook dispatch.
+
+Every hook starts a fresh interpreter, so anything imported at module level is paid for on
+every dispatch, even on units that end up doing nothing.
+"""
+
+import importlib.util
+import sys
+
+
+def defer_package_init(name: str):
+    """Registers package `name` without running its `__init__` until an attribute is needed.
+
+    Some packages, such as charmed_kubeflow_chisme.components, import all their submodules (and
+    their heavy dependencies, like the kubernetes client) from `__init__`.  After calling this,
+    `from package.submodule import X` only imports that submodule.  The real `__init__` is
+    executed the first time an attribute that is not a loaded submodule is accessed on the
+    package, so `from package import X` keeps working.
+    """
+    if name in sys.modules:
+        return
+
+    spec = importlib.util.find_spec(name)
+    module = importlib.util.module_from_spec(spec)
+
+    def __getattr__(attribute: str):  # noqa: N807
+        del module.__getattr__
+        spec.loader.exec_module(module)
+        return getattr(module, attribute)
+
+    module.__getattr__ = __getattr__
+    sys.modules[name] = module
@@ -0,0 +1,42 @@
+# Copyright 2026 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Restrict the PodDefaults to some Kubeflow profiles, from the charm configuration.
+
+The targets are sent along with the manifests, so that the resource-dispatcher (and the direct
+apply mode) only apply the PodDefaults to the namespaces of the profiles that use NGC images.
+"""
+
+import re
+from typing import Mapping, Optional, Tuple
+
+from charms.resource_dispatcher.v0.kubernetes_manifests import ManifestTargets
+
+from poddefault_generator import InvalidConfigError, parse_labels
+
+# Kubeflow profiles are cluster-scoped and named after their namespace, a DNS label
+PROFILE_NAME_REGEX = re.compile(r"^[a-z0-9]([-a-z0-9]{0,61}[a-z0-9])?$")
+
+
+def get_targets_from_charm_config(config: Mapping) -> Optional[ManifestTargets]:
+    """Returns the targets of the manifests, or None if they are meant for every profile.
+
+    Raises:
+        InvalidConfigError: if target-profiles or target-namespace-selector is invalid
+    """
+    profiles = parse_profiles(config.get("target-profiles", ""))
+    namespace_selector = parse_labels(
+        config.get("target-namespace-selector", ""), "target-namespace-selector"
+    )
+    if not profiles and not namespace_selector:
+        return None
+    return ManifestTargets(namespaces=profiles, namespace_selector=namespace_selector)
+
+
+def parse_profiles(value: str) -> Tuple[str, ...]:
+    """Parses a comma or whitespace separated list of profile names."""
+    profiles = tuple(profile for profile in re.split(r"[,\s]+", value) if profile)
+    for profile in profiles:
+        if not PROFILE_NAME_REGEX.match(profile):
+            raise InvalidConfigError(f"target-profiles: '{profile}' is not a valid profile name")
+    return profiles
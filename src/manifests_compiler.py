@@ -0,0 +1,156 @@
+# Copyright 2026 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Compile the charm's manifest templates into a ready to send JSON artifact.
+
+This module is run at build time (see charmcraft.yaml) to validate the templates under
+src/templates and to store the parsed manifests in a single canonical JSON file, along with its
+digest.  At runtime the charm loads that artifact instead of parsing YAML.  In development trees,
+where the artifact does not exist, the templates are parsed with the libyaml loader when it is
+available.
+
+The module only depends on the standard library, and on yaml to parse the templates, so that it
+can run before the charm's dependencies are installed.
+
+Usage:
+    python3 src/manifests_compiler.py --output <artifact> <path> [<path> ...]
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import sys
+from pathlib import Path
+from typing import Iterator, List, Optional, Sequence, Union
+
+COMPILED_MANIFESTS_FILE = "src/templates/compiled-manifests.json"
+MANIFESTS_FILES_SUFFIXES = (".yaml", ".yml")
+
+
+class InvalidManifestError(Exception):
+    """Raised when a manifest template is not a valid Kubernetes manifest."""
+
+
+def load_yaml_documents(content: str) -> Iterator:
+    """Yields the documents of a (possibly `---` separated) YAML stream, skipping empty ones.
+
+    The libyaml loader is used when available.  yaml is imported here so that it is only loaded
+    when the compiled artifact is not available.
+    """
+    import yaml
+
+    for document in yaml.load_all(content, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader)):
+        if document is not None:
+            yield document
+
+
+def expand_manifests_paths(paths: Sequence[Union[str, Path]]) -> List[Path]:
+    """Returns the manifests files matching paths, in a deterministic order.
+
+    Each path can be a file, a directory (all the YAML files directly in it) or a glob pattern.
+    The files of a directory or a pattern are sorted, and a file matched several times is only
+    returned once.
+
+    Raises:
+        FileNotFoundError: if a glob pattern does not match any file
+    """
+    manifests_files = {}
+    for path in paths:
+        path = str(path)
+        if glob.has_magic(path):
+            matches = sorted(glob.glob(path))
+            if not matches:
+                raise FileNotFoundError(f"No manifests files match {path}")
+            files = [Path(match) for match in matches]
+        elif Path(path).is_dir():
+            files = sorted(
+                child
+                for child in Path(path).iterdir()
+                if child.suffix in MANIFESTS_FILES_SUFFIXES and child.is_file()
+            )
+        else:
+            files = [Path(path)]
+        for file in files:
+            manifests_files.setdefault(str(file), file)
+    return list(manifests_files.values())
+
+
+def dump_canonical_json(data) -> str:
+    """Returns the canonical JSON representation of data.
+
+    It is the same as the one of the kubernetes_manifests library (sorted keys, compact separators
+    and non-ASCII characters as is), so that the digest of a manifest is the one the library
+    computes, without importing the library and ops.
+    """
+    return json.dumps(data, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def get_digest(data) -> str:
+    """Returns the sha256 digest of the canonical JSON representation of data."""
+    return hashlib.sha256(dump_canonical_json(data).encode()).hexdigest()
+
+
+def validate_manifest(manifest, source: str):
+    """Raises InvalidManifestError if manifest does not look like a Kubernetes object."""
+    if not isinstance(manifest, dict):
+        raise InvalidManifestError(f"{source}: expected a mapping, got {type(manifest).__name__}")
+    for key in ("apiVersion", "kind"):
+        if not isinstance(manifest.get(key), str):
+            raise InvalidManifestError(f"{source}: missing or invalid '{key}'")
+    if not isinstance(manifest.get("metadata", {}).get("name"), str):
+        raise InvalidManifestError(f"{source}: missing or invalid 'metadata.name'")
+
+
+def compile_manifests(paths: Sequence[Union[str, Path]]) -> dict:
+    """Parses and validates the manifests in paths, returning the compiled artifact content.
+
+    paths are expanded with expand_manifests_paths.  The artifact maps each manifests file path
+    to the list of manifests (YAML documents) it contains, and includes the digest of the
+    sources.
+    """
+    sources = {}
+    for path in expand_manifests_paths(paths):
+        manifests = list(load_yaml_documents(path.read_text()))
+        for index, manifest in enumerate(manifests):
+            validate_manifest(manifest, f"{path}[{index}]")
+        sources[str(path)] = manifests
+    return {"digest": get_digest(sources), "sources": sources}
+
+
+def load_compiled_manifests(path: str) -> Optional[dict]:
+    """Returns the content of the compiled manifests artifact, or None if it does not exist."""
+    try:
+        content = Path(path).read_text()
+    except FileNotFoundError:
+        return None
+    return json.loads(content)
+
+
+def main(argv: Optional[List[str]] = None):
+    """Compiles the given templates into the output artifact."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", default=COMPILED_MANIFESTS_FILE)
+    parser.add_argument("templates", nargs="+", help="manifests files, directories or globs")
+    args = parser.parse_args(argv)
+
+    import yaml
+
+    try:
+        compiled = compile_manifests(args.templates)
+    except (InvalidManifestError, yaml.YAMLError) as err:
+        print(f"Invalid manifest template: {err}", file=sys.stderr)
+        return 1
+
+    Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+    Path(args.output).write_text(dump_canonical_json(compiled))
+    manifests_count = sum(len(manifests) for manifests in compiled["sources"].values())
+    print(
+        f"Compiled {manifests_count} manifest(s) from {len(compiled['sources'])} file(s) with "
+        f"digest {compiled['digest']}"
+    )
+    return 0
+
+
+if __name__ == "__main__":  # pragma: nocover
+    sys.exit(main())
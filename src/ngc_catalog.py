@@ -0,0 +1,343 @@
+# Copyright 2026 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Generate one PodDefault per image of an offline NGC image catalog.
+
+The catalog is a YAML (or JSON) file attached as the `ngc-catalog` resource of the charm:
+
+    images:
+      - name: pytorch-24-05
+        image: nvcr.io/nvidia/pytorch:24.05-py3
+        framework: PyTorch
+        version: "24.05"
+        # Optional, the command, args and description of the PodDefault template are used
+        # (with a description built from the framework and version) if not set
+        command: [/opt/nvidia/nvidia_entrypoint.sh]
+        args: [jupyter, lab]
+        description: NVIDIA NGC PyTorch 24.05
+
+Each entry gives a PodDefault named `ngc-<name>`, which applies to the notebooks labelled
+`enable-ngc-<name>: "true"`, derived from the rendered PodDefault template and annotated with the
+image, framework and version of the entry.  Entry names cannot start with `gpu-`, so that their
+labels never select the PodDefault of a GPU variant, see gpu_variants.
+
+The PodDefaults are generated incrementally: NgcCatalog keeps in the unit state an index of the
+digests of the records of the entries by name, along with the digest of the template, and only
+validates the records of the entries that were added or changed.  The PodDefaults it renders are
+cached by record digest in a file next to the resource, which is only read when the catalog is
+rendered, and reused for the unchanged entries.  Providers supporting the per-manifest protocol
+of the kubernetes_manifests library are only sent the PodDefaults that changed.
+
+The resource is only fetched on install and upgrade-charm, which Juju runs when a new revision of
+the resource is attached, so that other hooks do not pay for resource-get.  Large catalogs are
+best shipped as JSON, which is parsed about a hundred times faster than YAML.
+"""
+
+import json
+import logging
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from ops import CharmBase, ModelError, Object
+from ops.framework import StoredState
+
+from gpu_variants import GPU_NAME_PREFIX
+from manifests_compiler import InvalidManifestError, get_digest, load_yaml_documents
+from poddefault_generator import (
+    ANNOTATIONS_PREFIX,
+    PODDEFAULT_KIND,
+    SELECTOR_LABEL_PREFIX,
+    PodDefaultConfig,
+    render_poddefaults,
+)
+
+logger = logging.getLogger(__name__)
+
+NGC_CATALOG_RESOURCE = "ngc-catalog"
+POD_DEFAULT_NAME_PREFIX = "ngc-"
+# Entry names are DNS labels short enough for the selector label key to be at most 63 characters
+ENTRY_NAME_REGEX = re.compile(r"^[a-z0-9]([-a-z0-9]{0,50}[a-z0-9])?$")
+ENTRY_STRING_FIELDS = ("image", "framework", "version", "description")
+ENTRY_LIST_FIELDS = ("command", "args")
+# Suffix of the cache of the rendered PodDefaults, next to the catalog resource
+CACHE_SUFFIX = ".poddefaults.json"
+
+
+class InvalidCatalogError(InvalidManifestError):
+    """Raised when the NGC catalog cannot be used to generate PodDefaults."""
+
+
+@dataclass(frozen=True)
+class CatalogEntry:
+    """An image of the NGC catalog."""
+
+    name: str
+    image: str
+    framework: str = ""
+    version: str = ""
+    description: str = ""
+    command: Optional[Tuple[str, ...]] = None
+    args: Optional[Tuple[str, ...]] = None
+
+    @classmethod
+    def from_record(cls, record: dict) -> "CatalogEntry":
+        """Returns the CatalogEntry of a catalog record.
+
+        Raises:
+            InvalidCatalogError: if the record is not a valid catalog entry
+        """
+        if not isinstance(record, dict):
+            raise InvalidCatalogError(f"catalog entries must be mappings, got {record!r}")
+        name = record.get("name")
+        if not isinstance(name, str) or not ENTRY_NAME_REGEX.match(name):
+            raise InvalidCatalogError(
+                f"catalog entry name {name!r} must be a DNS label of at most 52 characters"
+            )
+        if name.startswith(GPU_NAME_PREFIX):
+            raise InvalidCatalogError(
+                f"catalog entry name {name} cannot start with {GPU_NAME_PREFIX}, "
+                "which is reserved for the GPU variants"
+            )
+        if not record.get("image"):
+            raise InvalidCatalogError(f"catalog entry {name} has no image")
+        unknown_fields = set(record) - {"name", *ENTRY_STRING_FIELDS, *ENTRY_LIST_FIELDS}
+        if unknown_fields:
+            raise InvalidCatalogError(
+                f"catalog entry {name} has unknown fields {sorted(unknown_fields)}"
+            )
+
+        fields = {"name": name}
+        for field_name in ENTRY_STRING_FIELDS:
+            if field_name in record:
+                fields[field_name] = str(record[field_name])
+        for field_name in ENTRY_LIST_FIELDS:
+            value = record.get(field_name)
+            if value is None:
+                continue
+            if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+                raise InvalidCatalogError(
+                    f"{field_name} of catalog entry {name} must be a list of strings"
+                )
+            fields[field_name] = tuple(value)
+        return cls(**fields)
+
+    @classmethod
+    def from_valid_record(cls, record: dict) -> "CatalogEntry":
+        """Returns the CatalogEntry of a record that was already validated by from_record."""
+        fields = dict(record)
+        for field_name in ENTRY_LIST_FIELDS:
+            if fields.get(field_name) is not None:
+                fields[field_name] = tuple(fields[field_name])
+        for field_name in ENTRY_STRING_FIELDS:
+            if field_name in fields:
+                fields[field_name] = str(fields[field_name])
+        return cls(**fields)
+
+
+@dataclass(frozen=True)
+class CatalogRenderInputs:
+    """The inputs of the PodDefaults rendering: the charm config and the catalog version."""
+
+    config: PodDefaultConfig
+    catalog_key: str = ""
+
+
+def parse_catalog(content: str) -> List[dict]:
+    """Returns the records of the entries of a catalog.
+
+    Raises:
+        InvalidCatalogError: if the catalog is not a mapping with a list of images
+    """
+    if not content.strip():
+        return []
+    if content.lstrip().startswith("{"):
+        try:
+            catalog = json.loads(content)
+        except ValueError as err:
+            raise InvalidCatalogError(f"NGC catalog is not valid JSON: {err}") from err
+    else:
+        import yaml
+
+        try:
+            catalog = next(load_yaml_documents(content), None) or {}
+        except yaml.YAMLError as err:
+            raise InvalidCatalogError(f"NGC catalog is not valid YAML: {err}") from err
+    if not isinstance(catalog, dict) or not isinstance(catalog.get("images", []), list):
+        raise InvalidCatalogError("NGC catalog must be a mapping with a list of images")
+    return catalog.get("images", [])
+
+
+def render_catalog_poddefault(template: dict, entry: CatalogEntry) -> dict:
+    """Returns the PodDefault of a catalog entry, derived from the PodDefault template.
+
+    Only the mappings that are changed are copied, the other values are shared with the
+    template, which must not be modified afterwards.
+    """
+    poddefault = dict(template)
+    metadata = poddefault["metadata"] = dict(template.get("metadata", {}))
+    metadata["name"] = POD_DEFAULT_NAME_PREFIX + entry.name
+    metadata["annotations"] = {
+        **metadata.get("annotations", {}),
+        **{
+            ANNOTATIONS_PREFIX + field_name: getattr(entry, field_name)
+            for field_name in ("image", "framework", "version")
+            if getattr(entry, field_name)
+        },
+    }
+    spec = poddefault["spec"] = dict(template.get("spec", {}))
+    spec["selector"] = {"matchLabels": {SELECTOR_LABEL_PREFIX + entry.name: "true"}}
+    spec["desc"] = entry.description or " ".join(
+        part for part in ("NVIDIA NGC", entry.framework or entry.image, entry.version) if part
+    )
+    if entry.command is not None:
+        spec["command"] = list(entry.command)
+    if entry.args is not None:
+        spec["args"] = list(entry.args)
+    return poddefault
+
+
+def render_catalog(
+    template: dict, records: List[dict], index: dict, cache: Optional[dict] = None
+) -> Tuple[List[dict], dict]:
+    """Returns the PodDefaults of the catalog records, and the index of the records.
+
+    Only the records of the entries that were added or changed since the index are validated.
+    The PodDefaults of the entries in the cache are reused, the other ones are rendered.
+
+    Args:
+        template: the PodDefault the PodDefaults of the entries are derived from
+        records: the records of the catalog entries
+        index: the digest of the template and the digest of the record of each entry by name, as
+               returned by the previous call
+        cache: (optional) the digest of a template and the PodDefaults rendered from it by record
+               digest, see get_catalog_cache.  The PodDefaults are shared with it.
+
+    Returns: the PodDefaults of the entries, in the order of the records, and the new index.
+
+    Raises:
+        InvalidCatalogError: if a record is not a valid catalog entry, or if several entries have
+                             the same name
+    """
+    template_digest = get_digest(template)
+    known_digests = index.get("records", {}) if index.get("template") == template_digest else {}
+    cached_poddefaults = (
+        cache.get("poddefaults", {}) if cache and cache.get("template") == template_digest else {}
+    )
+    poddefaults = []
+    indexed_digests = {}
+    for record in records:
+        name = record.get("name") if isinstance(record, dict) else None
+        if name in indexed_digests:
+            raise InvalidCatalogError(f"several catalog entries are named {name}")
+        record_digest = get_digest(record)
+        poddefault = cached_poddefaults.get(record_digest)
+        if poddefault is None:
+            if known_digests.get(name) == record_digest:
+                entry = CatalogEntry.from_valid_record(record)
+            else:
+                entry = CatalogEntry.from_record(record)
+            poddefault = render_catalog_poddefault(template, entry)
+        indexed_digests[name] = record_digest
+        poddefaults.append(poddefault)
+    return poddefaults, {"template": template_digest, "records": indexed_digests}
+
+
+def get_catalog_cache(poddefaults: List[dict], index: dict) -> dict:
+    """Returns the cache of the PodDefaults returned by render_catalog along with index."""
+    return {
+        "template": index["template"],
+        "poddefaults": dict(zip(index["records"].values(), poddefaults)),
+    }
+
+
+class NgcCatalog(Object):
+    """Generates the PodDefaults of the NGC catalog resource, incrementally."""
+
+    _stored = StoredState()
+
+    def __init__(self, charm: CharmBase, resource_name: str = NGC_CATALOG_RESOURCE):
+        super().__init__(charm, resource_name)
+        self._resource_name = resource_name
+        # The path of the fetched resource, empty if it is not attached
+        self._stored.set_default(catalog_path="")
+        # The digest of the template and the digest of the record of each entry by name, as
+        # returned by render_catalog and stored as JSON
+        self._stored.set_default(index="{}")
+
+        for event in (charm.on.install, charm.on.upgrade_charm):
+            self.framework.observe(event, self._fetch_catalog)
+
+    def _fetch_catalog(self, _=None):
+        """Fetches the catalog resource, storing its path."""
+        try:
+            self._stored.catalog_path = str(self.model.resources.fetch(self._resource_name))
+        except (ModelError, NameError):
+            logger.info(f"No {self._resource_name} resource attached")
+            self._stored.catalog_path = ""
+
+    def get_catalog_path(self) -> Optional[Path]:
+        """Returns the path of the catalog resource, or None if it is not attached."""
+        if self._stored.catalog_path and not Path(self._stored.catalog_path).exists():
+            # The unit was moved, or its charm directory was reset
+            self._fetch_catalog()
+        return Path(self._stored.catalog_path) if self._stored.catalog_path else None
+
+    def get_catalog_key(self) -> str:
+        """Returns a key that changes when the catalog resource changes."""
+        path = self.get_catalog_path()
+        if path is None:
+            return ""
+        stat = path.stat()
+        return f"{path}:{stat.st_mtime_ns}:{stat.st_size}"
+
+    def render_poddefaults(self, manifests: List[dict], inputs: CatalogRenderInputs) -> List[dict]:
+        """Returns the rendered manifests followed by the PodDefaults of the catalog.
+
+        The PodDefaults of the catalog are derived from the first rendered PodDefault.
+
+        Raises:
+            InvalidCatalogError: if the catalog is invalid
+        """
+        rendered_manifests = render_poddefaults(manifests, inputs.config)
+        path = self.get_catalog_path()
+        records = parse_catalog(path.read_text()) if path is not None else []
+        if not records:
+            self._stored.index = "{}"
+            return rendered_manifests
+
+        template = next(
+            (
+                manifest
+                for manifest in rendered_manifests
+                if manifest.get("kind") == PODDEFAULT_KIND
+            ),
+            None,
+        )
+        if template is None:
+            raise InvalidCatalogError("no PodDefault template to generate the catalog from")
+        last_index = json.loads(self._stored.index)
+        cache_path = path.with_name(path.name + CACHE_SUFFIX)
+        cache = load_catalog_cache(cache_path)
+        poddefaults, index = render_catalog(template, records, last_index, cache)
+        if index != last_index or cache is None:
+            self._stored.index = json.dumps(index)
+            save_catalog_cache(cache_path, get_catalog_cache(poddefaults, index))
+        return rendered_manifests + poddefaults
+
+
+def load_catalog_cache(path: Path) -> Optional[dict]:
+    """Returns the cache of the rendered PodDefaults saved at path, None if there is none."""
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def save_catalog_cache(path: Path, cache: dict):
+    """Saves the cache of the rendered PodDefaults at path, logging if it cannot be written."""
+    try:
+        path.write_text(json.dumps(cache))
+    except OSError as err:
+        logger.warning(f"Failed to save the catalog PodDefaults cache {path}: {err}")
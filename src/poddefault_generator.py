@@ -0,0 +1,188 @@
+# Copyright 2026 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Render the NGC PodDefault templates from the charm configuration."""
+
+import copy
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Mapping, Optional, Tuple
+
+PODDEFAULT_KIND = "PodDefault"
+# Prefix of the labels selecting the generated PodDefaults, and of the annotations they set
+SELECTOR_LABEL_PREFIX = "enable-ngc-"
+ANNOTATIONS_PREFIX = "ngc.nvidia.com/"
+# A label key is an optional DNS subdomain prefix and a name of at most 63 characters
+LABEL_KEY_REGEX = re.compile(
+    r"^([a-z0-9]([-a-z0-9]*[a-z0-9])?(\.[a-z0-9]([-a-z0-9]*[a-z0-9])?)*/)?"
+    r"[A-Za-z0-9]([-A-Za-z0-9_.]{0,61}[A-Za-z0-9])?$"
+)
+LABEL_VALUE_REGEX = re.compile(r"^([A-Za-z0-9]([-A-Za-z0-9_.]{0,61}[A-Za-z0-9])?)?$")
+# Kubernetes memory quantities, with a decimal or binary suffix
+QUANTITY_REGEX = re.compile(r"^(?P<number>[0-9]+(\.[0-9]+)?)(?P<suffix>[kMGTPE]|[KMGTPE]i)?$")
+QUANTITY_SUFFIXES = {
+    **{suffix: 1000 ** (index + 1) for index, suffix in enumerate("kMGTPE")},
+    **{f"{suffix}i": 1024 ** (index + 1) for index, suffix in enumerate("KMGTPE")},
+}
+# The memory-backed volume mounted as /dev/shm, instead of the 64 MiB of the container runtime
+SHM_VOLUME_NAME = "dshm"
+SHM_MOUNT_PATH = "/dev/shm"
+# Value of shm-size for a volume without size limit, which Kubernetes sizes to the memory limit
+# of the notebook
+SHM_SIZE_AUTO = "auto"
+
+
+class InvalidConfigError(ValueError):
+    """Raised when the charm configuration cannot be used to render the PodDefaults."""
+
+
+@dataclass(frozen=True)
+class PodDefaultConfig:
+    """The charm configuration used to render the PodDefaults.
+
+    None (or an empty value) means the value of the PodDefault template is kept.
+    """
+
+    command: Optional[Tuple[str, ...]] = None
+    args: Optional[Tuple[str, ...]] = None
+    selector_label: str = ""
+    description: str = ""
+    # Size limit of the /dev/shm volume, SHM_SIZE_AUTO for none, or empty for no volume
+    shm_size: str = ""
+
+    @classmethod
+    def from_charm_config(cls, config: Mapping) -> "PodDefaultConfig":
+        """Returns the PodDefaultConfig of the charm config.
+
+        Raises:
+            InvalidConfigError: if an option has an invalid value
+        """
+        selector_label = config.get("poddefault-selector-label", "").strip()
+        if selector_label and not LABEL_KEY_REGEX.match(selector_label):
+            raise InvalidConfigError(
+                f"poddefault-selector-label '{selector_label}' is not a valid label key"
+            )
+        shm_size = config.get("shm-size", "").strip()
+        if shm_size and shm_size != SHM_SIZE_AUTO:
+            try:
+                shm_size_bytes = parse_quantity(shm_size)
+            except ValueError as err:
+                raise InvalidConfigError(f"shm-size: {err}") from err
+            if shm_size_bytes <= 0:
+                raise InvalidConfigError(f"shm-size must be positive, got {shm_size}")
+        return cls(
+            command=parse_string_list(
+                config.get("poddefault-command", ""), "poddefault-command", allow_string=True
+            ),
+            args=parse_string_list(config.get("poddefault-args", ""), "poddefault-args"),
+            selector_label=selector_label,
+            description=config.get("poddefault-description", "").strip(),
+            shm_size=shm_size,
+        )
+
+
+def parse_string_list(
+    value: str, option: str, allow_string: bool = False
+) -> Optional[Tuple[str, ...]]:
+    """Parses a config option holding a YAML list of strings, returning None if it is empty.
+
+    Args:
+        value: the value of the config option
+        option: the name of the config option, used in error messages
+        allow_string: if True, a value that is not a YAML list is a list of one string
+    """
+    if not value.strip():
+        return None
+
+    import yaml
+
+    try:
+        parsed = yaml.load(value, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
+    except yaml.YAMLError as err:
+        raise InvalidConfigError(f"{option} is not valid YAML") from err
+    if allow_string and not isinstance(parsed, list):
+        return (value.strip(),)
+    if not isinstance(parsed, list) or not all(isinstance(item, str) for item in parsed):
+        raise InvalidConfigError(f"{option} must be a YAML list of strings")
+    return tuple(parsed)
+
+
+def parse_labels(value: str, option: str) -> Dict[str, str]:
+    """Parses a config option holding comma separated key=value labels.
+
+    Args:
+        value: the value of the config option
+        option: the name of the config option, used in error messages
+    """
+    labels = {}
+    for requirement in (part.strip() for part in value.split(",")):
+        if not requirement:
+            continue
+        key, separator, label_value = (item.strip() for item in requirement.partition("="))
+        if (
+            not separator
+            or not LABEL_KEY_REGEX.match(key)
+            or not LABEL_VALUE_REGEX.match(label_value)
+        ):
+            raise InvalidConfigError(f"{option}: '{requirement}' is not a valid key=value label")
+        labels[key] = label_value
+    return labels
+
+
+def parse_quantity(value: str) -> float:
+    """Returns the number of bytes of a Kubernetes memory quantity, such as 512Mi or 8G.
+
+    Raises:
+        ValueError: if value is not a quantity
+    """
+    match = QUANTITY_REGEX.match(value)
+    if match is None:
+        raise ValueError(f"'{value}' is not a memory quantity, such as 512Mi or 8Gi")
+    return float(match["number"]) * QUANTITY_SUFFIXES.get(match["suffix"], 1)
+
+
+def set_volume(spec: dict, volume: dict, mount_path: str):
+    """Adds a volume and its mount at mount_path to a PodDefault spec.
+
+    The volumes with the same name and the mounts with the same name or mount path are replaced,
+    so that rendering a PodDefault twice gives the same PodDefault.
+    """
+    name = volume["name"]
+    spec["volumes"] = [
+        existing for existing in spec.get("volumes", []) if existing.get("name") != name
+    ] + [volume]
+    spec["volumeMounts"] = [
+        existing
+        for existing in spec.get("volumeMounts", [])
+        if existing.get("name") != name and existing.get("mountPath") != mount_path
+    ] + [{"name": name, "mountPath": mount_path}]
+
+
+def render_poddefaults(manifests: List[dict], config: PodDefaultConfig) -> List[dict]:
+    """Returns the manifests with the PodDefaults rendered from config.
+
+    The manifests are not modified, and manifests that are not PodDefaults are returned as is.
+    """
+    rendered_manifests = []
+    for manifest in manifests:
+        if manifest.get("kind") != PODDEFAULT_KIND:
+            rendered_manifests.append(manifest)
+            continue
+
+        poddefault = copy.deepcopy(manifest)
+        spec = poddefault.setdefault("spec", {})
+        if config.command is not None:
+            spec["command"] = list(config.command)
+        if config.args is not None:
+            spec["args"] = list(config.args)
+        if config.selector_label:
+            spec["selector"] = {"matchLabels": {config.selector_label: "true"}}
+        if config.description:
+            spec["desc"] = config.description
+        if config.shm_size:
+            empty_dir = {"medium": "Memory"}
+            if config.shm_size != SHM_SIZE_AUTO:
+                empty_dir["sizeLimit"] = config.shm_size
+            set_volume(spec, {"name": SHM_VOLUME_NAME, "emptyDir": empty_dir}, SHM_MOUNT_PATH)
+        rendered_manifests.append(poddefault)
+    return rendered_manifests
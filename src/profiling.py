@@ -0,0 +1,226 @@
+# Copyright 2026 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""On-demand cProfile capture of the charm's hook dispatches, armed by the `profile` action.
+
+The action arms profiling for the next N hook dispatches and/or until a deadline, by writing
+`armed.json` in the `.profiles` directory of the charm directory, next to the unit state.  The
+charm calls `start_if_armed` from its bootstrap module, before it imports anything else, so the
+imports of ops, the charm libraries and the charm modules are profiled along with the modules
+imported lazily while handling the hook: the `<module>` entries of the stats are the time spent
+executing each of them.  Setting the NGC_INTEGRATOR_PROFILE environment variable (for example
+in a debug-hooks session) profiles the dispatch as well.
+
+The stats are dumped as `.pstats` files when the dispatch exits, along with the import times of
+the modules, and only the last MAX_PROFILES are kept.  Action dispatches are never profiled.
+
+This module only imports the profiling modules when a dispatch is profiled or summarised.
+"""
+
+import atexit
+import json
+import os
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import cProfile
+    import pstats
+
+PROFILE_ENV_VAR = "NGC_INTEGRATOR_PROFILE"
+PROFILES_DIR_NAME = ".profiles"
+ARMED_FILE = "armed.json"
+PROFILE_SUFFIX = ".pstats"
+# Suffix of the import times saved next to each profile
+IMPORTS_SUFFIX = ".imports.json"
+# Maximum number of profiles kept in the profiles directory
+MAX_PROFILES = 10
+DEFAULT_TOP = 20
+
+
+def get_profiles_dir() -> Path:
+    """Returns the directory holding the armed state and the profiles."""
+    charm_dir = os.environ.get("JUJU_CHARM_DIR") or Path(__file__).parents[1]
+    return Path(charm_dir) / PROFILES_DIR_NAME
+
+
+def start_if_armed(profiles_dir: Optional[Path] = None) -> Optional["cProfile.Profile"]:
+    """Starts profiling this dispatch if it is a hook and profiling is armed.
+
+    The profile is saved when the interpreter exits.  Returns the profiler, or None if this
+    dispatch is not profiled.
+    """
+    dispatch_path = os.environ.get("JUJU_DISPATCH_PATH", "")
+    if not dispatch_path.startswith("hooks/"):
+        return None
+    profiles_dir = profiles_dir or get_profiles_dir()
+    if not os.environ.get(PROFILE_ENV_VAR) and not is_armed(profiles_dir):
+        return None
+
+    import cProfile
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    atexit.register(save_profile, profiler, profiles_dir, dispatch_path.removeprefix("hooks/"))
+    return profiler
+
+
+def read_armed(profiles_dir: Path) -> dict:
+    """Returns the remaining dispatches and the deadline (epoch seconds) of the armed state."""
+    try:
+        return json.loads((profiles_dir / ARMED_FILE).read_text())
+    except (FileNotFoundError, ValueError):
+        return {"dispatches": 0, "until": 0}
+
+
+def is_armed(profiles_dir: Path, now: Optional[float] = None) -> bool:
+    """Returns whether the next hook dispatch should be profiled."""
+    armed = read_armed(profiles_dir)
+    return armed["dispatches"] > 0 or armed["until"] > (now or time.time())
+
+
+def arm(profiles_dir: Path, dispatches: int = 0, duration: float = 0, now: Optional[float] = None):
+    """Arms profiling for the next `dispatches` hook dispatches and for `duration` seconds."""
+    profiles_dir.mkdir(parents=True, exist_ok=True)
+    until = (now or time.time()) + duration if duration > 0 else 0
+    (profiles_dir / ARMED_FILE).write_text(json.dumps({"dispatches": dispatches, "until": until}))
+
+
+def disarm(profiles_dir: Path):
+    """Stops profiling the next dispatches."""
+    (profiles_dir / ARMED_FILE).unlink(missing_ok=True)
+
+
+def clear_profiles(profiles_dir: Path):
+    """Removes the saved profiles."""
+    for path in list_profiles(profiles_dir):
+        remove_profile(path)
+
+
+def save_profile(profiler: "cProfile.Profile", profiles_dir: Path, hook: str) -> Path:
+    """Dumps the stats of profiler, counts the dispatch as profiled and drops old profiles."""
+    profiler.disable()
+    profiles_dir.mkdir(parents=True, exist_ok=True)
+    path = profiles_dir / f"{time.time_ns()}-{hook}{PROFILE_SUFFIX}"
+    profiler.dump_stats(path)
+    import pstats
+
+    import_times = get_import_times(pstats.Stats(str(path)), top=None)
+    get_imports_path(path).write_text(json.dumps(import_times))
+
+    armed = read_armed(profiles_dir)
+    if armed["dispatches"] > 0:
+        armed["dispatches"] -= 1
+        (profiles_dir / ARMED_FILE).write_text(json.dumps(armed))
+    if not is_armed(profiles_dir):
+        disarm(profiles_dir)
+
+    for old_path in list_profiles(profiles_dir)[:-MAX_PROFILES]:
+        remove_profile(old_path)
+    return path
+
+
+def get_imports_path(path: Path) -> Path:
+    """Returns the path of the import times saved with a profile."""
+    return path.with_name(path.name[: -len(PROFILE_SUFFIX)] + IMPORTS_SUFFIX)
+
+
+def remove_profile(path: Path):
+    """Removes a profile and its import times."""
+    path.unlink(missing_ok=True)
+    get_imports_path(path).unlink(missing_ok=True)
+
+
+def list_profiles(profiles_dir: Path) -> List[Path]:
+    """Returns the saved profiles, oldest first."""
+    if not profiles_dir.is_dir():
+        return []
+    return sorted(
+        profiles_dir.glob(f"*{PROFILE_SUFFIX}"), key=lambda path: int(path.name.split("-")[0])
+    )
+
+
+def get_hook_of_profile(path: Path) -> str:
+    """Returns the name of the hook a profile was saved for."""
+    return path.name[: -len(PROFILE_SUFFIX)].split("-", 1)[1]
+
+
+def get_top_functions(
+    stats: "pstats.Stats", top: int = DEFAULT_TOP
+) -> List[Tuple[str, int, float, float]]:
+    """Returns the (function, calls, total time, cumulative time) of the top functions."""
+    rows = [
+        (format_function(function), calls, total_time, cumulative_time)
+        for function, (_, calls, total_time, cumulative_time, _) in stats.stats.items()
+    ]
+    return sorted(rows, key=lambda row: row[3], reverse=True)[:top]
+
+
+def get_import_times(
+    stats: "pstats.Stats", top: Optional[int] = DEFAULT_TOP
+) -> List[Tuple[str, float]]:
+    """Returns the (module file, cumulative time) of the slowest module executions.
+
+    All of them are returned if top is None.
+    """
+    rows = [
+        (shorten_path(filename), cumulative_time)
+        for (filename, _, name), (_, _, _, cumulative_time, _) in stats.stats.items()
+        if name == "<module>"
+    ]
+    return sorted(rows, key=lambda row: row[1], reverse=True)[:top]
+
+
+def format_function(function: Tuple[str, int, str]) -> str:
+    """Returns a function of the stats as path:line(name), with a shortened path."""
+    filename, line, name = function
+    if filename == "~":
+        # Built-in functions
+        return name
+    return f"{shorten_path(filename)}:{line}({name})"
+
+
+def shorten_path(filename: str) -> str:
+    """Returns a path relative to site-packages or the charm source, if it is in one."""
+    for marker in ("site-packages/", "/src/", "/lib/"):
+        if marker in filename:
+            return filename.rsplit(marker, 1)[1]
+    return filename
+
+
+def summarise_profile(path: Path, top: int = DEFAULT_TOP, attach: bool = False) -> dict:
+    """Returns the action results summarising a profile.
+
+    Args:
+        path: the profile
+        top: number of functions and modules reported
+        attach: whether to include the gzip-compressed and base64-encoded profile
+    """
+    import pstats
+
+    stats = pstats.Stats(str(path))
+    functions = "\n".join(
+        f"{cumulative_time * 1000:10.2f} {total_time * 1000:10.2f} {calls:8d}  {function}"
+        for function, calls, total_time, cumulative_time in get_top_functions(stats, top)
+    )
+    try:
+        import_times = json.loads(get_imports_path(path).read_text())[:top]
+    except FileNotFoundError:
+        import_times = get_import_times(stats, top)
+    imports = "\n".join(
+        f"{cumulative_time * 1000:10.2f}  {module}" for module, cumulative_time in import_times
+    )
+    results = {
+        "path": str(path),
+        "hook": get_hook_of_profile(path),
+        "total-ms": f"{stats.total_tt * 1000:.2f}",
+        "functions": f"{'cum-ms':>10} {'tot-ms':>10} {'calls':>8}  function\n{functions}",
+        "imports": f"{'cum-ms':>10}  module\n{imports}",
+    }
+    if attach:
+        import base64
+        import gzip
+
+        results["pstats"] = base64.b64encode(gzip.compress(path.read_bytes())).decode()
+    return results
@@ -0,0 +1,175 @@
+# Copyright 2026 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Validate manifests against the OpenAPI v3 schemas of their CRDs.
+
+A schema is compiled once into nested validation functions, so that validating a manifest does
+no schema interpretation, and the compiled validators are cached by schema file.  The subset of
+OpenAPI v3 used by structural CRD schemas is supported: type, properties, required,
+additionalProperties, items, enum and the x-kubernetes-preserve-unknown-fields and
+x-kubernetes-int-or-string extensions.  Unlike the Kubernetes API server, which prunes them,
+unknown fields are rejected unless their object preserves unknown fields, so that misspelled
+fields are not silently dropped.
+"""
+
+import functools
+import json
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from manifests_compiler import InvalidManifestError
+
+# Validates a value, given the path of the value in the manifest
+Validator = Callable[[Any, str], None]
+
+JSON_TYPES = {
+    "object": (dict,),
+    "array": (list,),
+    "string": (str,),
+    "integer": (int,),
+    "number": (int, float),
+    "boolean": (bool,),
+}
+
+
+class SchemaValidationError(InvalidManifestError):
+    """Raised when a manifest does not match its schema."""
+
+    def __init__(self, path: str, message: str, source: str = ""):
+        location = f"{source}: {path}" if source else path
+        super().__init__(f"{location or '<root>'}: {message}")
+        self.path = path
+        self.message = message
+
+
+def compile_schema(schema: dict) -> Validator:
+    """Returns a function validating values against schema."""
+    checks = []
+
+    if schema.get("x-kubernetes-int-or-string"):
+        checks.append(_compile_type_check(("integer", "string")))
+    elif "type" in schema:
+        checks.append(_compile_type_check((schema["type"],)))
+
+    if "enum" in schema:
+        checks.append(_compile_enum_check(schema["enum"]))
+
+    if "properties" in schema or "required" in schema or "additionalProperties" in schema:
+        checks.append(_compile_object_check(schema))
+
+    if "items" in schema:
+        checks.append(_compile_items_check(schema["items"]))
+
+    if len(checks) == 1:
+        return checks[0]
+
+    def validate(value, path):
+        for check in checks:
+            check(value, path)
+
+    return validate
+
+
+def _compile_type_check(type_names: Tuple[str, ...]) -> Validator:
+    python_types = tuple(
+        python_type for type_name in type_names for python_type in JSON_TYPES[type_name]
+    )
+    # bool is a subclass of int, but true and false are not JSON integers
+    allow_bool = "boolean" in type_names
+    expected = " or ".join(type_names)
+
+    def validate_type(value, path):
+        if not isinstance(value, python_types) or (isinstance(value, bool) and not allow_bool):
+            raise SchemaValidationError(path, f"expected {expected}, got {json_type_of(value)}")
+
+    return validate_type
+
+
+def _compile_enum_check(allowed_values: List) -> Validator:
+    def validate_enum(value, path):
+        if value not in allowed_values:
+            raise SchemaValidationError(path, f"{value!r} is not one of {allowed_values}")
+
+    return validate_enum
+
+
+def _compile_object_check(schema: dict) -> Validator:
+    properties = {
+        name: compile_schema(property_schema)
+        for name, property_schema in schema.get("properties", {}).items()
+    }
+    required = schema.get("required", [])
+    additional_properties = schema.get("additionalProperties")
+    if isinstance(additional_properties, dict):
+        validate_additional = compile_schema(additional_properties)
+    else:
+        validate_additional = None
+    allow_unknown = (
+        schema.get("x-kubernetes-preserve-unknown-fields", False)
+        or additional_properties is True
+        or "properties" not in schema
+    )
+
+    def validate_object(value, path):
+        if not isinstance(value, dict):
+            return
+        for name in required:
+            if name not in value:
+                raise SchemaValidationError(path, f"missing required field '{name}'")
+        for name, field_value in value.items():
+            field_path = f"{path}.{name}" if path else name
+            validate_property = properties.get(name, validate_additional)
+            if validate_property is not None:
+                validate_property(field_value, field_path)
+            elif not allow_unknown:
+                raise SchemaValidationError(field_path, "unknown field")
+
+    return validate_object
+
+
+def _compile_items_check(items_schema: dict) -> Validator:
+    validate_item = compile_schema(items_schema)
+
+    def validate_items(value, path):
+        if not isinstance(value, list):
+            return
+        for index, item in enumerate(value):
+            validate_item(item, f"{path}[{index}]")
+
+    return validate_items
+
+
+def json_type_of(value) -> str:
+    """Returns the name of the JSON type of a value."""
+    if value is None:
+        return "null"
+    for type_name in ("boolean", "integer", "number", "string", "array", "object"):
+        if isinstance(value, JSON_TYPES[type_name]):
+            return type_name
+    return type(value).__name__
+
+
+@functools.lru_cache(maxsize=None)
+def load_validator(schema_path: str) -> Validator:
+    """Returns the compiled validator of a JSON schema file."""
+    return compile_schema(json.loads(Path(schema_path).read_text()))
+
+
+def validate_manifests(manifests: List[dict], schemas: Optional[Dict[Tuple[str, str], str]]):
+    """Validates the manifests whose (apiVersion, kind) has a schema in schemas.
+
+    Raises:
+        SchemaValidationError: for the first manifest that does not match its schema, with the
+                               path of the invalid field
+    """
+    for manifest in manifests:
+        schema_path = (schemas or {}).get((manifest.get("apiVersion"), manifest.get("kind")))
+        if schema_path is None:
+            continue
+        try:
+            load_validator(str(schema_path))(manifest, "")
+        except SchemaValidationError as err:
+            name = (manifest.get("metadata") or {}).get("name")
+            raise SchemaValidationError(
+                err.path, err.message, source=f"{manifest['kind']} {name}"
+            ) from err
@@ -0,0 +1,92 @@
+# Copyright 2026 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Set the thread counts of the NGC frameworks in the PodDefaults, from a CPU budget.
+
+The OpenMP, MKL and TensorFlow runtimes of the NGC containers default to one thread per core of
+the node, not per CPU of the notebook, which oversubscribes the CPUs of large nodes shared by
+many notebooks.  Given a CPU budget, the PodDefaults set THREAD_ENV_VARS to the number of whole
+CPUs of the budget (at least one).
+
+The budget is the `cpu-budget` charm configuration, or the budget of a GPU variant, whose
+PodDefault sets its thread counts when it is rendered.  The variables that the PodDefault already
+sets keep their value.  This does not apply to the variables set by the notebooks themselves: the
+Kubeflow admission webhook rejects the pods setting a variable of their PodDefaults to another
+value.
+"""
+
+import math
+import re
+from typing import Dict, List
+
+from poddefault_generator import PODDEFAULT_KIND, InvalidConfigError
+
+THREAD_ENV_VARS = (
+    "OMP_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+    "TF_NUM_INTRAOP_THREADS",
+)
+# Kubernetes CPU quantities, in CPUs or millicpus
+CPU_QUANTITY_REGEX = re.compile(r"^(?P<number>[0-9]+(\.[0-9]+)?)(?P<milli>m)?$")
+
+
+def parse_cpu_budget(value: str, option: str) -> str:
+    """Validates a CPU budget, returning it stripped, or an empty string if there is none.
+
+    Args:
+        value: the CPU budget, a Kubernetes CPU quantity such as 4 or 3500m
+        option: the name of the config option, used in error messages
+    """
+    value = value.strip()
+    if not value:
+        return ""
+    match = CPU_QUANTITY_REGEX.match(value)
+    if match is None or float(match["number"]) <= 0:
+        raise InvalidConfigError(f"{option}: '{value}' is not a CPU quantity, such as 4 or 3500m")
+    return value
+
+
+def get_thread_count(cpu_budget: str) -> int:
+    """Returns the number of threads for a valid CPU budget: its whole CPUs, at least one."""
+    match = CPU_QUANTITY_REGEX.match(cpu_budget)
+    cpus = float(match["number"]) / (1000 if match["milli"] else 1)
+    return max(1, math.floor(cpus))
+
+
+def merge_env(env: List[dict], defaults: Dict[str, str]) -> List[dict]:
+    """Returns env followed by the defaults whose name env does not set."""
+    names = {variable.get("name") for variable in env}
+    return [
+        *env,
+        *({"name": name, "value": value} for name, value in defaults.items() if name not in names),
+    ]
+
+
+def set_thread_env(poddefault: dict, cpu_budget: str) -> dict:
+    """Returns a copy of a PodDefault with the thread counts of a valid CPU budget.
+
+    The values the copy shares with the PodDefault are not modified.
+    """
+    threads = str(get_thread_count(cpu_budget))
+    spec = poddefault.get("spec", {})
+    env = merge_env(spec.get("env", []), {name: threads for name in THREAD_ENV_VARS})
+    return {**poddefault, "spec": {**spec, "env": env}}
+
+
+def render_thread_env(manifests: List[dict], cpu_budget: str = "") -> List[dict]:
+    """Returns the manifests with the thread counts of a valid CPU budget set in the PodDefaults.
+
+    Other manifests, and all of them if there is no CPU budget, are returned as is.
+    """
+    if not cpu_budget:
+        return manifests
+    return [
+        (
+            set_thread_env(manifest, cpu_budget)
+            if manifest.get("kind") == PODDEFAULT_KIND
+            else manifest
+        )
+        for manifest in manifests
+    ]
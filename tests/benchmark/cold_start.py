@@ -0,0 +1,122 @@
+# Copyright 2026 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Cold-start benchmark for the charm's hook dispatch path.
+
+Each sample runs in a fresh interpreter, as Juju does for every hook, and reports the time
+spent importing `charm` and the wall time of dispatching one hook (charm instantiation plus
+event handling) through ops.testing.Harness.
+
+Usage:
+    python tests/benchmark/cold_start.py [--runs N] [--output results.json]
+                                         [--compare baseline.json --tolerance 0.25]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parents[2]
+HOOKS = ["install", "leader-elected", "config-changed", "update-status", "relation-created"]
+
+SAMPLE_SCRIPT = """
+import json, sys, time
+
+start = time.perf_counter()
+import charm
+imported = time.perf_counter()
+
+from ops.testing import Harness
+
+hook = sys.argv[1]
+harness = Harness(charm.NgcIntegratorCharm)
+harness.set_leader(sys.argv[2] == "leader")
+relation_id = harness.add_relation(charm.PODDEFAULTS_RELATION, "resource-dispatcher")
+
+dispatch_start = time.perf_counter()
+harness.begin()
+if hook == "relation-created":
+    relation = harness.model.get_relation(charm.PODDEFAULTS_RELATION, relation_id)
+    harness.charm.on[charm.PODDEFAULTS_RELATION].relation_created.emit(relation, relation.app)
+else:
+    getattr(harness.charm.on, hook.replace("-", "_")).emit()
+dispatched = time.perf_counter()
+
+print(json.dumps({"import": imported - start, "dispatch": dispatched - dispatch_start}))
+"""
+
+
+def run_sample(hook: str, role: str) -> dict:
+    """Runs one hook in a fresh interpreter, returning its timings in seconds."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [str(ROOT), str(ROOT / "lib"), str(ROOT / "src"), env.get("PYTHONPATH", "")]
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", SAMPLE_SCRIPT, hook, role],
+        cwd=ROOT,
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def run_benchmark(runs: int) -> dict:
+    """Returns the median import and dispatch times, in milliseconds, per role and hook."""
+    results = {}
+    for role in ("leader", "non-leader"):
+        for hook in HOOKS:
+            samples = [run_sample(hook, role) for _ in range(runs)]
+            results[f"{role}/{hook}"] = {
+                metric: round(statistics.median(s[metric] for s in samples) * 1000, 2)
+                for metric in ("import", "dispatch")
+            }
+    return results
+
+
+def find_regressions(results: dict, baseline: dict, tolerance: float) -> list:
+    """Returns a description of every timing slower than baseline by more than tolerance."""
+    regressions = []
+    for name, timings in results.items():
+        for metric, value in timings.items():
+            reference = baseline.get(name, {}).get(metric)
+            if reference and value > reference * (1 + tolerance):
+                regressions.append(f"{name} {metric}: {value}ms (baseline {reference}ms)")
+    return regressions
+
+
+def main():
+    """Runs the benchmark, prints its results and compares them with a baseline if given."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output", type=Path)
+    parser.add_argument("--compare", type=Path)
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    results = run_benchmark(args.runs)
+    print(f"{'hook':<32}{'import (ms)':>14}{'dispatch (ms)':>16}")
+    for name, timings in results.items():
+        print(f"{name:<32}{timings['import']:>14}{timings['dispatch']:>16}")
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+
+    if args.compare:
+        regressions = find_regressions(
+            results, json.loads(args.compare.read_text()), args.tolerance
+        )
+        for regression in regressions:
+            print(f"Regression: {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
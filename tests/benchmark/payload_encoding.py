@@ -0,0 +1,76 @@
+# Copyright 2026 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Size and time of the kubernetes_manifests relation payload for each encoding.
+
+The manifests are variations of the charm's PodDefault, each with a different name, image
+specific args and environment, as a set of NGC PodDefaults would be.
+
+Usage:
+    python tests/benchmark/payload_encoding.py [--counts 1 50 500] [--repeat 20]
+"""
+
+import argparse
+import copy
+import sys
+import timeit
+from pathlib import Path
+
+import yaml
+
+ROOT = Path(__file__).parents[2]
+sys.path[:0] = [str(ROOT / "lib")]
+
+from charms.resource_dispatcher.v0.kubernetes_manifests import (  # noqa: E402
+    GZIP_ENCODING,
+    JSON_ENCODING,
+    decode_manifests,
+    encode_manifests,
+)
+
+PODDEFAULT_FILE = ROOT / "src/templates/poddefault.yaml"
+
+
+def generate_manifests(count: int) -> list:
+    """Returns count distinct PodDefaults derived from the charm's template."""
+    template = yaml.safe_load(PODDEFAULT_FILE.read_text())
+    manifests = []
+    for i in range(count):
+        manifest = copy.deepcopy(template)
+        manifest["metadata"]["name"] = f"allow-ngc-notebook-{i}"
+        manifest["spec"]["selector"]["matchLabels"] = {f"enable-ngc-{i}": "true"}
+        manifest["spec"]["env"] = [
+            {"name": "NGC_IMAGE", "value": f"nvcr.io/nvidia/pytorch:24.{i % 12 + 1:02d}-py3"},
+            {"name": "OMP_NUM_THREADS", "value": str(i % 16 + 1)},
+        ]
+        manifests.append(manifest)
+    return manifests
+
+
+def main():
+    """Prints the payload size, encode and decode time per manifests count and encoding."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--counts", type=int, nargs="+", default=[1, 50, 500])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(
+        f"{'manifests':>10}{'encoding':>10}{'size (B)':>12}{'encode (ms)':>14}{'decode (ms)':>14}"
+    )
+    for count in args.counts:
+        manifests = generate_manifests(count)
+        for encoding in (JSON_ENCODING, GZIP_ENCODING):
+            encoded = encode_manifests(manifests, encoding)
+            encode_time = timeit.timeit(
+                lambda: encode_manifests(manifests, encoding), number=args.repeat
+            )
+            decode_time = timeit.timeit(lambda: decode_manifests(encoded), number=args.repeat)
+            print(
+                f"{count:>10}{encoding:>10}{len(encoded):>12}"
+                f"{encode_time / args.repeat * 1000:>14.3f}"
+                f"{decode_time / args.repeat * 1000:>14.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+# Copyright 2026 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Benchmarks of the charm and the kubernetes_manifests library against their scaling factors.
+
+They measure the time of a charm dispatch, of KubernetesManifestRequirerWrapper.send_data and of
+KubernetesManifestsProvider.get_manifests, varying the number of pod-defaults relations and the
+number of manifests per payload.  The peak memory allocated by one call is stored in the
+`extra_info` of each benchmark.
+
+Run with `tox -e benchmark`, which saves the results as JSON under .benchmarks and fails if the
+mean time of a benchmark regressed compared to the last saved run.
+"""
+
+import copy
+import itertools
+import json
+import tracemalloc
+from pathlib import Path
+
+import pytest
+import yaml
+from ops.charm import CharmBase
+from ops.testing import Harness
+
+from charm import PODDEFAULT_FILE, PODDEFAULTS_RELATION, NgcIntegratorCharm
+from lib.charms.resource_dispatcher.v0.kubernetes_manifests import (
+    KUBERNETES_MANIFESTS_FIELD,
+    KubernetesManifest,
+    KubernetesManifestsProvider,
+)
+
+RELATION_COUNTS = [1, 10, 100, 500]
+MANIFEST_COUNTS = [1, 10, 100, 1000]
+# Number of manifests per payload when varying the number of relations, and number of relations
+# when varying the number of manifests per payload
+DEFAULT_MANIFEST_COUNT = 10
+DEFAULT_RELATION_COUNT = 1
+
+PROVIDER_METADATA = f"""
+name: resource-dispatcher
+provides:
+  {PODDEFAULTS_RELATION}:
+    interface: kubernetes_manifest
+"""
+
+SCALING_CASES = list(
+    dict.fromkeys(
+        [
+            *((relations, DEFAULT_MANIFEST_COUNT) for relations in RELATION_COUNTS),
+            *((DEFAULT_RELATION_COUNT, manifests) for manifests in MANIFEST_COUNTS),
+        ]
+    )
+)
+SCALING_IDS = [
+    f"{relations}-relations-{manifests}-manifests" for relations, manifests in SCALING_CASES
+]
+
+
+class ProviderCharm(CharmBase):
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.manifests_provider = KubernetesManifestsProvider(self, PODDEFAULTS_RELATION)
+
+
+def generate_manifests(count: int, revision: int = 0) -> list:
+    """Returns count distinct PodDefaults derived from the charm's template."""
+    template = yaml.safe_load(Path(PODDEFAULT_FILE).read_text())
+    manifests = []
+    for i in range(count):
+        manifest = copy.deepcopy(template)
+        manifest["metadata"]["name"] = f"allow-ngc-notebook-{i}"
+        manifest["spec"]["desc"] = f"NGC notebook {i} (revision {revision})"
+        manifests.append(manifest)
+    return manifests
+
+
+def record_peak_memory(benchmark, function, *args):
+    """Stores the peak memory allocated by one call of function in the benchmark's extra_info."""
+    tracemalloc.start()
+    try:
+        function(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    benchmark.extra_info["peak_memory_bytes"] = peak
+
+
+def add_relations(harness: Harness, count: int) -> list:
+    """Adds count pod-defaults relations to harness, returning their ids."""
+    return [
+        harness.add_relation(PODDEFAULTS_RELATION, f"resource-dispatcher-{i}")
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def charm_harness():
+    harness = Harness(NgcIntegratorCharm)
+    harness.set_leader(True)
+    yield harness
+    harness.cleanup()
+
+
+@pytest.fixture
+def provider_harness():
+    harness = Harness(ProviderCharm, meta=PROVIDER_METADATA)
+    harness.begin()
+    yield harness
+    harness.cleanup()
+
+
+@pytest.mark.parametrize("relations", RELATION_COUNTS)
+def test_dispatch_config_changed(benchmark, charm_harness, relations):
+    """A config-changed dispatch that changes the PodDefault sent to every relation."""
+    add_relations(charm_harness, relations)
+    charm_harness.begin_with_initial_hooks()
+    descriptions = (f"NGC notebook {i}" for i in itertools.count())
+
+    def dispatch():
+        charm_harness.update_config({"poddefault-description": next(descriptions)})
+
+    record_peak_memory(benchmark, dispatch)
+    benchmark(dispatch)
+
+
+@pytest.mark.parametrize("relations", RELATION_COUNTS)
+def test_dispatch_update_status(benchmark, charm_harness, relations):
+    """An update-status dispatch, in which nothing changed."""
+    add_relations(charm_harness, relations)
+    charm_harness.begin_with_initial_hooks()
+
+    def dispatch():
+        charm_harness.charm.on.update_status.emit()
+
+    record_peak_memory(benchmark, dispatch)
+    benchmark(dispatch)
+
+
+@pytest.mark.parametrize("relations, manifests", SCALING_CASES, ids=SCALING_IDS)
+def test_send_data(benchmark, charm_harness, relations, manifests):
+    """send_data with manifests that changed since the previous call."""
+    add_relations(charm_harness, relations)
+    charm_harness.begin()
+    manifests_wrapper = charm_harness.charm.manifests_broadcaster.component.manifests_wrapper
+    revisions = itertools.count()
+
+    def setup():
+        items = [
+            KubernetesManifest(manifest=manifest)
+            for manifest in generate_manifests(manifests, next(revisions))
+        ]
+        return (items,), {}
+
+    record_peak_memory(benchmark, manifests_wrapper.send_data, setup()[0][0])
+    benchmark.pedantic(manifests_wrapper.send_data, setup=setup, rounds=20)
+
+
+@pytest.mark.parametrize("relations, manifests", SCALING_CASES, ids=SCALING_IDS)
+def test_send_data_unchanged(benchmark, charm_harness, relations, manifests):
+    """send_data with the manifests already in the relation data."""
+    add_relations(charm_harness, relations)
+    charm_harness.begin()
+    manifests_wrapper = charm_harness.charm.manifests_broadcaster.component.manifests_wrapper
+    items = [KubernetesManifest(manifest=manifest) for manifest in generate_manifests(manifests)]
+    manifests_wrapper.send_data(items)
+
+    record_peak_memory(benchmark, manifests_wrapper.send_data, items)
+    benchmark(manifests_wrapper.send_data, items)
+
+
+@pytest.mark.parametrize("relations, manifests", SCALING_CASES, ids=SCALING_IDS)
+def test_get_manifests(benchmark, provider_harness, relations, manifests):
+    """get_manifests on the provider side, with one requirer app per relation."""
+    for relation_id in add_relations(provider_harness, relations):
+        app_name = provider_harness.model.get_relation(PODDEFAULTS_RELATION, relation_id).app.name
+        payload = [
+            {**manifest, "metadata": {"name": f"{app_name}-{manifest['metadata']['name']}"}}
+            for manifest in generate_manifests(manifests)
+        ]
+        provider_harness.update_relation_data(
+            relation_id, app_name, {KUBERNETES_MANIFESTS_FIELD: json.dumps(payload)}
+        )
+
+    provider = provider_harness.charm.manifests_provider
+
+    def setup():
+        # Forget the decoded data, as in a new hook dispatch
+        provider._decoded_manifests.clear()
+        provider._index_digests = None
+        return (), {}
+
+    setup()
+    record_peak_memory(benchmark, provider.get_manifests)
+    result = benchmark.pedantic(provider.get_manifests, setup=setup, rounds=20)
+    assert len(result) == relations * manifests
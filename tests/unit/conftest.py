@@ -0,0 +1,16 @@
+# Copyright 2026 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+import pytest
+from ops.testing import Harness
+
+from charm import NgcIntegratorCharm
+
+
+@pytest.fixture
+def leader_harness() -> Harness:
+    """A Harness of the charm on the leader unit, not started."""
+    harness = Harness(NgcIntegratorCharm)
+    harness.set_leader(True)
+    yield harness
+    harness.cleanup()
@@ -0,0 +1,97 @@
+# Copyright 2026 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""A stand-in for the lightkube AsyncClient, shared by the tests applying objects directly."""
+
+import asyncio
+
+from lightkube.models.meta_v1 import ObjectMeta
+from lightkube.resources.core_v1 import Namespace
+
+from direct_apply import PROFILE_NAMESPACE_LABELS
+
+
+def labels_match(labels, selector) -> bool:
+    return all((labels or {}).get(key) == value for key, value in (selector or {}).items())
+
+
+def get_kind(res) -> str:
+    """Returns the kind of a lightkube resource class or object."""
+    return (res if isinstance(res, type) else type(res)).__name__
+
+
+class FakeClient:
+    """A stand-in for the lightkube AsyncClient, holding the namespaces and objects of a cluster.
+
+    Args:
+        namespaces: the names of the profile namespaces, or the labels of each namespace by name
+        objects: the lightkube objects in the cluster
+        fail: whether every request fails
+        failing_namespaces: the namespaces in which applying or deleting an object fails
+        apply_delay: the time each apply takes, in seconds
+    """
+
+    def __init__(
+        self, namespaces=(), objects=(), fail=False, failing_namespaces=(), apply_delay=0.0
+    ):
+        self.namespaces = namespaces
+        # Objects by (kind, namespace, name)
+        self.objects = {
+            (get_kind(obj), obj.metadata.namespace, obj.metadata.name): obj for obj in objects
+        }
+        self.fail = fail
+        self.failing_namespaces = set(failing_namespaces)
+        self.apply_delay = apply_delay
+        self.list_calls = []
+        self.apply_calls = []
+        self.delete_calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.closed = False
+
+    def get_objects(self, kind: str) -> dict:
+        """Returns the objects of a kind, by (namespace, name)."""
+        return {
+            (namespace, name): obj
+            for (object_kind, namespace, name), obj in self.objects.items()
+            if object_kind == kind
+        }
+
+    async def list(self, res, namespace=None, labels=None):
+        self.list_calls.append((get_kind(res), namespace))
+        if self.fail:
+            raise RuntimeError("forbidden")
+        if res is Namespace:
+            for name in self.namespaces:
+                if isinstance(self.namespaces, dict):
+                    namespace_labels = self.namespaces[name]
+                else:
+                    namespace_labels = PROFILE_NAMESPACE_LABELS
+                if labels_match(namespace_labels, labels):
+                    yield Namespace(metadata=ObjectMeta(name=name, labels=namespace_labels))
+            return
+        for (object_namespace, _), obj in list(self.get_objects(get_kind(res)).items()):
+            if namespace in ("*", object_namespace) and labels_match(obj.metadata.labels, labels):
+                yield obj
+
+    async def apply(self, obj, namespace=None, field_manager=None, force=False):
+        namespace = namespace or obj.metadata.namespace
+        self.apply_calls.append((namespace, obj.metadata.name, field_manager, force))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.apply_delay)
+            if self.fail or namespace in self.failing_namespaces:
+                raise RuntimeError("forbidden")
+            self.objects[(get_kind(obj), namespace, obj.metadata.name)] = obj
+        finally:
+            self.in_flight -= 1
+
+    async def delete(self, res, name, namespace=None):
+        self.delete_calls.append((namespace, name))
+        if self.fail or namespace in self.failing_namespaces:
+            raise RuntimeError("forbidden")
+        del self.objects[(get_kind(res), namespace, name)]
+
+    async def close(self):
+        self.closed = True
@@ -8,11 +8,17 @@ from unittest.mock import MagicMock, patch
 
 import pytest
 import yaml
-from ops.model import ActiveStatus, ErrorStatus
+from ops.model import ActiveStatus, BlockedStatus, ErrorStatus
 from ops.testing import Harness
 
 from charm import PODDEFAULT_FILE, PODDEFAULTS_RELATION, NgcIntegratorCharm
-from lib.charms.resource_dispatcher.v0.kubernetes_manifests import KUBERNETES_MANIFESTS_FIELD
+from lib.charms.resource_dispatcher.v0 import kubernetes_manifests
+from lib.charms.resource_dispatcher.v0.kubernetes_manifests import (
+    KUBERNETES_MANIFESTS_FIELD,
+    KUBERNETES_MANIFESTS_TARGETS_FIELD,
+    get_manifest_digest,
+)
+from manifests_compiler import compile_manifests, dump_canonical_json, get_digest
 
 
 @pytest.fixture
@@ -50,6 +56,334 @@ def test_kubernetes_manifest_relation_data(harness):
     assert isinstance(harness.charm.model.unit.status, ActiveStatus)
 
 
+def test_unchanged_manifests_are_not_rewritten(harness):
+    """Test that re-sending identical manifests does not write to the relation data again."""
+    # Arrange
+    harness.set_leader(True)
+    harness.begin_with_initial_hooks()
+    relation_id = harness.add_relation(relation_name=PODDEFAULTS_RELATION, remote_app="other")
+    harness.framework.commit()
+    requirer_wrapper = harness.charm.manifests_broadcaster.component.manifests_wrapper
+    writes_performed = requirer_wrapper.writes_performed
+
+    # Act
+    harness.charm.on.leader_elected.emit()
+    harness.framework.commit()
+
+    # Assert
+    assert requirer_wrapper.writes_performed == writes_performed
+    assert requirer_wrapper.writes_skipped == 1
+    assert get_manifests_from_relation(harness, relation_id, harness.model.app) == [
+        yaml.safe_load(Path(PODDEFAULT_FILE).read_text())
+    ]
+
+
+def test_manifests_are_written_once_per_dispatch(harness):
+    """Test that the manifests are sent once per dispatch, deferred events re-emitted included."""
+    # Arrange
+    harness.set_leader(True)
+    harness.begin_with_initial_hooks()
+    relation_id = harness.add_relation(relation_name=PODDEFAULTS_RELATION, remote_app="other")
+    harness.framework.commit()
+    component = harness.charm.manifests_broadcaster.component
+    requirer_wrapper = component.manifests_wrapper
+    writes_performed = requirer_wrapper.writes_performed
+
+    # The first config-changed is deferred after requesting the manifests to be sent
+    send_manifests = component._send_manifests
+    handled = []
+
+    def send_manifests_and_defer_once(event):
+        send_manifests(event)
+        if not handled:
+            event.defer()
+        handled.append(event)
+
+    component._send_manifests = send_manifests_and_defer_once
+
+    # Act
+    with patch.object(requirer_wrapper, "send_data", wraps=requirer_wrapper.send_data) as send:
+        harness.update_config({"target-profiles": "alice"})
+        harness.framework.commit()
+        first_dispatch_sends = send.call_count
+        with harness.hooks_disabled():
+            harness.update_config({"target-profiles": "bob"})
+        harness.framework.reemit()
+        harness.charm.on.config_changed.emit()
+        harness.framework.commit()
+
+    # Assert
+    assert len(handled) == 3
+    assert first_dispatch_sends == 1
+    assert send.call_count == 2
+    assert requirer_wrapper.writes_performed == writes_performed + 2
+    relation_data = harness.get_relation_data(relation_id, harness.model.app)
+    assert list(json.loads(relation_data[KUBERNETES_MANIFESTS_TARGETS_FIELD])["namespaces"]) == [
+        "bob"
+    ]
+
+
+def test_manifests_not_loaded_when_not_leader(harness):
+    """Test that the manifests files are not parsed on non-leader units."""
+    # Arrange
+    harness.begin_with_initial_hooks()
+
+    # Act
+    harness.add_relation(relation_name=PODDEFAULTS_RELATION, remote_app="other")
+
+    # Assert
+    manifests_cache = harness.charm.manifests_broadcaster.component._stored.manifests_cache
+    assert not any("manifests" in cached for cached in manifests_cache.values())
+
+
+def test_templates_digest_is_cached_until_the_files_change(harness, tmp_path):
+    """Test that the templates are only read again for their digest once they changed."""
+    # Arrange
+    template = tmp_path / "poddefault.yaml"
+    template.write_text(Path(PODDEFAULT_FILE).read_text())
+    with patch("charm.PODDEFAULT_FILE", str(template)):
+        harness.begin()
+    component = harness.charm.manifests_broadcaster.component
+    digest = component.get_templates_digest()
+
+    # Act
+    with patch.object(Path, "read_bytes") as mocked_read_bytes:
+        cached_digest = component.get_templates_digest()
+    template.write_text(template.read_text() + "# updated\n")
+
+    # Assert
+    mocked_read_bytes.assert_not_called()
+    assert cached_digest == digest
+    assert component.get_templates_digest() != digest
+
+
+def test_cached_manifests_are_not_parsed_again(harness):
+    """Test that manifests whose file did not change are loaded from the cache."""
+    # Arrange
+    harness.set_leader(True)
+    harness.begin_with_initial_hooks()
+    component = harness.charm.manifests_broadcaster.component
+
+    # Act
+    with patch("yaml.load_all") as mocked_load_all:
+        manifests_items = component._get_manifests_items()
+
+    # Assert
+    mocked_load_all.assert_not_called()
+    assert [item.manifest for item in manifests_items] == [
+        yaml.safe_load(Path(PODDEFAULT_FILE).read_text())
+    ]
+
+
+def test_compiled_manifests_are_sent_without_parsing_yaml(harness, tmp_path):
+    """Test that the manifests are loaded from the compiled artifact when it exists."""
+    # Arrange
+    compiled_manifests_file = tmp_path / "compiled-manifests.json"
+    compiled_manifests = compile_manifests([PODDEFAULT_FILE])
+    compiled_manifests["sources"][PODDEFAULT_FILE][0]["metadata"]["name"] = "compiled"
+    compiled_manifests_file.write_text(dump_canonical_json(compiled_manifests))
+    harness.set_leader(True)
+
+    # Act
+    with patch("charm.COMPILED_MANIFESTS_FILE", str(compiled_manifests_file)), patch(
+        "yaml.load"
+    ) as mocked_yaml_load:
+        harness.begin_with_initial_hooks()
+        relation_id = harness.add_relation(relation_name=PODDEFAULTS_RELATION, remote_app="other")
+
+    # Assert
+    mocked_yaml_load.assert_not_called()
+    actual_manifests = get_manifests_from_relation(harness, relation_id, harness.model.app)
+    assert [manifest["metadata"]["name"] for manifest in actual_manifests] == ["compiled"]
+
+
+@pytest.mark.parametrize("value", ["NGC notebook – PyTorch", 1e16, 1e-07, 0.5, 2**70])
+def test_digests_are_the_library_digests(value):
+    """Test that the charm serializes and digests a manifest as the library does."""
+    manifest = yaml.safe_load(Path(PODDEFAULT_FILE).read_text())
+    manifest["spec"]["desc"] = value
+
+    assert dump_canonical_json(manifest) == kubernetes_manifests.dump_canonical_json(manifest)
+    assert get_digest(manifest) == get_manifest_digest(manifest)
+
+
+def test_config_changed_sends_rendered_poddefault(harness):
+    """Test that the PodDefault is re-rendered and re-sent when the config changes."""
+    # Arrange
+    harness.set_leader(True)
+    harness.begin_with_initial_hooks()
+    relation_id = harness.add_relation(relation_name=PODDEFAULTS_RELATION, remote_app="other")
+
+    # Act
+    harness.update_config(
+        {
+            "poddefault-command": "/entrypoint.sh",
+            "poddefault-args": '["jupyter", "lab"]',
+            "poddefault-selector-label": "example.com/ngc",
+            "poddefault-description": "NGC notebook",
+            "shm-size": "16Gi",
+        }
+    )
+
+    # Assert
+    [poddefault] = get_manifests_from_relation(harness, relation_id, harness.model.app)
+    assert poddefault["spec"]["command"] == ["/entrypoint.sh"]
+    assert poddefault["spec"]["args"] == ["jupyter", "lab"]
+    assert poddefault["spec"]["selector"] == {"matchLabels": {"example.com/ngc": "true"}}
+    assert poddefault["spec"]["desc"] == "NGC notebook"
+    assert poddefault["spec"]["volumes"] == [
+        {"name": "dshm", "emptyDir": {"medium": "Memory", "sizeLimit": "16Gi"}}
+    ]
+    assert poddefault["spec"]["volumeMounts"] == [{"name": "dshm", "mountPath": "/dev/shm"}]
+    assert isinstance(harness.charm.model.unit.status, ActiveStatus)
+
+
+def test_config_changed_with_same_output_does_not_resend(harness):
+    """Test that a config change that does not change the PodDefault does not write data."""
+    # Arrange
+    harness.set_leader(True)
+    harness.begin_with_initial_hooks()
+    harness.add_relation(relation_name=PODDEFAULTS_RELATION, remote_app="other")
+    template = yaml.safe_load(Path(PODDEFAULT_FILE).read_text())
+    manifests_wrapper = harness.charm.manifests_broadcaster.component.manifests_wrapper
+    writes_performed = manifests_wrapper.writes_performed
+
+    # Act
+    harness.update_config({"poddefault-description": template["spec"]["desc"]})
+
+    # Assert
+    assert manifests_wrapper.writes_performed == writes_performed
+
+
+def test_upgrade_charm_clears_the_last_render(harness):
+    """Test that the manifests are rendered again after upgrade-charm, with the new code."""
+    # Arrange
+    harness.set_leader(True)
+    harness.begin_with_initial_hooks()
+    relation_id = harness.add_relation(relation_name=PODDEFAULTS_RELATION, remote_app="other")
+    component = harness.charm.manifests_broadcaster.component
+    render = component._renderer
+    component._renderer = lambda manifests, inputs: [
+        {**manifest, "metadata": {**manifest["metadata"], "name": "upgraded"}}
+        for manifest in render(manifests, inputs)
+    ]
+
+    # Act
+    harness.charm.on.config_changed.emit()
+    names_before_upgrade = [
+        manifest["metadata"]["name"]
+        for manifest in get_manifests_from_relation(harness, relation_id, harness.model.app)
+    ]
+    harness.charm.on.upgrade_charm.emit()
+    harness.charm.on.config_changed.emit()
+
+    # Assert
+    assert names_before_upgrade == ["allow-ngc-notebook"]
+    [poddefault] = get_manifests_from_relation(harness, relation_id, harness.model.app)
+    assert poddefault["metadata"]["name"] == "upgraded"
+
+
+def test_invalid_config_blocks_and_keeps_sent_data(harness):
+    """Test that an invalid config blocks the charm without changing the data sent."""
+    # Arrange
+    harness.set_leader(True)
+    harness.begin_with_initial_hooks()
+    relation_id = harness.add_relation(relation_name=PODDEFAULTS_RELATION, remote_app="other")
+    sent_manifests = get_manifests_from_relation(harness, relation_id, harness.model.app)
+
+    # Act
+    harness.update_config({"poddefault-args": "not-a-list"})
+
+    # Assert
+    assert get_manifests_from_relation(harness, relation_id, harness.model.app) == sent_manifests
+    assert isinstance(harness.charm.model.unit.status, BlockedStatus)
+    assert "poddefault-args" in harness.charm.model.unit.status.message
+
+
+@pytest.mark.parametrize(
+    "manifests_paths",
+    [
+        lambda templates_dir: [templates_dir],
+        lambda templates_dir: [f"{templates_dir}/*.yaml"],
+        lambda templates_dir: [f"{templates_dir}/*.yaml", templates_dir],
+    ],
+)
+def test_manifests_from_directories_and_globs(harness, tmp_path, manifests_paths):
+    """Test that directories, globs and multi-document files are loaded in a stable order."""
+    # Arrange
+    for file_index in range(12):
+        documents = [
+            yaml.safe_dump({"kind": "PodDefault", "metadata": {"name": f"{file_index}-{i}"}})
+            for i in range(2)
+        ]
+        (tmp_path / f"{file_index:02d}.yaml").write_text("---\n".join(documents))
+    (tmp_path / "ignored.txt").write_text("not a manifest")
+    harness.begin()
+    component = harness.charm.manifests_broadcaster.component
+    component.manifests_paths = manifests_paths(str(tmp_path))
+
+    # Act
+    manifests_items = component._get_manifests_items()
+
+    # Assert
+    assert [item.manifest["metadata"]["name"] for item in manifests_items] == [
+        f"{file_index}-{i}" for file_index in range(12) for i in range(2)
+    ]
+
+
+def test_invalid_manifests_not_sent(harness, tmp_path):
+    """Test that manifests not matching their schema are not sent and block the charm."""
+    # Arrange
+    poddefault = yaml.safe_load(Path(PODDEFAULT_FILE).read_text())
+    poddefault["spec"]["args"] = ["--port", 8888]
+    template = tmp_path / "poddefault.yaml"
+    template.write_text(yaml.safe_dump(poddefault))
+    harness.set_leader(True)
+    relation_id = harness.add_relation(relation_name=PODDEFAULTS_RELATION, remote_app="other")
+
+    # Act
+    with patch("charm.PODDEFAULT_FILE", str(template)):
+        harness.begin_with_initial_hooks()
+
+    # Assert
+    assert KUBERNETES_MANIFESTS_FIELD not in harness.get_relation_data(
+        relation_id, "ngc-integrator"
+    )
+    assert isinstance(harness.charm.model.unit.status, BlockedStatus)
+    assert harness.charm.model.unit.status.message == (
+        "[manifests-relation] Invalid manifests: PodDefault allow-ngc-notebook: spec.args[1]: "
+        "expected string, got integer"
+    )
+
+
+@pytest.mark.parametrize(
+    "change, reconciled",
+    [
+        (lambda harness: None, False),
+        (lambda harness: harness.update_config({"poddefault-description": "other"}), True),
+        (lambda harness: harness.add_relation(PODDEFAULTS_RELATION, "other"), True),
+        (lambda harness: harness.charm.on.upgrade_charm.emit(), True),
+    ],
+)
+def test_idle_reconciles_are_skipped(harness, change, reconciled):
+    """Test that the components are only executed again if something changed."""
+    # Arrange
+    harness.set_leader(True)
+    harness.begin_with_initial_hooks()
+
+    # Act
+    with patch(
+        "charmed_kubeflow_chisme.components.charm_reconciler.CharmReconciler.reconcile"
+    ) as mocked_reconcile:
+        change(harness)
+        harness.charm.on.update_status.emit()
+
+    # Assert
+    assert mocked_reconcile.called == reconciled
+    if not reconciled:
+        assert harness.charm.model.unit.status == ActiveStatus()
+
+
 @patch("charm.PODDEFAULT_FILE", "non_existent_file.yaml")
 def test_incorrect_manifest_path_error_status(harness):
     """
@@ -84,7 +418,11 @@ def test_invalid_yaml_error_status(harness):
 
 
 def get_manifests_from_relation(harness, relation_id, this_app) -> List[dict]:
-    """Returns the list of KubernetesManifests from a service-account relation on a harness."""
+    """Returns the list of KubernetesManifests from a service-account relation on a harness.
+
+    The framework is committed first, as at the end of a dispatch, to send the manifests.
+    """
+    harness.framework.commit()
     raw_relation_data = harness.get_relation_data(relation_id=relation_id, app_or_unit=this_app)
     actual_manifests = json.loads(raw_relation_data[KUBERNETES_MANIFESTS_FIELD])
     return actual_manifests
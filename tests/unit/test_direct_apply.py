@@ -0,0 +1,327 @@
+# Copyright 2026 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+import json
+import time
+from unittest.mock import patch
+
+import pytest
+from charms.resource_dispatcher.v0.kubernetes_manifests import (
+    KUBERNETES_MANIFESTS_FIELD,
+    ManifestTargets,
+)
+from ops.model import ActiveStatus, BlockedStatus
+
+from charm import PODDEFAULTS_RELATION
+from components import direct_apply_component
+from direct_apply import (
+    DIGEST_ANNOTATION,
+    FIELD_MANAGER,
+    MANAGED_BY_LABEL,
+    PROFILE_NAMESPACE_LABELS,
+    RESYNC_INTERVAL,
+    ApplyResult,
+    DirectApplyConfig,
+    apply_poddefaults,
+    get_poddefault_resource,
+)
+from manifests_compiler import get_digest
+from tests.unit.fake_lightkube import FakeClient
+
+POD_DEFAULT = {
+    "apiVersion": "kubeflow.org/v1alpha1",
+    "kind": "PodDefault",
+    "metadata": {"name": "ngc-integration"},
+    "spec": {"desc": "Integrate with NGC", "selector": {"matchLabels": {"ngc": "true"}}},
+}
+
+
+def applied_poddefault(namespace: str, poddefault: dict, digest: str, managed: bool = True):
+    """Returns a PodDefault as listed from the cluster, annotated with digest."""
+    return get_poddefault_resource().from_dict(
+        {
+            **poddefault,
+            "metadata": {
+                "name": poddefault["metadata"]["name"],
+                "namespace": namespace,
+                "labels": {MANAGED_BY_LABEL: FIELD_MANAGER if managed else "someone-else"},
+                "annotations": {DIGEST_ANNOTATION: digest},
+            },
+        }
+    )
+
+
+def test_poddefaults_are_applied_to_every_profile_namespace():
+    """Test that the PodDefaults are applied, labelled and annotated, to every namespace."""
+    client = FakeClient(namespaces=["alice", "bob"])
+
+    result = apply_poddefaults([POD_DEFAULT], client_factory=lambda: client)
+
+    assert (result.applied, result.unchanged, result.failed) == (2, 0, 0)
+    assert sorted(client.get_objects("PodDefault")) == [
+        ("alice", "ngc-integration"),
+        ("bob", "ngc-integration"),
+    ]
+    assert {call[2:] for call in client.apply_calls} == {(FIELD_MANAGER, True)}
+    metadata = client.get_objects("PodDefault")[("alice", "ngc-integration")].metadata
+    assert metadata.namespace == "alice"
+    assert metadata.labels == {MANAGED_BY_LABEL: FIELD_MANAGER}
+    assert metadata.annotations == {DIGEST_ANNOTATION: get_digest(POD_DEFAULT)}
+    assert client.closed
+
+
+def test_unchanged_poddefaults_are_not_applied():
+    """Test that only the PodDefaults whose digest changed, or missing ones, are applied."""
+    digest = get_digest(POD_DEFAULT)
+    client = FakeClient(
+        namespaces=["alice", "bob", "carol"],
+        objects=[
+            applied_poddefault("alice", POD_DEFAULT, digest),
+            applied_poddefault("bob", POD_DEFAULT, "outdated"),
+        ],
+    )
+
+    result = apply_poddefaults([POD_DEFAULT], client_factory=lambda: client)
+
+    assert (result.applied, result.unchanged, result.failed) == (2, 1, 0)
+    assert sorted(call[0] for call in client.apply_calls) == ["bob", "carol"]
+
+
+def test_poddefaults_not_applied_anymore_are_deleted():
+    """Test that only the managed PodDefaults that are not meant to be applied are deleted."""
+    digest = get_digest(POD_DEFAULT)
+    removed_poddefault = {**POD_DEFAULT, "metadata": {"name": "removed"}}
+    client = FakeClient(
+        namespaces={"alice": PROFILE_NAMESPACE_LABELS, "bob": {}},
+        objects=[
+            applied_poddefault("alice", POD_DEFAULT, digest),
+            applied_poddefault("alice", removed_poddefault, digest),
+            applied_poddefault(
+                "alice", {**POD_DEFAULT, "metadata": {"name": "other"}}, digest, managed=False
+            ),
+            # No longer a profile namespace
+            applied_poddefault("bob", POD_DEFAULT, digest),
+        ],
+    )
+
+    result = apply_poddefaults([POD_DEFAULT], client_factory=lambda: client)
+
+    assert (result.unchanged, result.deleted, result.failed) == (1, 2, 0)
+    assert sorted(client.delete_calls) == [("alice", "removed"), ("bob", "ngc-integration")]
+    assert sorted(client.get_objects("PodDefault")) == [
+        ("alice", "ngc-integration"),
+        ("alice", "other"),
+    ]
+
+
+def test_failed_applies_are_reported():
+    """Test that a failed apply is counted and reported without failing the others."""
+    client = FakeClient(namespaces=["alice", "bob"], failing_namespaces=["bob"])
+
+    result = apply_poddefaults([POD_DEFAULT], client_factory=lambda: client)
+
+    assert (result.applied, result.unchanged, result.failed) == (1, 0, 1)
+    assert result.errors == ("bob/ngc-integration: forbidden",)
+    assert client.closed
+
+
+def test_poddefaults_are_only_applied_to_targeted_namespaces():
+    """Test that PodDefaults with targets are only applied to the namespaces they target."""
+    client = FakeClient(
+        namespaces={
+            "alice": PROFILE_NAMESPACE_LABELS,
+            "bob": {**PROFILE_NAMESPACE_LABELS, "ngc": "true"},
+            "carol": PROFILE_NAMESPACE_LABELS,
+            # Not a profile namespace
+            "kube-system": {"ngc": "true"},
+        }
+    )
+    targets = ManifestTargets(
+        namespaces=("alice", "kube-system"), namespace_selector={"ngc": "true"}
+    )
+
+    result = apply_poddefaults([POD_DEFAULT], client_factory=lambda: client, targets=targets)
+
+    assert result.applied == 2
+    assert sorted(client.get_objects("PodDefault")) == [
+        ("alice", "ngc-integration"),
+        ("bob", "ngc-integration"),
+    ]
+
+
+def test_nothing_is_listed_when_unchanged_since_the_last_apply():
+    """Test that only the namespaces are listed when the key of the last apply is unchanged."""
+    client = FakeClient(namespaces=["alice"])
+    result = apply_poddefaults([POD_DEFAULT], client_factory=lambda: client)
+    client.list_calls.clear()
+
+    unchanged_result = apply_poddefaults(
+        [POD_DEFAULT], client_factory=lambda: client, last_key=result.key
+    )
+
+    assert unchanged_result == ApplyResult(unchanged=1, key=result.key)
+    assert client.list_calls == [("Namespace", None)]
+    assert len(client.apply_calls) == 1
+
+    client.namespaces.append("bob")
+    new_namespace_result = apply_poddefaults(
+        [POD_DEFAULT], client_factory=lambda: client, last_key=result.key
+    )
+
+    assert (new_namespace_result.applied, new_namespace_result.unchanged) == (1, 1)
+    assert new_namespace_result.key != result.key
+
+
+@pytest.mark.parametrize("concurrency", [1, 4, 16])
+def test_concurrent_applies_are_bounded(concurrency):
+    """Test that at most `concurrency` applies are in flight at once."""
+    client = FakeClient(namespaces=[f"user-{i}" for i in range(50)], apply_delay=0.001)
+
+    result = apply_poddefaults([POD_DEFAULT], concurrency, client_factory=lambda: client)
+
+    assert result.applied == 50
+    assert client.max_in_flight == concurrency
+
+
+@pytest.mark.parametrize(
+    "config, expected",
+    [
+        ({}, DirectApplyConfig(enabled=False, concurrency=16)),
+        (
+            {"direct-apply": True, "direct-apply-concurrency": 4},
+            DirectApplyConfig(enabled=True, concurrency=4),
+        ),
+    ],
+)
+def test_direct_apply_config(config, expected):
+    """Test the DirectApplyConfig of the charm config."""
+    assert DirectApplyConfig.from_charm_config(config) == expected
+
+
+def test_invalid_concurrency():
+    """Test that a concurrency below 1 is rejected."""
+    with pytest.raises(ValueError):
+        DirectApplyConfig.from_charm_config({"direct-apply-concurrency": 0})
+
+
+def test_charm_applies_poddefaults_when_enabled(leader_harness):
+    """Test that the charm applies its PodDefaults on update-status when direct-apply is set."""
+    client = FakeClient(namespaces=["alice"])
+    leader_harness.begin_with_initial_hooks()
+
+    with patch("direct_apply.create_client", return_value=client):
+        leader_harness.update_config({"direct-apply": True})
+        assert sorted(client.get_objects("PodDefault")) == [("alice", "allow-ngc-notebook")]
+
+        client.namespaces.append("bob")
+        leader_harness.charm.on.update_status.emit()
+
+    assert sorted(client.get_objects("PodDefault")) == [
+        ("alice", "allow-ngc-notebook"),
+        ("bob", "allow-ngc-notebook"),
+    ]
+    assert isinstance(leader_harness.charm.model.unit.status, ActiveStatus)
+
+
+def test_charm_only_lists_namespaces_on_idle_update_status(leader_harness, monkeypatch):
+    """Test that an idle update-status only lists the namespaces, and is timed."""
+    client = FakeClient(namespaces=["alice"])
+    leader_harness.begin_with_initial_hooks()
+
+    def slow_apply_poddefaults(*args, **kwargs):
+        time.sleep(0.05)
+        return apply_poddefaults(*args, **kwargs)
+
+    monkeypatch.setattr(direct_apply_component, "apply_poddefaults", slow_apply_poddefaults)
+
+    with patch("direct_apply.create_client", return_value=client):
+        leader_harness.update_config({"direct-apply": True})
+        leader_harness.framework.commit()
+        client.list_calls.clear()
+
+        monkeypatch.setenv("JUJU_DISPATCH_PATH", "hooks/update-status")
+        leader_harness.charm.on.update_status.emit()
+        leader_harness.framework.commit()
+
+    assert client.list_calls == [("Namespace", None)]
+    assert len(client.apply_calls) == 1
+    update_status_entry = leader_harness.charm.hook_stats.get_entries()[-1]
+    assert update_status_entry["hook"] == "update-status"
+    assert update_status_entry["timings"]["direct-apply"] >= 0.05
+
+
+def test_charm_lists_poddefaults_on_update_status_after_the_resync_interval(
+    leader_harness, monkeypatch
+):
+    """Test that update-status applies the PodDefaults again once RESYNC_INTERVAL passed."""
+    client = FakeClient(namespaces=["alice"])
+    leader_harness.begin_with_initial_hooks()
+
+    with patch("direct_apply.create_client", return_value=client):
+        leader_harness.update_config({"direct-apply": True})
+        client.objects.clear()
+        client.list_calls.clear()
+
+        synced_at = leader_harness.charm.direct_apply.component._stored.synced_at
+        monkeypatch.setattr(time, "time", lambda: synced_at + RESYNC_INTERVAL)
+        leader_harness.charm.on.update_status.emit()
+
+    assert ("PodDefault", "*") in client.list_calls
+    assert len(client.get_objects("PodDefault")) == 1
+
+
+def test_charm_deletes_applied_poddefaults_when_disabled(leader_harness):
+    """Test that the charm sends no PodDefaults when applying them, and deletes them after."""
+    client = FakeClient(namespaces=["alice"])
+    leader_harness.begin_with_initial_hooks()
+    relation_id = leader_harness.add_relation(PODDEFAULTS_RELATION, "dispatcher")
+
+    with patch("direct_apply.create_client", return_value=client):
+        leader_harness.update_config({"direct-apply": True})
+        leader_harness.framework.commit()
+        assert (
+            json.loads(
+                leader_harness.get_relation_data(relation_id, "ngc-integrator")[
+                    KUBERNETES_MANIFESTS_FIELD
+                ]
+            )
+            == []
+        )
+
+        leader_harness.update_config({"direct-apply": False})
+        leader_harness.framework.commit()
+
+    assert client.delete_calls == [("alice", "allow-ngc-notebook")]
+    assert client.get_objects("PodDefault") == {}
+    [poddefault] = json.loads(
+        leader_harness.get_relation_data(relation_id, "ngc-integrator")[KUBERNETES_MANIFESTS_FIELD]
+    )
+    assert poddefault["metadata"]["name"] == "allow-ngc-notebook"
+    assert isinstance(leader_harness.charm.model.unit.status, ActiveStatus)
+
+
+def test_charm_does_not_apply_when_disabled(leader_harness):
+    """Test that nothing is applied when direct-apply is not set."""
+    with patch("direct_apply.create_client") as create_client:
+        leader_harness.begin_with_initial_hooks()
+        leader_harness.charm.on.update_status.emit()
+
+    create_client.assert_not_called()
+
+
+def test_charm_is_blocked_when_apply_fails(leader_harness):
+    """Test that the charm is Blocked when PodDefaults could not be applied."""
+    client = FakeClient(namespaces=["alice"], failing_namespaces=["alice"])
+    leader_harness.begin_with_initial_hooks()
+
+    with patch("direct_apply.create_client", return_value=client):
+        leader_harness.update_config({"direct-apply": True})
+
+    assert isinstance(leader_harness.charm.model.unit.status, BlockedStatus)
+    assert "Failed to apply 1 PodDefault(s)" in leader_harness.charm.model.unit.status.message
+
+    client.failing_namespaces.clear()
+    with patch("direct_apply.create_client", return_value=client):
+        leader_harness.charm.on.update_status.emit()
+
+    assert isinstance(leader_harness.charm.model.unit.status, ActiveStatus)
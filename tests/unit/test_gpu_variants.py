@@ -0,0 +1,146 @@
+# Copyright 2026 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+import json
+from pathlib import Path
+
+import pytest
+import yaml
+from ops.model import ActiveStatus, BlockedStatus
+
+from charm import PODDEFAULT_FILE, PODDEFAULTS_RELATION
+from gpu_variants import (
+    DEFAULT_TOLERATIONS,
+    GpuVariant,
+    parse_gpu_variants,
+    render_gpu_variant_poddefault,
+    render_gpu_variants,
+)
+from lib.charms.resource_dispatcher.v0.kubernetes_manifests import KUBERNETES_MANIFESTS_FIELD
+from poddefault_generator import InvalidConfigError
+
+TEMPLATE = yaml.safe_load(Path(PODDEFAULT_FILE).read_text())
+GPU_VARIANTS = """
+- name: a100
+  product: NVIDIA-A100-SXM4-80GB
+  gpus: 2
+- name: mig-1g-10gb
+  mig-profile: 1g.10gb
+  tolerations:
+    - {key: example.com/mig, operator: Exists}
+  description: NGC on a MIG slice
+"""
+
+
+def test_parse_gpu_variants():
+    """Test that the variants are parsed, with the default GPU toleration."""
+    assert parse_gpu_variants(GPU_VARIANTS) == (
+        GpuVariant(name="a100", product="NVIDIA-A100-SXM4-80GB", gpus=2),
+        GpuVariant(
+            name="mig-1g-10gb",
+            mig_profile="1g.10gb",
+            tolerations=({"key": "example.com/mig", "operator": "Exists"},),
+            description="NGC on a MIG slice",
+        ),
+    )
+    assert parse_gpu_variants("") == ()
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        "name: a100",
+        "[unclosed",
+        "- a100",
+        "- {name: A100}",
+        "- {name: a100, gpus: 0}",
+        "- {name: a100, gpus: true}",
+        "- {name: a100, mig-profile: 1g}",
+        "- {name: a100, product: not a label}",
+        "- {name: a100, tolerations: {key: gpu}}",
+        "- {name: a100, affinity: {}}",
+        "- {name: a100}\n- {name: a100}",
+    ],
+)
+def test_invalid_gpu_variants(value):
+    with pytest.raises(InvalidConfigError):
+        parse_gpu_variants(value)
+
+
+@pytest.mark.parametrize(
+    "variant, resource, desc_suffix",
+    [
+        (GpuVariant(name="any"), "nvidia.com/gpu", "(1x GPU)"),
+        (
+            GpuVariant(name="a100", product="NVIDIA-A100", gpus=4),
+            "nvidia.com/gpu",
+            "(4x NVIDIA-A100)",
+        ),
+        (
+            GpuVariant(name="mig", mig_profile="3g.40gb"),
+            "nvidia.com/mig-3g.40gb",
+            "(1x MIG 3g.40gb)",
+        ),
+    ],
+)
+def test_render_gpu_variant_poddefault(variant, resource, desc_suffix):
+    """Test that the PodDefault of a variant has its selector, tolerations and GPU annotations."""
+    poddefault = render_gpu_variant_poddefault(TEMPLATE, variant)
+
+    assert poddefault["metadata"]["name"] == f"allow-ngc-notebook-{variant.name}"
+    assert poddefault["spec"]["annotations"]["ngc.nvidia.com/gpu-resource"] == resource
+    assert poddefault["spec"]["annotations"]["ngc.nvidia.com/gpu-count"] == str(variant.gpus)
+    assert "annotations" not in poddefault["metadata"]
+    assert poddefault["spec"]["selector"] == {
+        "matchLabels": {f"enable-ngc-gpu-{variant.name}": "true"}
+    }
+    assert poddefault["spec"]["desc"] == f"{TEMPLATE['spec']['desc']} {desc_suffix}"
+    assert poddefault["spec"]["tolerations"] == list(DEFAULT_TOLERATIONS)
+    assert poddefault["spec"]["args"] is TEMPLATE["spec"]["args"]
+    assert TEMPLATE == yaml.safe_load(Path(PODDEFAULT_FILE).read_text())
+
+
+def test_render_gpu_variants_keeps_template_tolerations():
+    """Test that the tolerations of the variants are added to those of the template."""
+    template = {**TEMPLATE, "spec": {**TEMPLATE["spec"], "tolerations": [{"key": "a"}]}}
+    other_manifest = {"apiVersion": "v1", "kind": "ConfigMap", "metadata": {"name": "other"}}
+
+    manifests = render_gpu_variants([other_manifest, template], parse_gpu_variants(GPU_VARIANTS))
+
+    assert [manifest["metadata"]["name"] for manifest in manifests] == [
+        "other",
+        "allow-ngc-notebook",
+        "allow-ngc-notebook-a100",
+        "allow-ngc-notebook-mig-1g-10gb",
+    ]
+    assert manifests[3]["spec"]["tolerations"] == [
+        {"key": "a"},
+        {"key": "example.com/mig", "operator": "Exists"},
+    ]
+    assert manifests[2]["spec"]["annotations"]["ngc.nvidia.com/gpu-product"] == (
+        "NVIDIA-A100-SXM4-80GB"
+    )
+    assert "ngc.nvidia.com/gpu-product" not in manifests[3]["spec"]["annotations"]
+
+
+def test_charm_sends_gpu_variants(leader_harness):
+    """Test that the charm sends a valid PodDefault per variant, and is Blocked if invalid."""
+    leader_harness.begin_with_initial_hooks()
+    relation_id = leader_harness.add_relation(PODDEFAULTS_RELATION, "dispatcher")
+
+    leader_harness.update_config({"gpu-variants": GPU_VARIANTS})
+    leader_harness.framework.commit()
+
+    relation_data = leader_harness.get_relation_data(relation_id, leader_harness.model.app)
+    assert [
+        m["metadata"]["name"] for m in json.loads(relation_data[KUBERNETES_MANIFESTS_FIELD])
+    ] == [
+        "allow-ngc-notebook",
+        "allow-ngc-notebook-a100",
+        "allow-ngc-notebook-mig-1g-10gb",
+    ]
+    assert isinstance(leader_harness.charm.model.unit.status, ActiveStatus)
+
+    leader_harness.update_config({"gpu-variants": "- {name: a100, gpus: 0}"})
+    assert isinstance(leader_harness.charm.model.unit.status, BlockedStatus)
+    assert "gpus of a100" in leader_harness.charm.model.unit.status.message
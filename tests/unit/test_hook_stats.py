@@ -0,0 +1,140 @@
+# Copyright 2026 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+import pytest
+
+from charm import PODDEFAULTS_RELATION
+from hook_stats import get_dispatched_hook, get_percentile, summarise_entries
+
+
+def dispatch(harness, monkeypatch, hook, emit):
+    """Emits an event as if dispatched by Juju for hook, committing the framework after it."""
+    monkeypatch.setenv("JUJU_DISPATCH_PATH", f"hooks/{hook}")
+    emit()
+    harness.framework.commit()
+
+
+def test_hook_entries_recorded_on_commit(leader_harness, monkeypatch):
+    """Test that each committed hook appends an entry with its timings and writes."""
+    # Arrange
+    leader_harness.begin()
+    dispatch(
+        leader_harness,
+        monkeypatch,
+        "pod-defaults-relation-created",
+        lambda: leader_harness.add_relation(PODDEFAULTS_RELATION, "other"),
+    )
+
+    # Act
+    dispatch(
+        leader_harness, monkeypatch, "config-changed", leader_harness.charm.on.config_changed.emit
+    )
+
+    # Assert
+    created_entry, config_changed_entry = leader_harness.charm.hook_stats.get_entries()
+    assert created_entry["hook"] == "pod-defaults-relation-created"
+    assert created_entry["writes-performed"] == 1
+    assert created_entry["bytes-written"] > 0
+    assert set(created_entry["timings"]) == {"send-data"}
+    assert config_changed_entry["hook"] == "config-changed"
+    assert set(config_changed_entry["timings"]) == {
+        "leadership-gate",
+        "manifests-relation",
+        "direct-apply",
+        "image-prepull",
+        "send-data",
+    }
+    assert config_changed_entry["writes-performed"] == 0
+    assert config_changed_entry["writes-skipped"] == 1
+    assert config_changed_entry["bytes-written"] == 0
+
+
+def test_actions_are_not_recorded(leader_harness, monkeypatch):
+    """Test that no entry is recorded when the framework is committed after an action."""
+    # Arrange
+    leader_harness.begin()
+
+    # Act
+    monkeypatch.setenv("JUJU_DISPATCH_PATH", "actions/hook-stats")
+    leader_harness.run_action("hook-stats")
+    leader_harness.framework.commit()
+
+    # Assert
+    assert leader_harness.charm.hook_stats.get_entries() == []
+
+
+def test_hook_entries_ring_buffer_is_bounded(leader_harness, monkeypatch):
+    """Test that only the most recent entries are kept."""
+    # Arrange
+    leader_harness.begin()
+    leader_harness.charm.hook_stats._capacity = 3
+
+    # Act
+    for _ in range(5):
+        dispatch(
+            leader_harness,
+            monkeypatch,
+            "config-changed",
+            leader_harness.charm.on.config_changed.emit,
+        )
+
+    # Assert
+    assert len(leader_harness.charm.hook_stats.get_entries()) == 3
+
+
+def test_hook_stats_action(leader_harness, monkeypatch):
+    """Test that the hook-stats action reports the count and percentiles of each hook type."""
+    # Arrange
+    leader_harness.begin()
+    for _ in range(2):
+        dispatch(
+            leader_harness,
+            monkeypatch,
+            "config-changed",
+            leader_harness.charm.on.config_changed.emit,
+        )
+
+    # Act
+    output = leader_harness.run_action("hook-stats")
+
+    # Assert
+    assert output.results["entries"] == "2"
+    config_changed = output.results["hooks"]["config-changed"]
+    assert config_changed["count"] == "2"
+    assert set(config_changed["manifests-relation"]) == {"p50-ms", "p95-ms", "p99-ms"}
+
+
+@pytest.mark.parametrize(
+    "dispatch_path, expected_hook",
+    [
+        ("hooks/config-changed", "config-changed"),
+        ("actions/hook-stats", None),
+        ("", None),
+    ],
+)
+def test_get_dispatched_hook(monkeypatch, dispatch_path, expected_hook):
+    """Test that the hook name is read from the dispatch path, ignoring actions."""
+    monkeypatch.setenv("JUJU_DISPATCH_PATH", dispatch_path)
+
+    assert get_dispatched_hook() == expected_hook
+
+
+def test_summarise_entries_percentiles():
+    """Test the nearest-rank percentiles of the hook durations."""
+    entries = [
+        {"hook": "update-status", "duration": duration / 1000, "timings": {}}
+        for duration in range(1, 101)
+    ]
+
+    results = summarise_entries(entries)
+
+    assert results["hooks"]["update-status"] == {
+        "count": "100",
+        "p50-ms": "50.00",
+        "p95-ms": "95.00",
+        "p99-ms": "99.00",
+        "writes-performed": "0",
+        "writes-skipped": "0",
+        "bytes-written": "0",
+    }
+    assert get_percentile([1.0], 99) == 1.0
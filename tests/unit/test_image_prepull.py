@@ -0,0 +1,217 @@
+# Copyright 2026 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+import json
+import time
+from unittest.mock import patch
+
+import pytest
+from ops.model import ActiveStatus, BlockedStatus
+
+from charm import PODDEFAULTS_RELATION
+from components import image_prepull_component
+from direct_apply import DIGEST_ANNOTATION, FIELD_MANAGER, MANAGED_BY_LABEL, RESYNC_INTERVAL
+from image_prepull import (
+    DAEMONSET_NAME,
+    PrepullConfig,
+    apply_prepull_daemonset,
+    get_init_container_name,
+    render_prepull_daemonset,
+)
+from lib.charms.resource_dispatcher.v0.kubernetes_manifests import KUBERNETES_MANIFESTS_FIELD
+from manifests_compiler import get_digest
+from poddefault_generator import InvalidConfigError
+from tests.unit.fake_lightkube import FakeClient
+
+PYTORCH_IMAGE = "nvcr.io/nvidia/pytorch:24.05-py3"
+TENSORFLOW_IMAGE = "nvcr.io/nvidia/tensorflow:24.05-tf2-py3"
+
+
+def test_config_from_charm_config():
+    """Test that images are deduplicated, in order, and the defaults used."""
+    config = PrepullConfig.from_charm_config(
+        {"prepull-images": f"{PYTORCH_IMAGE}, {TENSORFLOW_IMAGE}\n{PYTORCH_IMAGE}"}
+    )
+
+    assert config == PrepullConfig(
+        images=(PYTORCH_IMAGE, TENSORFLOW_IMAGE),
+        namespace="kubeflow",
+        node_selector=(("nvidia.com/gpu.present", "true"),),
+        concurrency=1,
+    )
+
+
+@pytest.mark.parametrize(
+    "config",
+    [
+        {"prepull-images": "nvcr.io/nvidia/pytorch:24.05 $(whoami)"},
+        {"prepull-namespace": "Kubeflow"},
+        {"prepull-node-selector": "gpu"},
+        {"prepull-node-selector": ""},
+        {"prepull-concurrency": 0},
+    ],
+)
+def test_invalid_config(config):
+    with pytest.raises(InvalidConfigError):
+        PrepullConfig.from_charm_config(config)
+
+
+def test_no_daemonset_without_images():
+    """Test that no DaemonSet is rendered when there are no images to pull."""
+    assert render_prepull_daemonset(PrepullConfig()) is None
+
+
+def test_render_daemonset():
+    """Test that the DaemonSet pulls each image in an init container on the selected nodes."""
+    config = PrepullConfig(
+        images=(PYTORCH_IMAGE, TENSORFLOW_IMAGE),
+        namespace="ngc",
+        node_selector=(("nvidia.com/gpu.present", "true"),),
+        concurrency=3,
+    )
+
+    daemonset = render_prepull_daemonset(config)
+
+    assert daemonset["metadata"]["namespace"] == "ngc"
+    assert daemonset["spec"]["updateStrategy"]["rollingUpdate"] == {"maxUnavailable": 3}
+    pod_spec = daemonset["spec"]["template"]["spec"]
+    assert pod_spec["nodeSelector"] == {"nvidia.com/gpu.present": "true"}
+    assert pod_spec["tolerations"] == [
+        {"key": "nvidia.com/gpu", "operator": "Exists", "effect": "NoSchedule"}
+    ]
+    assert [(c["name"], c["image"]) for c in pod_spec["initContainers"]] == [
+        (get_init_container_name(PYTORCH_IMAGE), PYTORCH_IMAGE),
+        (get_init_container_name(TENSORFLOW_IMAGE), TENSORFLOW_IMAGE),
+    ]
+    assert len(get_init_container_name(PYTORCH_IMAGE)) <= 63
+
+
+def test_adding_an_image_only_adds_its_container():
+    """Test that changing the images only changes the init containers of the changed images."""
+    images = tuple(f"nvcr.io/nvidia/pytorch:24.{month:02d}-py3" for month in range(1, 11))
+    new_image = "nvcr.io/nvidia/pytorch:24.11-py3"
+
+    daemonset = render_prepull_daemonset(PrepullConfig(images=images))
+    updated_daemonset = render_prepull_daemonset(PrepullConfig(images=(*images[1:], new_image)))
+
+    init_containers = daemonset["spec"]["template"]["spec"].pop("initContainers")
+    updated_init_containers = updated_daemonset["spec"]["template"]["spec"].pop("initContainers")
+    assert updated_daemonset == daemonset
+    assert updated_init_containers[:-1] == init_containers[1:]
+    assert updated_init_containers[-1]["image"] == new_image
+
+
+def test_daemonset_is_applied_once():
+    """Test that the DaemonSet is applied, labelled and annotated, and not again if unchanged."""
+    client = FakeClient()
+    config = PrepullConfig.from_charm_config({"prepull-images": PYTORCH_IMAGE})
+
+    assert apply_prepull_daemonset(config, client_factory=lambda: client)
+    assert client.apply_calls == [("kubeflow", DAEMONSET_NAME, FIELD_MANAGER, True)]
+    metadata = client.get_objects("DaemonSet")[("kubeflow", DAEMONSET_NAME)].metadata
+    assert metadata.labels[MANAGED_BY_LABEL] == FIELD_MANAGER
+    assert metadata.annotations[DIGEST_ANNOTATION] == get_digest(render_prepull_daemonset(config))
+    assert client.closed
+
+    assert not apply_prepull_daemonset(config, client_factory=lambda: client)
+    assert len(client.apply_calls) == 1
+
+
+def test_daemonsets_not_applied_anymore_are_deleted():
+    """Test that the DaemonSet left in another namespace, and all of them without images, go."""
+    client = FakeClient()
+    config = PrepullConfig.from_charm_config({"prepull-images": PYTORCH_IMAGE})
+    apply_prepull_daemonset(config, client_factory=lambda: client)
+
+    moved_config = PrepullConfig.from_charm_config(
+        {"prepull-images": PYTORCH_IMAGE, "prepull-namespace": "ngc"}
+    )
+    apply_prepull_daemonset(moved_config, client_factory=lambda: client)
+    assert list(client.get_objects("DaemonSet")) == [("ngc", DAEMONSET_NAME)]
+    assert client.delete_calls == [("kubeflow", DAEMONSET_NAME)]
+
+    assert not apply_prepull_daemonset(PrepullConfig(), client_factory=lambda: client)
+    assert client.get_objects("DaemonSet") == {}
+
+
+def test_charm_applies_daemonset_when_configured(leader_harness):
+    """Test that the charm applies the DaemonSet instead of sending it, and deletes it after."""
+    client = FakeClient()
+    leader_harness.begin_with_initial_hooks()
+    relation_id = leader_harness.add_relation(PODDEFAULTS_RELATION, "dispatcher")
+
+    with patch("image_prepull.create_client", return_value=client):
+        leader_harness.update_config({"prepull-images": PYTORCH_IMAGE})
+        leader_harness.framework.commit()
+        relation_data = leader_harness.get_relation_data(relation_id, leader_harness.model.app)
+        manifests = json.loads(relation_data[KUBERNETES_MANIFESTS_FIELD])
+        assert [manifest["kind"] for manifest in manifests] == ["PodDefault"]
+        assert list(client.get_objects("DaemonSet")) == [("kubeflow", DAEMONSET_NAME)]
+
+        leader_harness.update_config({"prepull-images": ""})
+        assert client.get_objects("DaemonSet") == {}
+
+        # Nothing is left to delete
+        leader_harness.charm.on.update_status.emit()
+    assert len(client.delete_calls) == 1
+    assert isinstance(leader_harness.charm.model.unit.status, ActiveStatus)
+
+
+def test_charm_does_not_list_daemonsets_on_idle_update_status(leader_harness, monkeypatch):
+    """Test that an idle update-status does not query the cluster, and that applying is timed."""
+    client = FakeClient()
+    leader_harness.begin_with_initial_hooks()
+
+    def slow_apply_prepull_daemonset(*args, **kwargs):
+        time.sleep(0.05)
+        return apply_prepull_daemonset(*args, **kwargs)
+
+    monkeypatch.setattr(
+        image_prepull_component, "apply_prepull_daemonset", slow_apply_prepull_daemonset
+    )
+
+    with patch("image_prepull.create_client", return_value=client):
+        monkeypatch.setenv("JUJU_DISPATCH_PATH", "hooks/config-changed")
+        leader_harness.update_config({"prepull-images": PYTORCH_IMAGE})
+        leader_harness.framework.commit()
+        client.list_calls.clear()
+
+        monkeypatch.setenv("JUJU_DISPATCH_PATH", "hooks/update-status")
+        leader_harness.charm.on.update_status.emit()
+        leader_harness.framework.commit()
+        assert client.list_calls == []
+
+        # The DaemonSet is checked again once RESYNC_INTERVAL passed
+        synced_at = leader_harness.charm.image_prepull.component._stored.synced_at
+        monkeypatch.setattr(time, "time", lambda: synced_at + RESYNC_INTERVAL)
+        leader_harness.charm.on.update_status.emit()
+        assert client.list_calls == [("DaemonSet", "*")]
+
+    config_changed_entry = leader_harness.charm.hook_stats.get_entries()[-2]
+    assert config_changed_entry["hook"] == "config-changed"
+    assert config_changed_entry["timings"]["image-prepull"] >= 0.05
+
+
+def test_charm_does_not_apply_without_images(leader_harness):
+    """Test that the cluster is not queried when there are no images to pull."""
+    with patch("image_prepull.create_client") as create_client:
+        leader_harness.begin_with_initial_hooks()
+        leader_harness.charm.on.update_status.emit()
+
+    create_client.assert_not_called()
+
+
+def test_charm_is_blocked_when_apply_fails(leader_harness):
+    """Test that the charm is Blocked when the DaemonSet could not be applied."""
+    client = FakeClient(fail=True)
+    leader_harness.begin_with_initial_hooks()
+
+    with patch("image_prepull.create_client", return_value=client):
+        leader_harness.update_config({"prepull-images": PYTORCH_IMAGE})
+        assert isinstance(leader_harness.charm.model.unit.status, BlockedStatus)
+        assert "pre-pull DaemonSet: forbidden" in leader_harness.charm.model.unit.status.message
+
+        client.fail = False
+        leader_harness.charm.on.update_status.emit()
+
+    assert isinstance(leader_harness.charm.model.unit.status, ActiveStatus)
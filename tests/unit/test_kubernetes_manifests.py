@@ -0,0 +1,638 @@
+# Copyright 2026 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+import copy
+import json
+import pickle
+from unittest.mock import patch
+
+import pytest
+from ops.charm import CharmBase
+from ops.testing import Harness
+
+from lib.charms.resource_dispatcher.v0.kubernetes_manifests import (
+    GZIP_ENCODING,
+    GZIP_ENCODING_MARKER,
+    JSON_ENCODING,
+    KUBERNETES_MANIFEST_KEY_PREFIX,
+    KUBERNETES_MANIFESTS_FIELD,
+    KUBERNETES_MANIFESTS_INDEX_FIELD,
+    KUBERNETES_MANIFESTS_PROTOCOLS_FIELD,
+    KUBERNETES_MANIFESTS_REVISION_FIELD,
+    KUBERNETES_MANIFESTS_TARGETS_FIELD,
+    PER_MANIFEST_PROTOCOL,
+    SINGLE_KEY_PROTOCOL,
+    SUPPORTED_PROTOCOLS,
+    KubernetesManifest,
+    KubernetesManifestRequirerWrapper,
+    KubernetesManifestsProvider,
+    KubernetesManifestsRequirer,
+    ManifestConflict,
+    ManifestIdentity,
+    ManifestsTargetsIndex,
+    ManifestTargets,
+    decode_manifests,
+    dump_canonical_json,
+    encode_manifests,
+    get_manifest_digest,
+    get_provider_protocols,
+)
+
+RELATION_NAME = "pod-defaults"
+PROVIDER_METADATA = f"""
+name: provider
+provides:
+  {RELATION_NAME}:
+    interface: kubernetes_manifest
+"""
+REQUIRER_METADATA = f"""
+name: requirer
+requires:
+  {RELATION_NAME}:
+    interface: kubernetes_manifest
+"""
+POD_DEFAULT = {
+    "apiVersion": "kubeflow.org/v1alpha1",
+    "kind": "PodDefault",
+    "metadata": {"name": "allow-ngc-notebook"},
+    "spec": {"desc": "NGC"},
+}
+
+
+class ProviderCharm(CharmBase):
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.manifests_provider = KubernetesManifestsProvider(self, RELATION_NAME)
+
+
+class RequirerCharm(CharmBase):
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.requirer_wrapper = KubernetesManifestRequirerWrapper(self, RELATION_NAME)
+
+
+class CoalescingRequirerCharm(CharmBase):
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.manifests_requirer = KubernetesManifestsRequirer(
+            self,
+            RELATION_NAME,
+            lambda: [KubernetesManifest(json.dumps(POD_DEFAULT))],
+            refresh_event=self.on.config_changed,
+            coalesce=True,
+        )
+
+
+@pytest.fixture
+def requirer_harness() -> Harness:
+    harness = Harness(RequirerCharm, meta=REQUIRER_METADATA)
+    harness.set_leader(True)
+    harness.begin()
+    return harness
+
+
+@pytest.fixture
+def harness() -> Harness:
+    harness = Harness(ProviderCharm, meta=PROVIDER_METADATA)
+    harness.begin()
+    return harness
+
+
+def add_requirer(harness, app_name, manifests) -> int:
+    """Relates a requirer app sending manifests to the provider, returning the relation id."""
+    relation_id = harness.add_relation(RELATION_NAME, app_name)
+    harness.update_relation_data(
+        relation_id, app_name, {KUBERNETES_MANIFESTS_FIELD: json.dumps(manifests)}
+    )
+    return relation_id
+
+
+def test_get_manifests_deduplicates_identical_manifests(harness):
+    add_requirer(harness, "requirer1", [POD_DEFAULT])
+    add_requirer(harness, "requirer2", [POD_DEFAULT])
+
+    assert harness.charm.manifests_provider.get_manifests() == [POD_DEFAULT]
+    assert harness.charm.manifests_provider.get_conflicts() == []
+
+
+def test_get_manifests_index_reports_conflicts(harness):
+    conflicting_pod_default = {**POD_DEFAULT, "spec": {"desc": "other"}}
+    add_requirer(harness, "requirer1", [POD_DEFAULT])
+    add_requirer(harness, "requirer2", [conflicting_pod_default])
+
+    index = harness.charm.manifests_provider.get_manifests_index()
+
+    identity = ManifestIdentity("kubeflow.org/v1alpha1", "PodDefault", "", "allow-ngc-notebook")
+    assert index == {identity: POD_DEFAULT}
+    assert harness.charm.manifests_provider.get_conflicts() == [
+        ManifestConflict(identity=identity, apps=("requirer1", "requirer2"))
+    ]
+
+
+def test_unchanged_relation_data_is_not_decoded_again(harness):
+    relation_id = add_requirer(harness, "requirer1", [POD_DEFAULT])
+    add_requirer(harness, "requirer2", [])
+    provider = harness.charm.manifests_provider
+    provider.get_manifests()
+    updated_pod_default = {**POD_DEFAULT, "spec": {"desc": "updated"}}
+
+    with patch(
+        "lib.charms.resource_dispatcher.v0.kubernetes_manifests.decode_manifests",
+        wraps=decode_manifests,
+    ) as wrapped_decode:
+        harness.update_relation_data(
+            relation_id,
+            "requirer1",
+            {KUBERNETES_MANIFESTS_FIELD: json.dumps([updated_pod_default])},
+        )
+        manifests = provider.get_manifests()
+
+    # Only the data of the relation that changed is decoded, and only once for both the updated
+    # event and get_manifests
+    assert wrapped_decode.call_count == 1
+    assert manifests == [updated_pod_default]
+
+
+@pytest.mark.parametrize("encoding", [JSON_ENCODING, GZIP_ENCODING])
+def test_encoded_manifests_are_decoded(encoding):
+    manifests = [POD_DEFAULT] * 10
+
+    encoded_manifests = encode_manifests(manifests, encoding)
+
+    assert encoded_manifests.startswith(GZIP_ENCODING_MARKER) == (encoding == GZIP_ENCODING)
+    assert decode_manifests(encoded_manifests) == manifests
+
+
+def test_get_manifests_decodes_compressed_and_plain_data(harness):
+    add_requirer(harness, "plain", [POD_DEFAULT])
+    other_pod_default = {**POD_DEFAULT, "metadata": {"name": "other"}}
+    relation_id = harness.add_relation(RELATION_NAME, "compressed")
+    harness.update_relation_data(
+        relation_id,
+        "compressed",
+        {KUBERNETES_MANIFESTS_FIELD: encode_manifests([other_pod_default], GZIP_ENCODING)},
+    )
+
+    assert harness.charm.manifests_provider.get_manifests() == [POD_DEFAULT, other_pod_default]
+
+
+def test_per_manifest_protocol_sends_only_changed_manifests(requirer_harness):
+    relation_id = requirer_harness.add_relation(
+        RELATION_NAME,
+        "provider",
+        app_data={
+            KUBERNETES_MANIFESTS_PROTOCOLS_FIELD: json.dumps(
+                [SINGLE_KEY_PROTOCOL, PER_MANIFEST_PROTOCOL]
+            )
+        },
+    )
+    other_pod_default = {**POD_DEFAULT, "metadata": {"name": "other"}}
+    updated_pod_default = {**POD_DEFAULT, "spec": {"desc": "updated"}}
+    pod_default_key = ManifestIdentity.from_manifest(POD_DEFAULT).key
+    other_key = ManifestIdentity.from_manifest(other_pod_default).key
+    requirer_wrapper = requirer_harness.charm.requirer_wrapper
+
+    requirer_wrapper.send_data(
+        [KubernetesManifest(json.dumps(m)) for m in (POD_DEFAULT, other_pod_default)]
+    )
+    relation_data = requirer_harness.get_relation_data(relation_id, "requirer")
+    assert KUBERNETES_MANIFESTS_FIELD not in relation_data
+    assert relation_data[KUBERNETES_MANIFESTS_REVISION_FIELD] == "1"
+    assert json.loads(relation_data[KUBERNETES_MANIFEST_KEY_PREFIX + other_key]) == {
+        "hash": get_manifest_digest(other_pod_default),
+        "manifest": other_pod_default,
+    }
+
+    requirer_wrapper.send_data([KubernetesManifest(json.dumps(updated_pod_default))])
+    relation_data = requirer_harness.get_relation_data(relation_id, "requirer")
+    assert relation_data[KUBERNETES_MANIFESTS_REVISION_FIELD] == "2"
+    assert json.loads(relation_data[KUBERNETES_MANIFESTS_INDEX_FIELD]) == {
+        pod_default_key: get_manifest_digest(updated_pod_default)
+    }
+    assert KUBERNETES_MANIFEST_KEY_PREFIX + other_key not in relation_data
+    assert json.loads(relation_data[KUBERNETES_MANIFEST_KEY_PREFIX + pod_default_key]) == {
+        "hash": get_manifest_digest(updated_pod_default),
+        "manifest": updated_pod_default,
+    }
+
+
+def test_single_key_protocol_is_used_with_older_providers(requirer_harness):
+    relation_id = requirer_harness.add_relation(RELATION_NAME, "provider")
+
+    requirer_harness.charm.requirer_wrapper.send_data(
+        [KubernetesManifest(json.dumps(POD_DEFAULT))]
+    )
+
+    relation_data = requirer_harness.get_relation_data(relation_id, "requirer")
+    assert json.loads(relation_data[KUBERNETES_MANIFESTS_FIELD]) == [POD_DEFAULT]
+    assert KUBERNETES_MANIFESTS_INDEX_FIELD not in relation_data
+
+
+def test_manifests_are_serialized_once_for_all_relations(requirer_harness):
+    relation_ids = [requirer_harness.add_relation(RELATION_NAME, f"provider{i}") for i in range(3)]
+    manifests_items = [KubernetesManifest(json.dumps(POD_DEFAULT))]
+    requirer_wrapper = requirer_harness.charm.requirer_wrapper
+    requirer_harness.update_relation_data(
+        relation_ids[0], "requirer", {KUBERNETES_MANIFESTS_FIELD: json.dumps([POD_DEFAULT])}
+    )
+
+    with patch(
+        "lib.charms.resource_dispatcher.v0.kubernetes_manifests.dump_canonical_json",
+        wraps=dump_canonical_json,
+    ) as wrapped_dump:
+        requirer_wrapper.send_data(manifests_items)
+
+    # The items were serialized when created, so only the data of the first relation is
+    assert wrapped_dump.call_count == 1
+    # The relation already holding the same manifests, in another formatting, is skipped
+    assert requirer_wrapper.writes_performed == 2
+    assert requirer_wrapper.writes_skipped == 1
+    for relation_id in relation_ids[1:]:
+        relation_data = requirer_harness.get_relation_data(relation_id, "requirer")
+        assert relation_data[KUBERNETES_MANIFESTS_FIELD] == dump_canonical_json([POD_DEFAULT])
+
+
+def test_kubernetes_manifest_only_keeps_its_canonical_json():
+    content = "kind: PodDefault\napiVersion: kubeflow.org/v1alpha1\n"
+    item = KubernetesManifest(content)
+
+    assert item.manifest == {"apiVersion": "kubeflow.org/v1alpha1", "kind": "PodDefault"}
+    assert item.manifest_content == dump_canonical_json(item.manifest)
+    assert KubernetesManifest(manifest=POD_DEFAULT).manifest_content == dump_canonical_json(
+        POD_DEFAULT
+    )
+
+
+def test_kubernetes_manifest_caches_what_is_derived_from_its_manifest():
+    item = KubernetesManifest(manifest=POD_DEFAULT)
+
+    assert item.digest == get_manifest_digest(POD_DEFAULT)
+    assert item.canonical_bytes == dump_canonical_json(POD_DEFAULT).encode()
+    assert item.identity == ManifestIdentity(
+        "kubeflow.org/v1alpha1", "PodDefault", "", "allow-ngc-notebook"
+    )
+
+
+def test_kubernetes_manifest_is_immutable():
+    pod_default = copy.deepcopy(POD_DEFAULT)
+    item = KubernetesManifest(manifest=pod_default)
+
+    with pytest.raises(AttributeError):
+        item.manifest = {**POD_DEFAULT, "metadata": {"name": "other"}}
+    # Modifying the manifest given, or the one returned, in place does not change the item
+    pod_default["metadata"]["name"] = "other"
+    item.manifest["metadata"]["name"] = "other"
+
+    assert item.manifest == POD_DEFAULT
+    assert item.digest == get_manifest_digest(POD_DEFAULT)
+    assert item.identity.name == "allow-ngc-notebook"
+
+
+def test_kubernetes_manifests_are_compared_and_hashed_by_digest():
+    item = KubernetesManifest(manifest=POD_DEFAULT)
+    targeted_item = KubernetesManifest(
+        manifest=POD_DEFAULT, targets=ManifestTargets(namespaces=("alice",))
+    )
+    other_item = KubernetesManifest(manifest={**POD_DEFAULT, "spec": {"desc": "other"}})
+
+    assert item == targeted_item == KubernetesManifest(json.dumps(POD_DEFAULT, indent=2))
+    assert item != other_item
+    assert hash(item) == hash(targeted_item)
+    assert len({item, targeted_item, other_item}) == 2
+
+
+def test_kubernetes_manifest_can_be_pickled():
+    item = KubernetesManifest(manifest=POD_DEFAULT, targets=ManifestTargets(namespaces=("alice",)))
+
+    unpickled_item = pickle.loads(pickle.dumps(item))
+
+    assert unpickled_item == item
+    assert unpickled_item.manifest == POD_DEFAULT
+    assert unpickled_item.targets == item.targets
+
+
+def test_kubernetes_manifest_needs_content_or_manifest():
+    with pytest.raises(TypeError):
+        KubernetesManifest()
+
+
+def test_only_new_manifests_items_are_serialized(requirer_harness):
+    requirer_harness.add_relation(
+        RELATION_NAME,
+        "provider",
+        app_data={KUBERNETES_MANIFESTS_PROTOCOLS_FIELD: json.dumps([PER_MANIFEST_PROTOCOL])},
+    )
+    other_pod_default = {**POD_DEFAULT, "metadata": {"name": "other"}}
+    manifests_items = [KubernetesManifest(manifest=m) for m in (POD_DEFAULT, other_pod_default)]
+    requirer_wrapper = requirer_harness.charm.requirer_wrapper
+    requirer_wrapper.send_data(manifests_items)
+
+    new_pod_default = {**POD_DEFAULT, "metadata": {"name": "new"}}
+    with patch(
+        "lib.charms.resource_dispatcher.v0.kubernetes_manifests.dump_canonical_json",
+        wraps=dump_canonical_json,
+    ) as wrapped_dump:
+        requirer_wrapper.send_data(
+            manifests_items[::-1] + [KubernetesManifest(manifest=new_pod_default)]
+        )
+
+    # The items already sent reuse their cached serialization, only the new one and the index
+    # are serialized
+    serialized = [call.args[0] for call in wrapped_dump.call_args_list]
+    assert serialized[0] == new_pod_default
+    assert len(serialized) == 2
+    assert requirer_wrapper.writes_performed == 2
+
+
+@pytest.mark.parametrize(
+    "data, expected",
+    [
+        ({"b": 1, "a": [True, None]}, '{"a":[true,null],"b":1}'),
+        ({"name": "ngc-ü"}, '{"name":"ngc-ü"}'),
+        ({"cpu": 0.5, "big": 1e16, "small": 1e-07}, '{"big":1e+16,"cpu":0.5,"small":1e-07}'),
+        ({"id": 2**70}, '{"id":1180591620717411303424}'),
+    ],
+)
+def test_canonical_json(data, expected):
+    assert dump_canonical_json(data) == expected
+
+
+def test_provider_advertises_protocols(harness):
+    harness.set_leader(True)
+
+    relation_id = harness.add_relation(RELATION_NAME, "requirer")
+
+    assert json.loads(
+        harness.get_relation_data(relation_id, "provider")[KUBERNETES_MANIFESTS_PROTOCOLS_FIELD]
+    ) == [SINGLE_KEY_PROTOCOL, PER_MANIFEST_PROTOCOL]
+
+
+def test_get_manifests_delta(harness):
+    other_pod_default = {**POD_DEFAULT, "metadata": {"name": "other"}}
+    updated_pod_default = {**POD_DEFAULT, "spec": {"desc": "updated"}}
+    pod_default_key = ManifestIdentity.from_manifest(POD_DEFAULT).key
+    other_key = ManifestIdentity.from_manifest(other_pod_default).key
+    relation_id = harness.add_relation(RELATION_NAME, "requirer")
+    manifests_data = {
+        KUBERNETES_MANIFESTS_INDEX_FIELD: json.dumps(
+            {pod_default_key: get_manifest_digest(POD_DEFAULT)}
+        ),
+        KUBERNETES_MANIFEST_KEY_PREFIX
+        + pod_default_key: json.dumps(
+            {"hash": get_manifest_digest(POD_DEFAULT), "manifest": POD_DEFAULT}
+        ),
+        KUBERNETES_MANIFESTS_REVISION_FIELD: "1",
+    }
+    harness.update_relation_data(relation_id, "requirer", manifests_data)
+    known_hashes = {
+        pod_default_key: get_manifest_digest(POD_DEFAULT),
+        other_key: get_manifest_digest(other_pod_default),
+    }
+
+    delta = harness.charm.manifests_provider.get_manifests_delta(known_hashes)
+    assert delta.changed == {}
+    assert delta.deleted == [other_key]
+
+    harness.update_relation_data(
+        relation_id,
+        "requirer",
+        {
+            KUBERNETES_MANIFESTS_INDEX_FIELD: json.dumps(
+                {pod_default_key: get_manifest_digest(updated_pod_default)}
+            ),
+            KUBERNETES_MANIFEST_KEY_PREFIX
+            + pod_default_key: json.dumps(
+                {"hash": get_manifest_digest(updated_pod_default), "manifest": updated_pod_default}
+            ),
+            KUBERNETES_MANIFESTS_REVISION_FIELD: "2",
+        },
+    )
+    delta = harness.charm.manifests_provider.get_manifests_delta(delta.hashes)
+    assert delta.changed == {pod_default_key: updated_pod_default}
+    assert delta.deleted == []
+
+
+def test_identical_sends_in_one_dispatch_are_skipped(requirer_harness):
+    relation_id = requirer_harness.add_relation(RELATION_NAME, "provider")
+    requirer_wrapper = requirer_harness.charm.requirer_wrapper
+    manifests_items = [KubernetesManifest(json.dumps(POD_DEFAULT))]
+    requirer_wrapper.send_data(manifests_items)
+
+    with patch(
+        "lib.charms.resource_dispatcher.v0.kubernetes_manifests.get_provider_protocols",
+        wraps=get_provider_protocols,
+    ) as wrapped_get_protocols:
+        requirer_wrapper.send_data(manifests_items)
+
+    # The relation data is not compared again
+    assert wrapped_get_protocols.call_count == 1
+    assert (requirer_wrapper.writes_performed, requirer_wrapper.writes_skipped) == (1, 1)
+
+    # After the commit, in a new dispatch, the relation data is compared again
+    requirer_harness.framework.commit()
+    requirer_harness.update_relation_data(
+        relation_id, "requirer", {KUBERNETES_MANIFESTS_FIELD: "[]"}
+    )
+    requirer_wrapper.send_data(manifests_items)
+    assert requirer_wrapper.writes_performed == 2
+
+
+def test_coalesced_sends_are_flushed_once_on_commit():
+    harness = Harness(CoalescingRequirerCharm, meta=REQUIRER_METADATA)
+    harness.set_leader(True)
+    harness.begin()
+    relation_id = harness.add_relation(RELATION_NAME, "provider")
+    requirer_wrapper = harness.charm.manifests_requirer._requirer_wrapper
+
+    harness.charm.on.config_changed.emit()
+    harness.charm.on.leader_elected.emit()
+
+    # Nothing is sent before the commit
+    assert KUBERNETES_MANIFESTS_FIELD not in harness.get_relation_data(relation_id, "requirer")
+
+    harness.framework.commit()
+
+    assert json.loads(
+        harness.get_relation_data(relation_id, "requirer")[KUBERNETES_MANIFESTS_FIELD]
+    ) == [POD_DEFAULT]
+    assert (requirer_wrapper.writes_performed, requirer_wrapper.writes_skipped) == (1, 0)
+
+
+class UpdatedEventsCollector(CharmBase):
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.manifests_provider = KubernetesManifestsProvider(
+            self, RELATION_NAME, refresh_event=self.on.update_status
+        )
+        self.updated_events = []
+        self.framework.observe(self.manifests_provider.on.updated, self._on_updated)
+
+    def _on_updated(self, event):
+        self.updated_events.append((event.added, event.modified, event.removed))
+
+
+def test_updated_is_only_emitted_when_manifests_change():
+    harness = Harness(UpdatedEventsCollector, meta=PROVIDER_METADATA)
+    harness.begin()
+    other_pod_default = {**POD_DEFAULT, "metadata": {"name": "other"}}
+    modified_pod_default = {**POD_DEFAULT, "spec": {"desc": "modified"}}
+    pod_default_key = ManifestIdentity.from_manifest(POD_DEFAULT).key
+    other_pod_default_key = ManifestIdentity.from_manifest(other_pod_default).key
+    relation_id = add_requirer(harness, "requirer", [POD_DEFAULT, other_pod_default])
+
+    # An unrelated key and the same manifests in another formatting
+    harness.update_relation_data(relation_id, "requirer", {"unrelated": "value"})
+    harness.update_relation_data(
+        relation_id,
+        "requirer",
+        {KUBERNETES_MANIFESTS_FIELD: json.dumps([POD_DEFAULT, other_pod_default], indent=2)},
+    )
+    harness.update_relation_data(
+        relation_id, "requirer", {KUBERNETES_MANIFESTS_FIELD: json.dumps([modified_pod_default])}
+    )
+    harness.remove_relation(relation_id)
+
+    assert harness.charm.updated_events == [
+        ({pod_default_key: POD_DEFAULT, other_pod_default_key: other_pod_default}, {}, []),
+        ({}, {pod_default_key: modified_pod_default}, [other_pod_default_key]),
+        ({}, {}, [pod_default_key]),
+    ]
+
+
+def test_updated_is_emitted_once_on_refresh():
+    harness = Harness(UpdatedEventsCollector, meta=PROVIDER_METADATA)
+    harness.begin()
+    for app_name in ("first", "second", "third"):
+        add_requirer(harness, app_name, [POD_DEFAULT])
+    harness.charm.updated_events.clear()
+
+    harness.charm.on.update_status.emit()
+
+    assert harness.charm.updated_events == [({}, {}, [])]
+
+
+def test_updated_event_changes_survive_deferral(harness):
+    relation = harness.model.get_relation(RELATION_NAME, add_requirer(harness, "requirer", []))
+    event = harness.charm.manifests_provider.on.updated.event_type(
+        None, relation, added={"key": POD_DEFAULT}, removed=["other"]
+    )
+
+    restored_event = harness.charm.manifests_provider.on.updated.event_type(None, None)
+    restored_event.framework = harness.framework
+    restored_event.restore(event.snapshot())
+
+    assert (restored_event.added, restored_event.modified, restored_event.removed) == (
+        {"key": POD_DEFAULT},
+        {},
+        ["other"],
+    )
+
+
+def test_manifest_targets_are_normalised():
+    """Test that equal targets are equal whatever their order, and that targets are required."""
+    targets = ManifestTargets(namespaces=("bob", "alice", "bob"), namespace_selector={"b": "2"})
+
+    assert targets == ManifestTargets(namespaces=("alice", "bob"), namespace_selector=[("b", "2")])
+    assert targets.namespaces == ("alice", "bob")
+    with pytest.raises(ValueError):
+        ManifestTargets()
+
+
+@pytest.mark.parametrize(
+    "namespace, labels, expected",
+    [
+        ("alice", None, True),
+        ("carol", {"ngc": "true", "team": "ml"}, True),
+        ("carol", {"ngc": "false"}, False),
+        ("carol", None, False),
+    ],
+)
+def test_manifest_targets_matches(namespace, labels, expected):
+    targets = ManifestTargets(namespaces=("alice",), namespace_selector={"ngc": "true"})
+
+    assert targets.matches(namespace, labels) is expected
+
+
+def test_targets_index_selects_the_manifests_of_a_namespace():
+    """Test that the index selects untargeted manifests and the targeted ones of a namespace."""
+    targets_by_key = {
+        "everywhere": None,
+        "alice-only": ManifestTargets(namespaces=("alice",)),
+        "ngc": ManifestTargets(namespaces=("bob",), namespace_selector={"ngc": "true"}),
+    }
+    index = ManifestsTargetsIndex.from_data(
+        ManifestsTargetsIndex.from_targets(targets_by_key).data
+    )
+
+    assert index.targets_by_key == {
+        key: targets for key, targets in targets_by_key.items() if targets is not None
+    }
+    assert index.select(targets_by_key, "alice") == ["everywhere", "alice-only"]
+    assert index.select(targets_by_key, "bob") == ["everywhere", "ngc"]
+    assert index.select(targets_by_key, "carol", {"ngc": "true"}) == ["everywhere", "ngc"]
+    assert index.select(targets_by_key, "carol") == ["everywhere"]
+    assert ManifestsTargetsIndex.from_targets({"everywhere": None}).data == ""
+
+
+@pytest.mark.parametrize("protocols", [[SINGLE_KEY_PROTOCOL], SUPPORTED_PROTOCOLS])
+def test_targets_are_sent_and_used_by_the_provider(requirer_harness, harness, protocols):
+    """Test that targets are sent with both protocols, and used to select manifests."""
+    relation_id = requirer_harness.add_relation(
+        RELATION_NAME,
+        "provider",
+        app_data={KUBERNETES_MANIFESTS_PROTOCOLS_FIELD: json.dumps(protocols)},
+    )
+    other_pod_default = {**POD_DEFAULT, "metadata": {"name": "other"}}
+    targets = ManifestTargets(namespaces=("alice",))
+    requirer_wrapper = requirer_harness.charm.requirer_wrapper
+
+    requirer_wrapper.send_data(
+        [
+            KubernetesManifest(manifest=POD_DEFAULT, targets=targets),
+            KubernetesManifest(manifest=other_pod_default),
+        ]
+    )
+    relation_data = requirer_harness.get_relation_data(relation_id, "requirer")
+    assert json.loads(relation_data[KUBERNETES_MANIFESTS_TARGETS_FIELD]) == {
+        "namespaces": {"alice": [ManifestIdentity.from_manifest(POD_DEFAULT).key]},
+        "selectors": [],
+    }
+
+    provider_relation_id = harness.add_relation(RELATION_NAME, "requirer")
+    harness.update_relation_data(provider_relation_id, "requirer", dict(relation_data))
+    provider = harness.charm.manifests_provider
+    assert provider.get_manifests_for_namespace("alice") == [POD_DEFAULT, other_pod_default]
+    assert provider.get_manifests_for_namespace("bob") == [other_pod_default]
+
+    # Targets are removed when no manifest has targets anymore
+    requirer_wrapper.send_data(
+        [KubernetesManifest(manifest=m) for m in (POD_DEFAULT, other_pod_default)]
+    )
+    relation_data = requirer_harness.get_relation_data(relation_id, "requirer")
+    assert KUBERNETES_MANIFESTS_TARGETS_FIELD not in relation_data
+
+
+def test_targets_changes_are_reported_as_modified():
+    """Test that updated is emitted when only the targets of a manifest change."""
+    harness = Harness(UpdatedEventsCollector, meta=PROVIDER_METADATA)
+    harness.begin()
+    pod_default_key = ManifestIdentity.from_manifest(POD_DEFAULT).key
+    relation_id = add_requirer(harness, "requirer", [POD_DEFAULT])
+
+    for namespace in ("alice", "bob"):
+        targets_index = ManifestsTargetsIndex.from_targets(
+            {pod_default_key: ManifestTargets(namespaces=(namespace,))}
+        )
+        harness.update_relation_data(
+            relation_id, "requirer", {KUBERNETES_MANIFESTS_TARGETS_FIELD: targets_index.data}
+        )
+
+    assert harness.charm.updated_events == [
+        ({pod_default_key: POD_DEFAULT}, {}, []),
+        ({}, {pod_default_key: POD_DEFAULT}, []),
+        ({}, {pod_default_key: POD_DEFAULT}, []),
+    ]
+    delta = harness.charm.manifests_provider.get_manifests_delta(
+        {pod_default_key: get_manifest_digest(POD_DEFAULT)}
+    )
+    assert delta.changed == {pod_default_key: POD_DEFAULT}
@@ -0,0 +1,64 @@
+# Copyright 2026 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parents[2]
+
+# Dispatches a hook in a fresh interpreter, as Juju does, and reports what was imported
+DISPATCH_SCRIPT = """
+import json, sys
+
+import charm
+from ops.testing import Harness
+
+harness = Harness(charm.NgcIntegratorCharm)
+harness.set_leader(True)
+harness.add_relation(charm.PODDEFAULTS_RELATION, "resource-dispatcher")
+harness.begin_with_initial_hooks()
+heavy_modules = sorted({"kubernetes", "lightkube"} & set(sys.modules))
+status = harness.model.unit.status.name
+
+import charmed_kubeflow_chisme.components as components
+import charmed_kubeflow_chisme.components.component_graph as component_graph
+import charmed_kubeflow_chisme.components.leadership_gate_component as leadership_gate
+
+print(json.dumps({
+    "heavy_modules": heavy_modules,
+    "status": status,
+    "same_classes": (
+        components.LeadershipGateComponent is leadership_gate.LeadershipGateComponent
+        and components.ComponentGraph is component_graph.ComponentGraph
+    ),
+}))
+"""
+
+
+def test_charm_dispatch_does_not_run_deferred_package_inits():
+    """Test that a dispatch works without the `__init__` of the deferred chisme packages.
+
+    This fails if a chisme upgrade makes its submodules rely on the side effects of their
+    package's `__init__`, or makes the `__init__` export other objects than its submodules.
+    """
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join([str(ROOT), str(ROOT / "lib"), str(ROOT / "src")]),
+    }
+    output = subprocess.run(
+        [sys.executable, "-c", DISPATCH_SCRIPT],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+
+    assert json.loads(output.splitlines()[-1]) == {
+        "heavy_modules": [],
+        "status": "active",
+        "same_classes": True,
+    }
@@ -0,0 +1,93 @@
+# Copyright 2026 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+import json
+
+import pytest
+from ops.model import ActiveStatus, BlockedStatus
+
+from charm import PODDEFAULTS_RELATION
+from lib.charms.resource_dispatcher.v0.kubernetes_manifests import (
+    KUBERNETES_MANIFESTS_TARGETS_FIELD,
+)
+from manifest_targets import get_targets_from_charm_config
+from poddefault_generator import InvalidConfigError
+
+
+@pytest.mark.parametrize(
+    "config, namespaces, namespace_selector",
+    [
+        ({"target-profiles": "alice, bob\ncarol"}, ("alice", "bob", "carol"), ()),
+        (
+            {"target-namespace-selector": "ngc.nvidia.com/enabled=true, team = ml"},
+            (),
+            (("ngc.nvidia.com/enabled", "true"), ("team", "ml")),
+        ),
+        (
+            {"target-profiles": "alice", "target-namespace-selector": "ngc="},
+            ("alice",),
+            (("ngc", ""),),
+        ),
+    ],
+)
+def test_targets_from_charm_config(config, namespaces, namespace_selector):
+    """Test that the target profiles and namespace selector are parsed."""
+    targets = get_targets_from_charm_config(config)
+
+    assert targets.namespaces == namespaces
+    assert targets.namespace_selector == namespace_selector
+
+
+def test_no_targets():
+    """Test that the manifests have no targets when neither option is set."""
+    assert get_targets_from_charm_config({"target-profiles": " ,"}) is None
+
+
+@pytest.mark.parametrize(
+    "config",
+    [
+        {"target-profiles": "Alice"},
+        {"target-profiles": "a" * 64},
+        {"target-namespace-selector": "ngc"},
+        {"target-namespace-selector": "ngc=not valid"},
+        {"target-namespace-selector": "-ngc=true"},
+    ],
+)
+def test_invalid_targets(config):
+    """Test that invalid profile names and labels are rejected."""
+    with pytest.raises(InvalidConfigError):
+        get_targets_from_charm_config(config)
+
+
+def test_charm_sends_targets(leader_harness):
+    """Test that the charm sends the targets of its config with the PodDefault."""
+    leader_harness.begin_with_initial_hooks()
+    relation_id = leader_harness.add_relation(PODDEFAULTS_RELATION, "dispatcher")
+    leader_harness.framework.commit()
+    relation_data = leader_harness.get_relation_data(relation_id, leader_harness.model.app)
+    assert KUBERNETES_MANIFESTS_TARGETS_FIELD not in relation_data
+
+    leader_harness.update_config({"target-profiles": "alice,bob"})
+    leader_harness.framework.commit()
+
+    relation_data = leader_harness.get_relation_data(relation_id, leader_harness.model.app)
+    assert json.loads(relation_data[KUBERNETES_MANIFESTS_TARGETS_FIELD])["namespaces"] == {
+        "alice": ["kubeflow.org/v1alpha1/PodDefault//allow-ngc-notebook"],
+        "bob": ["kubeflow.org/v1alpha1/PodDefault//allow-ngc-notebook"],
+    }
+    assert isinstance(leader_harness.charm.model.unit.status, ActiveStatus)
+
+
+def test_charm_blocked_on_invalid_targets(leader_harness):
+    """Test that the charm is Blocked, and sends nothing, when the targets are invalid."""
+    leader_harness.begin_with_initial_hooks()
+    relation_id = leader_harness.add_relation(PODDEFAULTS_RELATION, "dispatcher")
+    leader_harness.framework.commit()
+    relation_data = dict(leader_harness.get_relation_data(relation_id, leader_harness.model.app))
+
+    leader_harness.update_config({"target-namespace-selector": "ngc"})
+    leader_harness.framework.commit()
+
+    assert leader_harness.get_relation_data(relation_id, leader_harness.model.app) == relation_data
+    assert isinstance(leader_harness.charm.model.unit.status, BlockedStatus)
+    assert "target-namespace-selector" in leader_harness.charm.model.unit.status.message
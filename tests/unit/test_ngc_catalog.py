@@ -0,0 +1,255 @@
+# Copyright 2026 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+import json
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+import yaml
+from ops.model import ActiveStatus, BlockedStatus
+from ops.testing import Harness
+
+from charm import PODDEFAULT_FILE, PODDEFAULTS_RELATION
+from gpu_variants import GpuVariant, render_gpu_variant_poddefault
+from lib.charms.resource_dispatcher.v0.kubernetes_manifests import KUBERNETES_MANIFESTS_FIELD
+from manifests_compiler import get_digest
+from ngc_catalog import (
+    NGC_CATALOG_RESOURCE,
+    CatalogEntry,
+    InvalidCatalogError,
+    get_catalog_cache,
+    parse_catalog,
+    render_catalog,
+    render_catalog_poddefault,
+)
+from poddefault_generator import SELECTOR_LABEL_PREFIX
+
+TEMPLATE = yaml.safe_load(Path(PODDEFAULT_FILE).read_text())
+PYTORCH_RECORD = {
+    "name": "pytorch-24-05",
+    "image": "nvcr.io/nvidia/pytorch:24.05-py3",
+    "framework": "PyTorch",
+    "version": "24.05",
+}
+
+
+def generate_records(count: int, revision: int = 0) -> list:
+    return [
+        {
+            "name": f"image-{i}",
+            "image": f"nvcr.io/nvidia/image-{i}:{revision}",
+            "framework": "TensorFlow",
+            "version": str(revision),
+        }
+        for i in range(count)
+    ]
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        yaml.safe_dump({"images": [PYTORCH_RECORD]}),
+        json.dumps({"images": [PYTORCH_RECORD]}),
+    ],
+)
+def test_parse_catalog(content):
+    """Test that YAML and JSON catalogs are parsed."""
+    assert parse_catalog(content) == [PYTORCH_RECORD]
+
+
+@pytest.mark.parametrize("content", ["", "images: []\n", "{}"])
+def test_parse_empty_catalog(content):
+    """Test that empty catalogs have no entries."""
+    assert parse_catalog(content) == []
+
+
+@pytest.mark.parametrize("content", ["images: [", "{images", "- a\n- b\n", "images: a\n"])
+def test_parse_invalid_catalog(content):
+    """Test that catalogs that are not a mapping with a list of images are rejected."""
+    with pytest.raises(InvalidCatalogError):
+        parse_catalog(content)
+
+
+@pytest.mark.parametrize(
+    "record",
+    [
+        "pytorch",
+        {"image": "nvcr.io/nvidia/pytorch:24.05-py3"},
+        {**PYTORCH_RECORD, "name": "PyTorch"},
+        {**PYTORCH_RECORD, "name": "a" * 53},
+        {**PYTORCH_RECORD, "image": ""},
+        {**PYTORCH_RECORD, "args": "jupyter lab"},
+        {**PYTORCH_RECORD, "command": [1]},
+        {**PYTORCH_RECORD, "entrypoint": "/bin/sh"},
+        {**PYTORCH_RECORD, "name": "gpu-a100"},
+    ],
+)
+def test_invalid_catalog_entry(record):
+    """Test that invalid catalog records are rejected."""
+    with pytest.raises(InvalidCatalogError):
+        CatalogEntry.from_record(record)
+
+
+def test_render_catalog_poddefault():
+    """Test that the PodDefault of an entry is derived from the template."""
+    entry = CatalogEntry.from_record({**PYTORCH_RECORD, "args": ["jupyter", "lab"]})
+
+    poddefault = render_catalog_poddefault(TEMPLATE, entry)
+
+    assert poddefault["metadata"] == {
+        "name": "ngc-pytorch-24-05",
+        "annotations": {
+            "ngc.nvidia.com/image": "nvcr.io/nvidia/pytorch:24.05-py3",
+            "ngc.nvidia.com/framework": "PyTorch",
+            "ngc.nvidia.com/version": "24.05",
+        },
+    }
+    assert poddefault["spec"]["selector"] == {"matchLabels": {"enable-ngc-pytorch-24-05": "true"}}
+    assert poddefault["spec"]["desc"] == "NVIDIA NGC PyTorch 24.05"
+    assert poddefault["spec"]["command"] == TEMPLATE["spec"]["command"]
+    assert poddefault["spec"]["args"] == ["jupyter", "lab"]
+    # The template is not modified
+    assert TEMPLATE == yaml.safe_load(Path(PODDEFAULT_FILE).read_text())
+
+
+def test_catalog_and_gpu_variant_labels_do_not_collide():
+    """Test that catalog entries and GPU variants of the same name have distinct labels."""
+    entry = CatalogEntry.from_record({**PYTORCH_RECORD, "name": "a100"})
+    variant = GpuVariant.from_record({"name": "a100"})
+
+    catalog_labels = render_catalog_poddefault(TEMPLATE, entry)["spec"]["selector"]["matchLabels"]
+    variant_labels = render_gpu_variant_poddefault(TEMPLATE, variant)["spec"]["selector"][
+        "matchLabels"
+    ]
+
+    assert set(catalog_labels).isdisjoint(variant_labels)
+    # The entry that would have the label of the variant is rejected
+    (variant_label,) = variant_labels
+    colliding_name = variant_label.removeprefix(SELECTOR_LABEL_PREFIX)
+    with pytest.raises(InvalidCatalogError, match="reserved for the GPU variants"):
+        CatalogEntry.from_record({**PYTORCH_RECORD, "name": colliding_name})
+
+
+def test_only_changed_entries_are_validated():
+    """Test that the added and changed entries are validated, all of them on template change."""
+    records = generate_records(1000)
+    poddefaults, index = render_catalog(TEMPLATE, records, {})
+    assert len(poddefaults) == 1000
+
+    records[10] = {**records[10], "version": "updated"}
+    records.append({"name": "new", "image": "nvcr.io/nvidia/new"})
+    del records[0]
+    with patch.object(CatalogEntry, "from_record", wraps=CatalogEntry.from_record) as from_record:
+        updated_poddefaults, index = render_catalog(TEMPLATE, records, index)
+
+    assert [call.args[0]["name"] for call in from_record.call_args_list] == ["image-10", "new"]
+    assert len(updated_poddefaults) == len(index["records"]) == 1000
+    assert updated_poddefaults[9]["spec"]["desc"] == "NVIDIA NGC TensorFlow updated"
+    assert updated_poddefaults[-1]["metadata"]["name"] == "ngc-new"
+    assert updated_poddefaults[:9] == poddefaults[1:10]
+
+    changed_template = {**TEMPLATE, "spec": {**TEMPLATE["spec"], "command": ["/bin/sh"]}}
+    with patch.object(CatalogEntry, "from_record", wraps=CatalogEntry.from_record) as from_record:
+        template_poddefaults, _ = render_catalog(changed_template, records, index)
+    assert from_record.call_count == 1000
+    assert template_poddefaults[0]["spec"]["command"] == ["/bin/sh"]
+
+
+def test_unchanged_entries_are_not_validated_again():
+    """Test that the records of unchanged entries are not validated again."""
+    records = generate_records(10)
+    _, index = render_catalog(TEMPLATE, records, {})
+
+    with patch.object(CatalogEntry, "from_record", wraps=CatalogEntry.from_record) as from_record:
+        poddefaults, _ = render_catalog(TEMPLATE, records, index)
+
+    from_record.assert_not_called()
+    assert poddefaults == render_catalog(TEMPLATE, records, {})[0]
+
+
+def test_cached_poddefaults_are_reused():
+    """Test that the PodDefaults of unchanged records are reused from the cache."""
+    records = generate_records(10)
+    poddefaults, index = render_catalog(TEMPLATE, records, {})
+    cache = get_catalog_cache(poddefaults, index)
+    assert all(isinstance(digest, str) for digest in index["records"].values())
+
+    records[2] = {**records[2], "version": "updated"}
+    with patch(
+        "ngc_catalog.render_catalog_poddefault", wraps=render_catalog_poddefault
+    ) as render_poddefault:
+        updated_poddefaults, _ = render_catalog(TEMPLATE, records, index, cache)
+
+    assert [call.args[1].name for call in render_poddefault.call_args_list] == ["image-2"]
+    assert updated_poddefaults == render_catalog(TEMPLATE, records, {})[0]
+
+    # The cache is not used once the template changed
+    changed_template = {**TEMPLATE, "spec": {**TEMPLATE["spec"], "command": ["/bin/sh"]}}
+    template_poddefaults, _ = render_catalog(changed_template, records, index, cache)
+    assert all(poddefault["spec"]["command"] == ["/bin/sh"] for poddefault in template_poddefaults)
+
+
+def test_duplicate_entry_names():
+    """Test that entries must have distinct names."""
+    with pytest.raises(InvalidCatalogError, match="several catalog entries"):
+        render_catalog(TEMPLATE, [PYTORCH_RECORD, PYTORCH_RECORD], {})
+
+
+def attach_catalog(harness: Harness, records: list):
+    """Attaches a catalog as Juju does, running upgrade-charm and config-changed after it."""
+    content = yaml.safe_dump({"images": records})
+    harness.add_resource(NGC_CATALOG_RESOURCE, content)
+    # The Harness only writes the resource file on the first fetch, Juju writes every revision
+    harness.model.resources.fetch(NGC_CATALOG_RESOURCE).write_text(content)
+    harness.charm.on.upgrade_charm.emit()
+    harness.charm.on.config_changed.emit()
+
+
+def get_sent_names(harness: Harness, relation_id: int) -> list:
+    """Returns the names of the manifests sent, committing the framework first to send them."""
+    harness.framework.commit()
+    relation_data = harness.get_relation_data(relation_id, harness.model.app)
+    return [
+        manifest["metadata"]["name"]
+        for manifest in json.loads(relation_data[KUBERNETES_MANIFESTS_FIELD])
+    ]
+
+
+def test_charm_sends_catalog_poddefaults(leader_harness):
+    """Test that the charm sends a PodDefault per catalog entry, validating changed ones."""
+    leader_harness.begin_with_initial_hooks()
+    relation_id = leader_harness.add_relation(PODDEFAULTS_RELATION, "dispatcher")
+    assert get_sent_names(leader_harness, relation_id) == ["allow-ngc-notebook"]
+
+    records = generate_records(20)
+    attach_catalog(leader_harness, records)
+    assert get_sent_names(leader_harness, relation_id) == [
+        "allow-ngc-notebook",
+        *(f"ngc-image-{i}" for i in range(20)),
+    ]
+    assert isinstance(leader_harness.charm.model.unit.status, ActiveStatus)
+
+    records[3] = {**records[3], "version": "updated"}
+    with patch.object(CatalogEntry, "from_record", wraps=CatalogEntry.from_record) as from_record:
+        with patch(
+            "ngc_catalog.render_catalog_poddefault", wraps=render_catalog_poddefault
+        ) as render_poddefault:
+            attach_catalog(leader_harness, records)
+    from_record.assert_called_once_with(records[3])
+    assert [call.args[1].name for call in render_poddefault.call_args_list] == ["image-3"]
+    # Only the digests of the records are kept in the unit state
+    index = json.loads(leader_harness.charm.ngc_catalog._stored.index)
+    assert index["records"]["image-3"] == get_digest(records[3])
+
+
+def test_charm_blocked_on_invalid_catalog(leader_harness):
+    """Test that the charm is Blocked, and sends nothing, when the catalog is invalid."""
+    leader_harness.begin_with_initial_hooks()
+    relation_id = leader_harness.add_relation(PODDEFAULTS_RELATION, "dispatcher")
+
+    attach_catalog(leader_harness, [PYTORCH_RECORD, {"name": "no-image"}])
+
+    assert get_sent_names(leader_harness, relation_id) == ["allow-ngc-notebook"]
+    assert isinstance(leader_harness.charm.model.unit.status, BlockedStatus)
+    assert "catalog entry no-image has no image" in leader_harness.charm.model.unit.status.message
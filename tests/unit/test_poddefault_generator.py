@@ -0,0 +1,136 @@
+# Copyright 2026 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+import copy
+
+import pytest
+
+from poddefault_generator import (
+    InvalidConfigError,
+    PodDefaultConfig,
+    parse_quantity,
+    render_poddefaults,
+)
+
+POD_DEFAULT = {
+    "apiVersion": "kubeflow.org/v1alpha1",
+    "kind": "PodDefault",
+    "metadata": {"name": "allow-ngc-notebook"},
+    "spec": {
+        "args": ["jupyter", "lab"],
+        "command": ["/opt/nvidia/nvidia_entrypoint.sh"],
+        "desc": "Enable NVIDIA NGC JupyterLab Notebook",
+        "selector": {"matchLabels": {"enable-ngc-jupyterlab": "true"}},
+    },
+}
+
+
+@pytest.mark.parametrize(
+    "config, expected_config",
+    [
+        ({}, PodDefaultConfig()),
+        (
+            {"poddefault-command": "/entrypoint.sh", "poddefault-args": "[a, '--b']"},
+            PodDefaultConfig(command=("/entrypoint.sh",), args=("a", "--b")),
+        ),
+        (
+            {"poddefault-command": "- /bin/sh\n- -c", "poddefault-selector-label": "a.io/ngc"},
+            PodDefaultConfig(command=("/bin/sh", "-c"), selector_label="a.io/ngc"),
+        ),
+    ],
+)
+def test_config_from_charm_config(config, expected_config):
+    assert PodDefaultConfig.from_charm_config(config) == expected_config
+
+
+@pytest.mark.parametrize(
+    "config",
+    [
+        {"poddefault-args": "not-a-list"},
+        {"poddefault-args": "[1, 2]"},
+        {"poddefault-args": "[unclosed"},
+        {"poddefault-selector-label": "not a label"},
+    ],
+)
+def test_invalid_config(config):
+    with pytest.raises(InvalidConfigError):
+        PodDefaultConfig.from_charm_config(config)
+
+
+def test_render_keeps_template_values_by_default():
+    template = copy.deepcopy(POD_DEFAULT)
+
+    assert render_poddefaults([template], PodDefaultConfig()) == [POD_DEFAULT]
+
+
+def test_render_does_not_modify_templates_or_other_manifests():
+    template = copy.deepcopy(POD_DEFAULT)
+    other_manifest = {"apiVersion": "v1", "kind": "ConfigMap", "metadata": {"name": "other"}}
+    config = PodDefaultConfig(command=("/entrypoint.sh",), description="NGC")
+
+    [poddefault, rendered_other_manifest] = render_poddefaults([template, other_manifest], config)
+
+    assert template == POD_DEFAULT
+    assert rendered_other_manifest == other_manifest
+    assert poddefault["spec"]["command"] == ["/entrypoint.sh"]
+    assert poddefault["spec"]["desc"] == "NGC"
+    assert poddefault["spec"]["args"] == POD_DEFAULT["spec"]["args"]
+
+
+@pytest.mark.parametrize(
+    "shm_size, size_bytes",
+    [
+        ("64Mi", 64 * 1024**2),
+        ("512M", 512 * 1000**2),
+        ("1.5Gi", 1.5 * 1024**3),
+        ("8Gi", 8 * 1024**3),
+        ("64Gi", 64 * 1024**3),
+        ("1Ti", 1024**4),
+        ("1073741824", 1024**3),
+    ],
+)
+def test_render_shm_volume(shm_size, size_bytes):
+    """Test that a memory-backed volume of shm-size is mounted at /dev/shm."""
+    config = PodDefaultConfig.from_charm_config({"shm-size": shm_size})
+
+    [poddefault] = render_poddefaults([copy.deepcopy(POD_DEFAULT)], config)
+
+    assert parse_quantity(shm_size) == size_bytes
+    assert poddefault["spec"]["volumes"] == [
+        {"name": "dshm", "emptyDir": {"medium": "Memory", "sizeLimit": shm_size}}
+    ]
+    assert poddefault["spec"]["volumeMounts"] == [{"name": "dshm", "mountPath": "/dev/shm"}]
+
+
+def test_render_shm_volume_sized_by_memory_limit():
+    """Test that the volume has no size limit with shm-size=auto."""
+    config = PodDefaultConfig.from_charm_config({"shm-size": "auto"})
+
+    [poddefault] = render_poddefaults([copy.deepcopy(POD_DEFAULT)], config)
+
+    assert poddefault["spec"]["volumes"] == [{"name": "dshm", "emptyDir": {"medium": "Memory"}}]
+
+
+def test_render_shm_volume_replaces_existing_shm():
+    """Test that volumes of the template are kept, and its /dev/shm mount replaced."""
+    template = copy.deepcopy(POD_DEFAULT)
+    template["spec"]["volumes"] = [{"name": "data", "emptyDir": {}}, {"name": "dshm"}]
+    template["spec"]["volumeMounts"] = [
+        {"name": "data", "mountPath": "/data"},
+        {"name": "shm", "mountPath": "/dev/shm"},
+    ]
+    config = PodDefaultConfig(shm_size="2Gi")
+
+    [poddefault] = render_poddefaults(render_poddefaults([template], config), config)
+
+    assert [volume["name"] for volume in poddefault["spec"]["volumes"]] == ["data", "dshm"]
+    assert poddefault["spec"]["volumeMounts"] == [
+        {"name": "data", "mountPath": "/data"},
+        {"name": "dshm", "mountPath": "/dev/shm"},
+    ]
+
+
+@pytest.mark.parametrize("shm_size", ["0", "0Gi", "8GB", "-1Gi", "8ki", "lots"])
+def test_invalid_shm_size(shm_size):
+    with pytest.raises(InvalidConfigError):
+        PodDefaultConfig.from_charm_config({"shm-size": shm_size})
@@ -0,0 +1,157 @@
+# Copyright 2026 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+import base64
+import gzip
+import importlib
+import json
+import os
+import pstats
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from ops.testing import Harness
+
+import profiling
+from charm import NgcIntegratorCharm
+
+ROOT = Path(__file__).parents[2]
+
+
+@pytest.fixture
+def profiles_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("JUJU_CHARM_DIR", str(tmp_path))
+    monkeypatch.delenv(profiling.PROFILE_ENV_VAR, raising=False)
+    return profiling.get_profiles_dir()
+
+
+@pytest.fixture(autouse=True)
+def no_atexit(monkeypatch):
+    """Do not save the profiles started by the tests when pytest exits."""
+    monkeypatch.setattr(profiling.atexit, "register", lambda *args: None)
+
+
+def profile_dispatch(profiles_dir, monkeypatch, hook="config-changed"):
+    """Runs start_if_armed as the charm does for hook, saving the profile if one was started."""
+    monkeypatch.setenv("JUJU_DISPATCH_PATH", f"hooks/{hook}")
+    profiler = profiling.start_if_armed()
+    if profiler is not None:
+        profiling.save_profile(profiler, profiles_dir, hook)
+    return profiler
+
+
+def test_not_armed(profiles_dir, monkeypatch):
+    """Test that dispatches are not profiled unless armed."""
+    assert profile_dispatch(profiles_dir, monkeypatch) is None
+    assert profiling.list_profiles(profiles_dir) == []
+
+
+def test_armed_for_dispatches(profiles_dir, monkeypatch):
+    """Test that exactly the next N hook dispatches are profiled."""
+    profiling.arm(profiles_dir, dispatches=2)
+
+    monkeypatch.setenv("JUJU_DISPATCH_PATH", "actions/profile")
+    assert profiling.start_if_armed() is None
+    profiled = [profile_dispatch(profiles_dir, monkeypatch) is not None for _ in range(3)]
+
+    assert profiled == [True, True, False]
+    assert len(profiling.list_profiles(profiles_dir)) == 2
+    assert not (profiles_dir / profiling.ARMED_FILE).exists()
+
+
+def test_armed_for_duration(profiles_dir):
+    """Test that dispatches are profiled until the deadline."""
+    profiling.arm(profiles_dir, duration=60, now=1000)
+
+    assert profiling.is_armed(profiles_dir, now=1059)
+    assert not profiling.is_armed(profiles_dir, now=1061)
+
+
+def test_environment_flag(profiles_dir, monkeypatch):
+    """Test that setting the environment flag profiles the dispatch."""
+    monkeypatch.setenv(profiling.PROFILE_ENV_VAR, "1")
+
+    assert profile_dispatch(profiles_dir, monkeypatch) is not None
+
+
+def test_profiles_are_bounded(profiles_dir, monkeypatch):
+    """Test that only the last MAX_PROFILES profiles are kept."""
+    monkeypatch.setattr(profiling, "MAX_PROFILES", 3)
+    profiling.arm(profiles_dir, dispatches=5)
+
+    for index in range(5):
+        profile_dispatch(profiles_dir, monkeypatch, hook=f"hook-{index}")
+
+    profiles = profiling.list_profiles(profiles_dir)
+    assert [profiling.get_hook_of_profile(path) for path in profiles] == [
+        "hook-2",
+        "hook-3",
+        "hook-4",
+    ]
+
+
+def test_summary_reports_functions_and_imports(profiles_dir, tmp_path, monkeypatch):
+    """Test that the summary has the top cumulative functions and the imported modules."""
+    (tmp_path / "profiled_module.py").write_text("VALUE = sum(range(1000))\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, "profiled_module", raising=False)
+    profiling.arm(profiles_dir, dispatches=1)
+
+    monkeypatch.setenv("JUJU_DISPATCH_PATH", "hooks/update-status")
+    profiler = profiling.start_if_armed()
+    importlib.import_module("profiled_module")
+    path = profiling.save_profile(profiler, profiles_dir, "update-status")
+
+    results = profiling.summarise_profile(path, top=5, attach=True)
+    assert results["hook"] == "update-status"
+    assert len(results["functions"].splitlines()) == 6
+    assert "profiled_module.py" in results["imports"]
+    import_times = json.loads(profiling.get_imports_path(path).read_text())
+    assert any(module.endswith("profiled_module.py") for module, _ in import_times)
+    raw_stats = tmp_path / "raw.pstats"
+    raw_stats.write_bytes(gzip.decompress(base64.b64decode(results["pstats"])))
+    assert pstats.Stats(str(raw_stats)).total_tt > 0
+
+
+def test_profile_action(profiles_dir, monkeypatch):
+    """Test that the profile action arms profiling and returns the last profile summary."""
+    harness = Harness(NgcIntegratorCharm)
+    harness.begin()
+
+    output = harness.run_action("profile", {"dispatches": 1})
+    assert output.results == {"armed-dispatches": "1", "armed-seconds": "0", "profiles": "0"}
+
+    profile_dispatch(profiles_dir, monkeypatch)
+    output = harness.run_action("profile")
+    assert output.results["armed-dispatches"] == "0"
+    assert output.results["profiles"] == "1"
+    assert output.results["last-profile"]["hook"] == "config-changed"
+    assert "pstats" not in output.results["last-profile"]
+
+    output = harness.run_action("profile", {"clear": True})
+    assert output.results["profiles"] == "0"
+
+
+def test_charm_imports_are_profiled(tmp_path):
+    """Test that profiling starts before the charm module imports ops and the libraries."""
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join([str(ROOT), str(ROOT / "lib"), str(ROOT / "src")]),
+        "JUJU_CHARM_DIR": str(tmp_path),
+        "JUJU_DISPATCH_PATH": "hooks/install",
+        profiling.PROFILE_ENV_VAR: "1",
+    }
+    subprocess.run([sys.executable, "-c", "import charm"], cwd=ROOT, env=env, check=True)
+
+    profiles_dir = tmp_path / profiling.PROFILES_DIR_NAME
+    [path] = profiling.list_profiles(profiles_dir)
+    import_times = json.loads(profiling.get_imports_path(path).read_text())
+    modules = [module for module, _ in import_times]
+    assert "ops/__init__.py" in modules
+    assert "charms/resource_dispatcher/v0/kubernetes_manifests.py" in modules
+    assert "components/manifests_relation_component.py" in modules
+
+    profiling.clear_profiles(profiles_dir)
+    assert list(profiles_dir.iterdir()) == []
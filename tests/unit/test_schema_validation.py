@@ -0,0 +1,106 @@
+# Copyright 2026 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+import copy
+from pathlib import Path
+
+import pytest
+import yaml
+
+from charm import PODDEFAULT_FILE, PODDEFAULT_SCHEMA_FILE
+from schema_validation import (
+    SchemaValidationError,
+    compile_schema,
+    load_validator,
+    validate_manifests,
+)
+
+SCHEMAS = {("kubeflow.org/v1alpha1", "PodDefault"): PODDEFAULT_SCHEMA_FILE}
+
+
+@pytest.fixture
+def poddefault() -> dict:
+    return yaml.safe_load(Path(PODDEFAULT_FILE).read_text())
+
+
+def test_poddefault_template_is_valid(poddefault):
+    """Test that the PodDefault template matches the vendored PodDefault schema."""
+    validate_manifests([poddefault], SCHEMAS)
+
+
+@pytest.mark.parametrize(
+    "update, expected_error",
+    [
+        (
+            lambda spec: spec.pop("selector"),
+            "PodDefault allow-ngc-notebook: spec: missing required field 'selector'",
+        ),
+        (
+            lambda spec: spec["selector"].update(matchLabels={"enable-ngc": True}),
+            "PodDefault allow-ngc-notebook: spec.selector.matchLabels.enable-ngc: "
+            "expected string, got boolean",
+        ),
+        (
+            lambda spec: spec["selector"].update(
+                matchExpressions=[{"key": "a", "operator": "Is"}]
+            ),
+            "PodDefault allow-ngc-notebook: spec.selector.matchExpressions[0].operator: "
+            "'Is' is not one of ['In', 'NotIn', 'Exists', 'DoesNotExist']",
+        ),
+        (
+            lambda spec: spec.update(args="jupyter lab"),
+            "PodDefault allow-ngc-notebook: spec.args: expected array, got string",
+        ),
+        (
+            lambda spec: spec.update(volumeMounts=[{"name": "shm"}]),
+            "PodDefault allow-ngc-notebook: spec.volumeMounts[0]: "
+            "missing required field 'mountPath'",
+        ),
+        (
+            lambda spec: spec.update(arg=["jupyter"]),
+            "PodDefault allow-ngc-notebook: spec.arg: unknown field",
+        ),
+    ],
+)
+def test_invalid_poddefaults(poddefault, update, expected_error):
+    """Test that invalid PodDefaults are rejected with the path of the invalid field."""
+    update(poddefault["spec"])
+
+    with pytest.raises(SchemaValidationError) as err:
+        validate_manifests([poddefault], SCHEMAS)
+
+    assert str(err.value) == expected_error
+
+
+def test_manifests_without_schema_are_not_validated():
+    """Test that manifests of a kind without schema are not validated."""
+    validate_manifests([{"apiVersion": "v1", "kind": "Secret", "data": 1}], SCHEMAS)
+
+
+def test_validator_is_compiled_once():
+    """Test that the validator of a schema file is compiled once and cached."""
+    assert load_validator(PODDEFAULT_SCHEMA_FILE) is load_validator(PODDEFAULT_SCHEMA_FILE)
+
+
+@pytest.mark.parametrize(
+    "value, valid",
+    [(1, True), ("1", True), (1.5, False), (True, False), (None, False)],
+)
+def test_int_or_string(value, valid):
+    """Test the x-kubernetes-int-or-string extension."""
+    validate = compile_schema({"x-kubernetes-int-or-string": True})
+
+    if valid:
+        validate(value, "port")
+    else:
+        with pytest.raises(SchemaValidationError):
+            validate(value, "port")
+
+
+def test_preserve_unknown_fields(poddefault):
+    """Test that unknown fields are accepted in objects preserving them."""
+    poddefault = copy.deepcopy(poddefault)
+    poddefault["metadata"]["uid"] = "1234"
+    poddefault["spec"]["volumes"] = [{"name": "shm", "emptyDir": {"medium": "Memory"}}]
+
+    validate_manifests([poddefault], SCHEMAS)
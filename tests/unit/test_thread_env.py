@@ -0,0 +1,97 @@
+# Copyright 2026 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+import json
+from pathlib import Path
+
+import pytest
+import yaml
+from ops.model import ActiveStatus, BlockedStatus
+
+from charm import PODDEFAULT_FILE, PODDEFAULTS_RELATION
+from gpu_variants import GpuVariant, render_gpu_variant_poddefault
+from lib.charms.resource_dispatcher.v0.kubernetes_manifests import KUBERNETES_MANIFESTS_FIELD
+from poddefault_generator import InvalidConfigError
+from thread_env import THREAD_ENV_VARS, get_thread_count, parse_cpu_budget, render_thread_env
+
+TEMPLATE = yaml.safe_load(Path(PODDEFAULT_FILE).read_text())
+
+
+def get_env(poddefault: dict) -> dict:
+    return {variable["name"]: variable for variable in poddefault["spec"].get("env", [])}
+
+
+@pytest.mark.parametrize(
+    "budget, threads", [("4", 4), ("3500m", 3), ("0.5", 1), ("250m", 1), (" 16 ", 16)]
+)
+def test_thread_count(budget, threads):
+    assert get_thread_count(parse_cpu_budget(budget, "cpu-budget")) == threads
+
+
+@pytest.mark.parametrize("budget", ["0", "0m", "-1", "abc", "4 cpus", "2Gi"])
+def test_invalid_cpu_budget(budget):
+    with pytest.raises(InvalidConfigError, match="cpu-budget"):
+        parse_cpu_budget(budget, "cpu-budget")
+
+
+def test_render_thread_env():
+    """Test that the thread counts are added to the PodDefaults, keeping the variables set."""
+    template = {
+        **TEMPLATE,
+        "spec": {
+            **TEMPLATE["spec"],
+            "env": [
+                {"name": "OMP_NUM_THREADS", "value": "2"},
+                {"name": "MKL_NUM_THREADS", "valueFrom": {"fieldRef": {"fieldPath": "x"}}},
+            ],
+        },
+    }
+    other_manifest = {"apiVersion": "v1", "kind": "ConfigMap", "metadata": {"name": "other"}}
+
+    other, poddefault = render_thread_env([other_manifest, template], "3500m")
+
+    assert other is other_manifest
+    env = get_env(poddefault)
+    assert env["OMP_NUM_THREADS"] == {"name": "OMP_NUM_THREADS", "value": "2"}
+    assert "value" not in env["MKL_NUM_THREADS"]
+    for name in THREAD_ENV_VARS[2:]:
+        assert env[name] == {"name": name, "value": "3"}
+    assert len(template["spec"]["env"]) == 2
+    assert poddefault["spec"]["args"] is TEMPLATE["spec"]["args"]
+
+
+def test_render_thread_env_per_variant_budget():
+    """Test that the budget of a variant overrides the budget of the config."""
+    manifests = [
+        TEMPLATE,
+        render_gpu_variant_poddefault(TEMPLATE, GpuVariant(name="a100", cpus="16")),
+        render_gpu_variant_poddefault(TEMPLATE, GpuVariant(name="mig")),
+    ]
+
+    assert [get_env(m)["OMP_NUM_THREADS"]["value"] for m in render_thread_env(manifests, "4")] == [
+        "4",
+        "16",
+        "4",
+    ]
+    assert render_thread_env(manifests) is manifests
+    assert get_env(manifests[1])["OMP_NUM_THREADS"]["value"] == "16"
+    assert "env" not in manifests[2]["spec"]
+    assert "annotations" not in manifests[1]["metadata"]
+
+
+def test_charm_sends_thread_env(leader_harness):
+    """Test that the charm sends the thread counts of cpu-budget, and is Blocked if invalid."""
+    leader_harness.begin_with_initial_hooks()
+    relation_id = leader_harness.add_relation(PODDEFAULTS_RELATION, "dispatcher")
+
+    leader_harness.update_config({"cpu-budget": "6"})
+    leader_harness.framework.commit()
+
+    relation_data = leader_harness.get_relation_data(relation_id, leader_harness.model.app)
+    (poddefault,) = json.loads(relation_data[KUBERNETES_MANIFESTS_FIELD])
+    assert get_env(poddefault)["OMP_NUM_THREADS"]["value"] == "6"
+    assert isinstance(leader_harness.charm.model.unit.status, ActiveStatus)
+
+    leader_harness.update_config({"cpu-budget": "six"})
+    assert isinstance(leader_harness.charm.model.unit.status, BlockedStatus)
+    assert "cpu-budget" in leader_harness.charm.model.unit.status.message